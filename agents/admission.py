@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import get_section
+from .metrics import registry
+
+ADMISSION_WAIT = registry.histogram(
+    "hrm_admission_wait_seconds",
+    "Time admitted requests spent queued for a provider slot.",
+    ("provider",),
+)
+ADMISSION_REJECTED = registry.counter(
+    "hrm_admission_rejected_total",
+    "Requests rejected by admission control.",
+    ("provider", "reason"),
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within its queue deadline."""
+
+    def __init__(self, provider: str, reason: str, retry_after: float) -> None:
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        super().__init__(f"{provider}: {reason} (retry after {self.retry_after}s)")
+
+
+class Ticket:
+    """Concurrency slot held by one admitted request; release is idempotent."""
+
+    def __init__(self, limiter: "ProviderLimiter") -> None:
+        self._limiter = limiter
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._limiter._release()
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class ProviderLimiter:
+    """Concurrency cap plus token-bucket rate limit for one LLM provider.
+
+    Waiters queue on a condition variable up to ``max_queue`` deep. A request
+    is rejected immediately when the queue is full or when the rate limit
+    alone would keep it waiting past its deadline, so callers fail fast
+    instead of timing out upstream.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: Optional[int] = None,
+        rate_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+    ) -> None:
+        self.provider = provider
+        self.max_concurrency = int(max_concurrency) if max_concurrency else None
+        self.rate = float(rate_per_minute) / 60.0 if rate_per_minute else None
+        self.capacity = float(burst or rate_per_minute or 1)
+        self.tokens = self.capacity
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = float(queue_timeout)
+        self._refilled_at = time.monotonic()
+        self._cond = threading.Condition()
+
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "rate_limited": 0, "timeout": 0}
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _token_wait(self, cost: float) -> float:
+        if self.rate is None or self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        ADMISSION_REJECTED.inc(provider=self.provider, reason=reason)
+        return AdmissionRejected(self.provider, reason, retry_after)
+
+    def admit(self, cost: float = 1, timeout: Optional[float] = None) -> Ticket:
+        cost = min(float(cost), self.capacity)
+        # An explicit timeout (e.g. the rest of a request's deadline) can only shorten the wait
+        timeout = self.queue_timeout if timeout is None else min(self.queue_timeout, float(timeout))
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            self._refill(started)
+            slot_free = self.max_concurrency is None or self.in_flight < self.max_concurrency
+            if not (slot_free and self._token_wait(cost) == 0.0) and self.queued >= self.max_queue:
+                raise self._reject("queue_full", self._token_wait(cost) or 1.0)
+
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    token_wait = self._token_wait(cost)
+                    if token_wait and now + token_wait > deadline:
+                        raise self._reject("rate_limited", token_wait)
+                    slot_free = self.max_concurrency is None or self.in_flight < self.max_concurrency
+                    if slot_free and token_wait == 0.0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise self._reject("timeout", 1.0)
+                    # Wake up on release, or when enough tokens have been refilled
+                    self._cond.wait(min(remaining, token_wait) if token_wait else remaining)
+            finally:
+                self.queued -= 1
+
+            if self.rate is not None:
+                self.tokens -= cost
+            self.in_flight += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        ADMISSION_WAIT.observe(waited, provider=self.provider)
+        return Ticket(self)
+
+    def charge(self, cost: float = 1, timeout: Optional[float] = None) -> None:
+        """Take ``cost`` more rate tokens for an already admitted request, without a new slot.
+
+        Used for calls decided mid-request (e.g. the pipeline's actions guide
+        stage); raises AdmissionRejected if the tokens are not available in time.
+        """
+        if self.rate is None:
+            return
+        cost = min(float(cost), self.capacity)
+        timeout = self.queue_timeout if timeout is None else min(self.queue_timeout, float(timeout))
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                token_wait = self._token_wait(cost)
+                if token_wait == 0.0:
+                    self.tokens -= cost
+                    return
+                if now + token_wait > deadline:
+                    raise self._reject("rate_limited", token_wait)
+                self._cond.wait(token_wait)
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "max_concurrency": self.max_concurrency,
+                "rate_per_minute": round(self.rate * 60, 3) if self.rate is not None else None,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "tokens": round(self.tokens, 3) if self.rate is not None else None,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.admitted, 4) if self.admitted else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+            }
+
+
+class AdmissionController:
+    """Per-provider admission in front of ``build_llm``.
+
+    Limits come from the ``admission`` section of configure.json::
+
+        "admission": {
+          "queue_timeout_seconds": 10,
+          "providers": {
+            "default": {"max_concurrency": 16, "max_queue": 64},
+            "gauss": {"max_concurrency": 4, "rate_per_minute": 20}
+          }
+        }
+    """
+
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None) -> None:
+        cfg = cfg or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.queue_timeout = float(cfg.get("queue_timeout_seconds", 10))
+        providers = cfg.get("providers", {})
+        self._provider_cfg: Dict[str, Dict[str, Any]] = providers if isinstance(providers, dict) else {}
+        self._limiters: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str) -> ProviderLimiter:
+        key = str(provider or "default").lower()
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limits = {**self._provider_cfg.get("default", {}), **self._provider_cfg.get(key, {})}
+                limiter = ProviderLimiter(
+                    key,
+                    max_concurrency=limits.get("max_concurrency"),
+                    rate_per_minute=limits.get("rate_per_minute"),
+                    burst=limits.get("burst"),
+                    max_queue=limits.get("max_queue", 64),
+                    queue_timeout=limits.get("queue_timeout_seconds", self.queue_timeout),
+                )
+                self._limiters[key] = limiter
+            return limiter
+
+    def admit(self, provider: str, cost: float = 1, timeout: Optional[float] = None) -> Ticket:
+        """Block until a slot and rate tokens are available, or raise AdmissionRejected.
+
+        The wait is bounded by the provider's queue timeout and, if given, by ``timeout``.
+        """
+        if not self.enabled:
+            return Ticket(_NullLimiter())
+        return self.limiter(provider).admit(cost=cost, timeout=timeout)
+
+    def charge(self, provider: str, cost: float = 1, timeout: Optional[float] = None) -> None:
+        """``ProviderLimiter.charge`` for ``provider``; a no-op when admission is disabled."""
+        if self.enabled:
+            self.limiter(provider).charge(cost=cost, timeout=timeout)
+
+    def gauge_samples(self, field: str):
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return [({"provider": limiter.provider}, getattr(limiter, field)) for limiter in limiters]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {
+            "enabled": self.enabled,
+            "providers": {name: limiter.stats() for name, limiter in limiters.items()},
+        }
+
+
+class _NullLimiter:
+    def _release(self) -> None:
+        pass
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide admission controller shared by the API server and batch workers."""
+    global _admission_controller
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            controller = AdmissionController(get_section("admission"))
+            registry.gauge_callback(
+                "hrm_admission_in_flight", "Admitted requests currently holding a provider slot.",
+                ("provider",), lambda: controller.gauge_samples("in_flight"),
+            )
+            registry.gauge_callback(
+                "hrm_admission_queue_depth", "Requests currently waiting for a provider slot.",
+                ("provider",), lambda: controller.gauge_samples("queued"),
+            )
+            _admission_controller = controller
+        return _admission_controller
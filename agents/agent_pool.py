@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .root_agent import RootAgent
+
+
+PoolKey = Tuple[str, str]
+
+
+class RootAgentPool:
+    """Thread-safe, lazily populated LRU pool of fully initialized RootAgents.
+
+    Building a RootAgent re-reads configure.json, rebuilds every sub-agent and
+    re-parses prompt.json, so agents are built once per (provider, provider
+    kwargs) and reused by subsequent requests.
+    """
+
+    def __init__(self, max_size: int = 8, factory: Optional[Callable[..., RootAgent]] = None) -> None:
+        self.max_size = max(1, int(max_size))
+        self._factory = factory or RootAgent
+        self._agents: "OrderedDict[PoolKey, RootAgent]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-key build locks so concurrent misses for the same key build only once
+        self._build_locks: Dict[PoolKey, threading.Lock] = {}
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, provider_kwargs: Optional[Dict[str, Any]] = None) -> PoolKey:
+        """Build a hashable pool key; ``None`` kwargs means "use configure.json"."""
+        kwargs_key = "" if provider_kwargs is None else json.dumps(provider_kwargs, sort_keys=True, default=str)
+        return (str(provider).lower(), kwargs_key)
+
+    def get(self, provider: str, provider_kwargs: Optional[Dict[str, Any]] = None) -> RootAgent:
+        """Return a pooled RootAgent for the provider, building it on first use."""
+        key = self.make_key(provider, provider_kwargs)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                self.hits += 1
+                return agent
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            # Another thread may have finished building while we waited
+            with self._lock:
+                agent = self._agents.get(key)
+                if agent is not None:
+                    self._agents.move_to_end(key)
+                    self.hits += 1
+                    return agent
+
+            try:
+                agent = self._factory(provider_override=provider, provider_kwargs_override=provider_kwargs)
+                with self._lock:
+                    self._agents[key] = agent
+                    self.builds += 1
+                    while len(self._agents) > self.max_size:
+                        self._agents.popitem(last=False)
+                        self.evictions += 1
+            finally:
+                with self._lock:
+                    self._build_locks.pop(key, None)
+            print(f"[RootAgentPool] Built RootAgent for provider={provider} (size={len(self._agents)})")
+            return agent
+
+    def clear(self) -> None:
+        with self._lock:
+            self._agents.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._agents),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "builds": self.builds,
+                "evictions": self.evictions,
+                "providers": [key[0] for key in self._agents.keys()],
+            }
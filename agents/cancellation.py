@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Generator, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Request header carrying the remaining time budget in seconds, hop to hop
+TIMEOUT_HEADER = "X-Request-Timeout"
+
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+class GenerationCancelled(Exception):
+    """Raised inside a generation whose CancellationToken was cancelled."""
+
+    def __init__(self, reason: str = "cancelled") -> None:
+        super().__init__(f"generation cancelled ({reason})")
+        self.reason = reason
+
+
+class CancellationToken:
+    """Thread-safe cancellation signal passed down a generation.
+
+    The request side calls ``cancel`` (e.g. when the SSE client is gone);
+    the generation side checks ``raise_if_cancelled`` between steps or
+    registers an ``on_cancel`` callback to abort blocking work.
+
+    With ``timeout`` set the token also carries a request deadline. It is
+    checked lazily: once the time is up, the next check cancels the token
+    with reason ``deadline_exceeded``. Blocking calls size their own timeouts
+    with ``remaining``/``budget`` so each stage only uses what is left of the
+    request's budget and returns in time for that check.
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        self.deadline: Optional[float] = None
+        if timeout is not None:
+            self.deadline = time.monotonic() + max(0.0, float(timeout))
+
+    @property
+    def cancelled(self) -> bool:
+        if self.deadline is not None and not self._event.is_set() and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """Cancel the token; returns False if it was already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[CancellationToken] on_cancel callback failed: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline (never negative), or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def budget(self, default: Optional[float] = None) -> Optional[float]:
+        """Timeout for the next blocking call: ``default`` capped by the remaining time.
+
+        Raises GenerationCancelled if the token is cancelled or the deadline
+        has already passed, so no call is started without any budget left.
+        """
+        self.raise_if_cancelled()
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(float(default), remaining)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise GenerationCancelled(self.reason or "cancelled")
+
+
+def raise_if_cancelled(token: Optional[CancellationToken]) -> None:
+    """``token.raise_if_cancelled()`` that accepts ``None`` for callers without a token."""
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def time_budget(token: Optional[CancellationToken], default: Optional[float] = None) -> Optional[float]:
+    """``token.budget(default)`` that accepts ``None`` for callers without a token."""
+    return default if token is None else token.budget(default)
+
+
+def parse_timeout(*values: Any, default: Optional[float] = None, maximum: Optional[float] = None) -> Optional[float]:
+    """Return the first positive number of seconds among ``values``, capped at ``maximum``.
+
+    Used for the ``X-Request-Timeout`` header / ``timeout`` request field;
+    invalid or missing values fall through to ``default``.
+    """
+    for value in values:
+        if value is None or value == "":
+            continue
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            continue
+        if seconds > 0:
+            return seconds if maximum is None else min(seconds, float(maximum))
+    return default
+
+
+def cancellable(chunks: Iterable[T], token: Optional[CancellationToken]) -> Generator[T, None, None]:
+    """Pass chunks through, stopping with GenerationCancelled once ``token`` is cancelled.
+
+    The token is checked before each chunk is pulled and before it is
+    yielded, and the source generator is closed on the way out so the
+    upstream stream (HTTP connection, shared single-flight, ...) is released
+    as soon as the next chunk arrives rather than when it would have ended.
+    A wait for the next chunk is only cut short by the source itself (LLM
+    clients given the token close their HTTP response); an error it raises
+    because of that is reported as GenerationCancelled.
+    """
+    if token is None:
+        yield from chunks
+        return
+    iterator = iter(chunks)
+    try:
+        while True:
+            token.raise_if_cancelled()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            except Exception:
+                token.raise_if_cancelled()
+                raise
+            token.raise_if_cancelled()
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+async def acancellable(chunks: AsyncIterable[T], token: Optional[CancellationToken]) -> AsyncIterator[T]:
+    """Async counterpart of ``cancellable``; the source async generator is closed on the way out.
+
+    Unlike the sync version, cancellation (or the deadline) also interrupts a
+    wait for the next chunk: the pending read is cancelled, which unwinds the
+    source at its current await and closes its HTTP response.
+    """
+    iterator = chunks.__aiter__()
+    if token is None:
+        async for chunk in iterator:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    cancelled = loop.create_future()
+
+    def wake() -> None:
+        # Called from whichever thread cancels the token
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: cancelled.done() or cancelled.set_result(None))
+
+    token.on_cancel(wake)
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            token.raise_if_cancelled()
+            pending = asyncio.ensure_future(iterator.__anext__())
+            await asyncio.wait({pending, cancelled}, timeout=token.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not pending.done():
+                pending.cancel()
+                await asyncio.wait({pending})
+                # Woken by the token, or the wait ran out at the deadline
+                token.cancel(DEADLINE_EXCEEDED)
+                token.raise_if_cancelled()
+            future, pending = pending, None
+            try:
+                chunk = future.result()
+            except StopAsyncIteration:
+                return
+            except Exception:
+                token.raise_if_cancelled()
+                raise
+            token.raise_if_cancelled()
+            yield chunk
+    finally:
+        if pending is not None and not pending.done():
+            # The source cannot be closed while a read is still running on it
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
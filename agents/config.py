@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict
+
+
+def project_root() -> str:
+    # agents/.. -> project root
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def load_config() -> Dict[str, Any]:
+    """Load configure.json at project root; returns {} if missing or invalid."""
+    try:
+        config_path = os.path.join(project_root(), "configure.json")
+        if not os.path.exists(config_path):
+            return {}
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def get_section(name: str) -> Dict[str, Any]:
+    """Return a top-level configure.json section as a dict ({} if absent)."""
+    section = load_config().get(name, {})
+    return section if isinstance(section, dict) else {}
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, AsyncIterator, Dict, Generator, List, Optional, Tuple
 
-from .llm_providers import build_llm
+from .cancellation import CancellationToken, acancellable, cancellable, time_budget
+from .llm_providers import build_agent_llm
 from .prompt_builder import PromptBuilder
 from .guardrails import Guardrail
-from .logger import log_event
+from .logger import log_event, prompt_hash
+from .metrics import PROMPT_BUILD_TIME, aobserve_stream, observe_stream
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import SingleFlight, get_single_flight
 
 
 class DiagnosisSummarizer:
@@ -15,12 +20,16 @@ class DiagnosisSummarizer:
         provider: str = "gauss",
         prompt_builder: Optional[PromptBuilder] = None,
         guardrail: Optional[Guardrail] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
         **provider_kwargs: Any,
     ) -> None:
         self.provider = provider
         self.provider_kwargs = provider_kwargs
         self.prompt_builder = prompt_builder or PromptBuilder(default_language="ko")
         self.guardrail = guardrail or Guardrail()
+        self.response_cache = response_cache or get_response_cache()
+        self.single_flight = single_flight or get_single_flight()
 
     def _build_diagnosis_text(self, analytics: Dict[str, Any]) -> str:
         """Build diagnosis text from analytics data."""
@@ -43,7 +52,8 @@ class DiagnosisSummarizer:
 
         return "\n".join(diagnosis_summary)
 
-    def summarize(self, analytics: Dict[str, Any], language: str = "ko", stream: bool = True):
+    def _prepare(self, analytics: Dict[str, Any], language: str, stream: bool) -> Tuple[str, str]:
+        """Render the prompt and its response cache key."""
         payload = {"analytics": analytics, "language": language}
         payload = self.guardrail.pre_guard(payload)
         
@@ -51,29 +61,115 @@ class DiagnosisSummarizer:
         device_type = analytics.get("deviceType", "Unknown")
         diagnosis_text = self._build_diagnosis_text(analytics)
         
-        # Build prompt using PromptBuilder
-        prompt = self.prompt_builder.build_diagnosis_prompt(device_type, diagnosis_text, self.provider, language)
+        # Build prompt using PromptBuilder, on one template version for the whole request
+        builder = self.prompt_builder.pinned()
+        with PROMPT_BUILD_TIME.time(agent="diagnosis_summarizer", provider=self.provider, language=language):
+            prompt = builder.build_diagnosis_prompt(device_type, diagnosis_text, self.provider, language)
         print(f"[DiagnosisSummarizer] provider={self.provider}, language={language}")
         log_event({
             "stage": "diagnosis_build_prompt",
             "provider": self.provider,
             "language": language,
+            "prompt_version": builder.version,
             "prompt_preview": prompt[:300],
+            "prompt_hash": prompt_hash(prompt),
         })
-        llm = build_llm(self.provider, **self.provider_kwargs)
+        cache_key = self.response_cache.make_key(
+            agent="diagnosis_summarizer",
+            prompt=prompt,
+            provider=self.provider,
+            model=self.provider_kwargs.get("model") or self.provider_kwargs.get("model_id"),
+            language=language,
+            prompt_version=builder.version,
+            stream=stream,
+        )
+        return prompt, cache_key
 
-        # For Gauss provider, force non-streaming and emit once
-        if stream and self.provider.lower() != "gauss":
+    def summarize(
+        self,
+        analytics: Dict[str, Any],
+        language: str = "ko",
+        stream: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        prompt, cache_key = self._prepare(analytics, language, stream)
+        # Identical requests already in flight share one upstream generation; a cancelled
+        # request only detaches itself, the LLM stream stops once no subscriber is left
+        yield from observe_stream(
+            cancellable(
+                self.response_cache.stream(
+                    cache_key,
+                    lambda: self.single_flight.stream(
+                        cache_key,
+                        lambda flight_token: self._generate(
+                            prompt, language, stream, time_budget(cancel_token), flight_token
+                        ),
+                        cancel_token,
+                    ),
+                ),
+                cancel_token,
+            ),
+            "diagnosis_summarizer", self.provider, language,
+        )
+
+    async def asummarize(
+        self,
+        analytics: Dict[str, Any],
+        language: str = "ko",
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """Async streaming ``summarize``, generating through the client's native async path."""
+        # Prompt building (serialization, token counting, stats) is CPU work kept off the event loop
+        prompt, cache_key = await asyncio.to_thread(self._prepare, analytics, language, True)
+        async for chunk in aobserve_stream(
+            acancellable(
+                self.response_cache.astream(
+                    cache_key,
+                    lambda: self.single_flight.astream(
+                        cache_key, lambda: self._agenerate(prompt, time_budget(cancel_token))
+                    ),
+                ),
+                cancel_token,
+            ),
+            "diagnosis_summarizer", self.provider, language,
+        ):
+            yield chunk
+
+    async def _agenerate(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        llm = build_agent_llm("diagnosis_summarizer", self.provider, **self.provider_kwargs)
+        async for chunk in llm.astream(prompt, timeout=timeout):
+            text = chunk.get("text", "")
+            if text:
+                yield text
+
+    def _generate(
+        self,
+        prompt: str,
+        language: str,
+        stream: bool,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        llm = build_agent_llm("diagnosis_summarizer", self.provider, **self.provider_kwargs)
+
+        if stream:
             preview = []
-            for chunk in llm.generate(prompt, stream=True):
+            for chunk in llm.generate(prompt, stream=True, timeout=timeout, cancel_token=cancel_token):
                 text = chunk.get("text", "")
                 if text:
                     if len("".join(preview)) < 500:
                         preview.append(text)
                     yield text
+            # Streamed outputs are logged too, so the replay provider can serve them
+            log_event({
+                "stage": "diagnosis_llm_output",
+                "provider": self.provider,
+                "language": language,
+                "output_preview": "".join(preview)[:300],
+            })
             return
 
-        output = llm.generate(prompt, stream=False)
+        output = llm.generate(prompt, stream=False, timeout=timeout, cancel_token=cancel_token)
         log_event({
             "stage": "diagnosis_llm_output",
             "provider": self.provider,
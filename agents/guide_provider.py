@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from .llm_providers import build_llm
+from .cancellation import CancellationToken, acancellable, cancellable, time_budget
+from .llm_providers import build_agent_llm
 from .prompt_builder import PromptBuilder
 from .guardrails import Guardrail
-from .logger import log_event
+from .logger import log_event, prompt_hash
+from .metrics import PROMPT_BUILD_TIME, aobserve_stream, observe_stream
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import SingleFlight, get_single_flight
 
 
 class GuideProvider:
@@ -14,82 +19,178 @@ class GuideProvider:
         provider: str = "openai",
         prompt_builder: Optional[PromptBuilder] = None,
         guardrail: Optional[Guardrail] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
         **provider_kwargs: Any,
     ) -> None:
         self.provider = provider
         self.provider_kwargs = provider_kwargs
         self.prompt_builder = prompt_builder or PromptBuilder(default_language="ko")
+        self.response_cache = response_cache or get_response_cache()
+        self.single_flight = single_flight or get_single_flight()
         if guardrail is None:
             from .guardrails import GuideGuardrail
             self.guardrail = GuideGuardrail(include_readability_report=True)
         else:
             self.guardrail = guardrail
 
-    def provide(self, diagnosis_summary: str, op_summary: str, language: str = "ko", stream: bool = True):
+    def provide(
+        self,
+        diagnosis_summary: str,
+        op_summary: str,
+        language: str = "ko",
+        stream: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
         payload = {"diagnosis_summary": diagnosis_summary, "op_summary": op_summary, "language": language}
         payload = self.guardrail.pre_guard(payload)
         
         # Build prompt using PromptBuilder
-        prompt = self.prompt_builder.build_guide_prompt(diagnosis_summary, op_summary, self.provider, language)
+        builder = self.prompt_builder.pinned()
+        with PROMPT_BUILD_TIME.time(agent="guide_provider", provider=self.provider, language=language):
+            prompt = builder.build_guide_prompt(diagnosis_summary, op_summary, self.provider, language)
         print(f"[GuideProvider] provider={self.provider}, language={language}")
         log_event({
             "stage": "guide_build_prompt",
             "provider": self.provider,
             "language": language,
+            "prompt_version": builder.version,
             "prompt_preview": prompt[:300],
+            "prompt_hash": prompt_hash(prompt),
         })
-        llm = build_llm(self.provider, **self.provider_kwargs)
-
-        # For Gauss provider, force non-streaming and emit once
-        if stream and self.provider.lower() != "gauss":
-            preview = []
-            for chunk in llm.generate(prompt, stream=True):
-                text = chunk.get("text", "")
-                if text:
-                    if len("".join(preview)) < 500:
-                        preview.append(text)
-                    yield text
-            return
-
-        output = llm.generate(prompt, stream=False)
-        log_event({
-            "stage": "guide_llm_output",
-            "provider": self.provider,
-            "language": language,
-            "output_preview": (output or "")[:300],
-        })
-        yield self.guardrail.post_guard(output or "")
+        yield from observe_stream(
+            cancellable(
+                self._generate(
+                    prompt, language, stream, "guide_llm_output", time_budget(cancel_token), cancel_token
+                ),
+                cancel_token,
+            ),
+            "guide_provider", self.provider, language,
+        )
 
-    def provide_actions_guide(self, diagnosis_summary: str, retrieved_documents: str, language: str = "ko", stream: bool = True):
-        """Generate customer action guide based on diagnosis and retrieved documents."""
+    def _prepare_actions_guide(
+        self, diagnosis_summary: str, retrieved_documents: str, language: str, stream: bool
+    ) -> Tuple[str, str]:
+        """Render the actions guide prompt and its response cache key."""
         payload = {"diagnosis_summary": diagnosis_summary, "retrieved_documents": retrieved_documents, "language": language}
         payload = self.guardrail.pre_guard(payload)
         
-        # Build prompt using PromptBuilder
-        prompt = self.prompt_builder.build_actions_guide_prompt(diagnosis_summary, retrieved_documents, language)
+        # Build prompt using PromptBuilder, on one template version for the whole request
+        builder = self.prompt_builder.pinned()
+        with PROMPT_BUILD_TIME.time(agent="actions_guide_provider", provider=self.provider, language=language):
+            prompt = builder.build_actions_guide_prompt(diagnosis_summary, retrieved_documents, language)
         print(f"[GuideProvider] actions_guide provider={self.provider}, language={language}")
         log_event({
             "stage": "actions_guide_build_prompt",
             "provider": self.provider,
             "language": language,
+            "prompt_version": builder.version,
             "prompt_preview": prompt[:300],
+            "prompt_hash": prompt_hash(prompt),
         })
-        llm = build_llm(self.provider, **self.provider_kwargs)
+        cache_key = self.response_cache.make_key(
+            agent="guide_provider.actions_guide",
+            prompt=prompt,
+            provider=self.provider,
+            model=self.provider_kwargs.get("model") or self.provider_kwargs.get("model_id"),
+            language=language,
+            prompt_version=builder.version,
+            stream=stream,
+        )
+        return prompt, cache_key
+
+    def provide_actions_guide(
+        self,
+        diagnosis_summary: str,
+        retrieved_documents: str,
+        language: str = "ko",
+        stream: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        """Generate customer action guide based on diagnosis and retrieved documents."""
+        prompt, cache_key = self._prepare_actions_guide(diagnosis_summary, retrieved_documents, language, stream)
+        # Identical requests already in flight share one upstream generation; a cancelled
+        # request only detaches itself, the LLM stream stops once no subscriber is left
+        yield from observe_stream(
+            cancellable(
+                self.response_cache.stream(
+                    cache_key,
+                    lambda: self.single_flight.stream(
+                        cache_key,
+                        lambda flight_token: self._generate(
+                            prompt, language, stream, "actions_guide_llm_output", time_budget(cancel_token),
+                            flight_token,
+                        ),
+                        cancel_token,
+                    ),
+                ),
+                cancel_token,
+            ),
+            "actions_guide_provider", self.provider, language,
+        )
+
+    async def aprovide_actions_guide(
+        self,
+        diagnosis_summary: str,
+        retrieved_documents: str,
+        language: str = "ko",
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """Async streaming ``provide_actions_guide``, generating through the client's native async path."""
+        # Prompt building (serialization, token counting, stats) is CPU work kept off the event loop
+        prompt, cache_key = await asyncio.to_thread(self._prepare_actions_guide, diagnosis_summary, retrieved_documents, language, True)
+        async for chunk in aobserve_stream(
+            acancellable(
+                self.response_cache.astream(
+                    cache_key,
+                    lambda: self.single_flight.astream(
+                        cache_key, lambda: self._agenerate(prompt, time_budget(cancel_token))
+                    ),
+                ),
+                cancel_token,
+            ),
+            "actions_guide_provider", self.provider, language,
+        ):
+            yield chunk
+
+    async def _agenerate(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        llm = build_agent_llm("actions_guide_provider", self.provider, **self.provider_kwargs)
+        async for chunk in llm.astream(prompt, timeout=timeout):
+            text = chunk.get("text", "")
+            if text:
+                yield text
+
+    def _generate(
+        self,
+        prompt: str,
+        language: str,
+        stream: bool,
+        output_stage: str,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        llm = build_agent_llm("actions_guide_provider", self.provider, **self.provider_kwargs)
 
-        # For Gauss provider, force non-streaming and emit once
-        if stream and self.provider.lower() != "gauss":
+        if stream:
             preview = []
-            for chunk in llm.generate(prompt, stream=True):
+            for chunk in llm.generate(prompt, stream=True, timeout=timeout, cancel_token=cancel_token):
                 text = chunk.get("text", "")
                 if text:
                     if len("".join(preview)) < 500:
                         preview.append(text)
                     yield text
+            # Streamed outputs are logged too, so the replay provider can serve them
+            log_event({
+                "stage": output_stage,
+                "provider": self.provider,
+                "language": language,
+                "output_preview": "".join(preview)[:300],
+            })
             return
 
-        output = llm.generate(prompt, stream=False)
+        output = llm.generate(prompt, stream=False, timeout=timeout, cancel_token=cancel_token)
         log_event({
-            "stage": "actions_guide_llm_output",
+            "stage": output_stage,
             "provider": self.provider,
             "language": language,
             "output_preview": (output or "")[:300],
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import get_section
+from .token_budget import TIME_KEYS
+
+try:
+    import numpy as np
+except ImportError:  # optional; the statistics stage is skipped without it
+    np = None
+
+MODE_KEYS = ("mode", "operationMode", "opMode", "operation_mode", "course", "cycle", "status", "state")
+ERROR_KEYS = ("errorCode", "error_code", "errorCodes", "error", "errors")
+IDLE_VALUES = ("off", "standby", "idle", "power_off", "poweroff", "stop", "stopped", "none", "")
+NO_ERROR_VALUES = ("", "0", "none", "null", "normal", "ok", "false")
+
+_DAY = 86400.0
+# Byte offsets of the digits in "YYYY-MM-DDTHH:MM:SS"
+_ISO_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+# Keys of a sample of events are used as the columns; a stride sample keeps wide histories cheap
+_KEY_SAMPLE = 256
+
+
+def available() -> bool:
+    return np is not None
+
+
+def find_events(history: Any) -> Optional[Tuple[Tuple[Any, ...], List[Dict[str, Any]]]]:
+    """Path and entries of the longest list of dict records nested in ``history``."""
+    best: Optional[Tuple[Tuple[Any, ...], List[Dict[str, Any]]]] = None
+    stack: List[Tuple[Tuple[Any, ...], Any]] = [((), history)]
+    while stack:
+        path, obj = stack.pop()
+        items = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else ()
+        for key, value in items:
+            if isinstance(value, list) and value and isinstance(value[0], dict) and all(isinstance(v, dict) for v in value):
+                if best is None or len(value) > len(best[1]):
+                    best = (path + (key,), value)
+                continue
+            if isinstance(value, (dict, list)):
+                stack.append((path + (key,), value))
+    return best
+
+
+def without_path(history: Dict[str, Any], path: Sequence[Any]) -> Dict[str, Any]:
+    """Copy of ``history`` with the value at ``path`` removed; only containers on the path are copied."""
+    if not path:
+        return history
+    head, rest = path[0], path[1:]
+    copied = list(history) if isinstance(history, list) else dict(history)
+    if rest:
+        copied[head] = without_path(history[head], rest)
+    elif isinstance(copied, list):
+        copied.pop(head)
+    else:
+        copied.pop(head, None)
+    return copied
+
+
+def _parse_times(values: List[Any]) -> Optional["np.ndarray"]:
+    """Seconds since the epoch for numeric or ISO-8601 times (wall-clock, offsets ignored); None if unparseable."""
+    first = values[0]
+    if _is_number(first):
+        try:
+            seconds = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            return None
+        if np.isnan(seconds).any():
+            return None
+        # Epoch milliseconds
+        return seconds / 1000.0 if np.median(seconds) > 1e11 else seconds
+    if not isinstance(first, str):
+        return None
+    b = _time_bytes(values)
+    if b is None:
+        return None
+    digits = b[:, _ISO_DIGITS].astype(np.int64) - 48
+    if (
+        (b[:, 4] == 45).all() and (b[:, 7] == 45).all()
+        and (b[:, 13] == 58).all() and (b[:, 16] == 58).all()
+        and ((digits >= 0) & (digits <= 9)).all()
+    ):
+        # "YYYY-MM-DD?HH:MM:SS" read straight from the bytes, much faster than string parsing;
+        # pairs of digits give YY, YY, MM, DD, hh, mm, ss
+        pairs = digits[:, 0::2] * 10 + digits[:, 1::2]
+        year = pairs[:, 0] * 100 + pairs[:, 1]
+        months = (year - 1970).astype("datetime64[Y]") + (pairs[:, 2] - 1).astype("timedelta64[M]")
+        days = months.astype("datetime64[D]").astype(np.int64) + pairs[:, 3] - 1
+        clock = pairs[:, 4] * 3600 + pairs[:, 5] * 60 + pairs[:, 6]
+        return (days * 86400 + clock).astype(np.float64)
+    try:
+        return np.array([v[:19] for v in values], dtype="datetime64[s]").astype(np.int64).astype(np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def _time_bytes(values: List[Any]) -> Optional["np.ndarray"]:
+    """First 19 bytes of every time string as an (n, 19) uint8 array; None if a value is not ASCII text."""
+    width = len(values[0])
+    try:
+        if width >= 19 and set(map(len, values)) == {width}:
+            # Equal-length strings (the usual case): one join instead of encoding each value
+            joined = "".join(values).encode("ascii")
+            return np.frombuffer(joined, dtype=np.uint8).reshape(len(values), width)[:, :19]
+        return np.array(values, dtype="S19").view(np.uint8).reshape(len(values), 19)
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+
+
+def _iso(seconds: float) -> str:
+    return str(np.datetime64(int(seconds), "s"))
+
+
+def _num(value: float, digits: int = 3) -> Any:
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, digits)
+
+
+def _slope_per_day(t_days: "np.ndarray", y: "np.ndarray") -> Optional[float]:
+    """Least-squares slope of ``y`` over ``t_days`` (units per day)."""
+    if len(y) < 2:
+        return None
+    x = t_days - t_days.mean()
+    denom = float((x * x).sum())
+    if denom == 0.0:
+        return None
+    return float((x * (y - y.mean())).sum()) / denom
+
+
+def _encode(column: List[Any]) -> Optional[Tuple[List[Any], "np.ndarray"]]:
+    """Distinct values and per-event codes of a categorical column; None if values are unhashable."""
+    try:
+        index = {v: i for i, v in enumerate(dict.fromkeys(column))}
+    except TypeError:
+        return None
+    return list(index), np.fromiter(map(index.__getitem__, column), dtype=np.int64, count=len(column))
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numeric(column: List[Any]) -> Optional["np.ndarray"]:
+    try:
+        values = np.array(column, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(values).all() else values
+
+
+def _numeric_column(events: List[Dict[str, Any]], key: str) -> Optional["np.ndarray"]:
+    """``key`` of every event as float64 (NaN where missing or None), read without an intermediate list."""
+    try:
+        return np.fromiter(map(itemgetter(key), events), dtype=np.float64, count=len(events))
+    except (KeyError, TypeError, ValueError):
+        # Missing keys or None values
+        return _numeric([e.get(key) for e in events])
+
+
+def compute_history_stats(events: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compact usage statistics of a list of history events, computed with NumPy.
+
+    Mode/status columns (``mode_keys``) give per-value event counts and
+    durations; an event lasts until the next one, capped at
+    ``max_gap_seconds``. Events whose mode columns are all non-idle count as
+    active and feed the hour-of-day, weekday and per-day usage histograms.
+    The first ``error_keys`` column gives error frequency per code, and every
+    numeric column its min/mean/max and least-squares trend per day. Without
+    a parseable time column only counts and value ranges are reported.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for operation-history statistics")
+    cfg = get_section("history_stats") if config is None else config
+    mode_keys = cfg.get("mode_keys") or MODE_KEYS
+    error_keys = cfg.get("error_keys") or ERROR_KEYS
+    idle_values = {str(v).lower() for v in (cfg.get("idle_values") or IDLE_VALUES)}
+    top_n = int(cfg.get("top_values", 5))
+    max_gap = float(cfg.get("max_gap_seconds", 3600))
+
+    n = len(events)
+    sample = events[:: max(1, n // _KEY_SAMPLE)]
+    keys: Dict[str, None] = {}
+    for event in sample:
+        keys.update(dict.fromkeys(event))
+    stats: Dict[str, Any] = {"events": n}
+
+    def column(key: str) -> List[Any]:
+        try:
+            return list(map(itemgetter(key), events))
+        except KeyError:
+            return [e.get(key) for e in events]
+
+    time_key = next((k for k in TIME_KEYS if k in keys), None)
+    t = _parse_times(column(time_key)) if time_key else None
+    if t is not None:
+        gaps = np.diff(t)
+        if (gaps >= 0).all():
+            # Already in time order (the usual case): columns need no reordering
+            order = None
+        else:
+            order = np.argsort(t, kind="stable")
+            t = t[order]
+            gaps = np.diff(t)
+        duration = np.minimum(gaps, max_gap) if len(gaps) else np.zeros(0)
+        # The last event lasts as long as a typical one
+        duration = np.append(duration, np.median(duration) if len(duration) else 0.0)
+        t_days = (t - t[0]) / _DAY
+        stats.update({
+            "from": _iso(t[0]),
+            "to": _iso(t[-1]),
+            "span_days": _num(t_days[-1], 2),
+            "median_interval_seconds": _num(np.median(gaps)) if len(gaps) else 0,
+        })
+    else:
+        order = None
+        duration = t_days = None
+
+    def encoded(key: str) -> Optional[Tuple[List[Any], "np.ndarray"]]:
+        values = column(key)
+        result = _encode(values)
+        if result is None:
+            # e.g. a list of error codes per event
+            result = _encode([",".join(map(str, v)) if isinstance(v, list) else str(v) for v in values])
+        if result is None:
+            return None
+        return result if order is None else (result[0], result[1][order])
+
+    active = np.ones(n, dtype=bool)
+    modes: Dict[str, Any] = {}
+    for key in (k for k in mode_keys if k in keys):
+        encoding = encoded(key)
+        if encoding is None:
+            continue
+        values, codes = encoding
+        counts = np.bincount(codes, minlength=len(values))
+        idle = np.array([str(v).lower() in idle_values or v is None for v in values])
+        active &= ~idle[codes]
+        hours = np.bincount(codes, weights=duration, minlength=len(values)) / 3600 if duration is not None else None
+        ranked = np.argsort(-(hours if hours is not None else counts), kind="stable")[:top_n]
+        modes[key] = {
+            str(values[i]): (
+                {"events": int(counts[i]), "hours": _num(hours[i], 1), "share": _num(hours[i] / hours.sum(), 3)}
+                if hours is not None and hours.sum() > 0 else {"events": int(counts[i])}
+            )
+            for i in ranked
+        }
+    if modes:
+        stats["modes"] = modes
+
+    if modes and duration is not None:
+        active_seconds = np.where(active, duration, 0.0)
+        day = ((t - t[0] // _DAY * _DAY) // _DAY).astype(np.int64)
+        daily = np.bincount(day, weights=active_seconds) / 3600
+        by_hour = np.bincount(((t % _DAY) // 3600).astype(np.int64), weights=active_seconds, minlength=24) / 3600
+        weekday = ((t // _DAY).astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+        weekday_days = np.maximum(np.bincount(((np.arange(len(daily)) + int(t[0] // _DAY)) + 3) % 7, minlength=7), 1)
+        by_weekday = np.bincount(weekday, weights=active_seconds, minlength=7) / 3600 / weekday_days
+        slope = _slope_per_day(np.arange(len(daily), dtype=np.float64), daily)
+        stats["usage"] = {
+            "active_hours": _num(daily.sum(), 1),
+            "active_days": int((daily > 0).sum()),
+            "daily_active_hours": {
+                "min": _num(daily.min(), 2),
+                "mean": _num(daily.mean(), 2),
+                "max": _num(daily.max(), 2),
+                "trend_per_day": None if slope is None else _num(slope, 4),
+            },
+            "active_hours_by_hour_of_day": [_num(h, 1) for h in by_hour],
+            "peak_hours": [int(h) for h in np.argsort(-by_hour, kind="stable")[:3] if by_hour[h] > 0],
+            "mean_active_hours_by_weekday": [_num(h, 2) for h in by_weekday],
+        }
+
+    error_key = next((k for k in error_keys if k in keys), None)
+    if error_key:
+        encoding = encoded(error_key)
+        if encoding is not None:
+            values, codes = encoding
+            is_error = np.array([v is not None and str(v).strip().lower() not in NO_ERROR_VALUES for v in values])
+            mask = is_error[codes]
+            counts = np.bincount(codes[mask], minlength=len(values))
+            errors: Dict[str, Any] = {"key": error_key, "events": int(mask.sum())}
+            if mask.any():
+                ranked = [i for i in np.argsort(-counts, kind="stable")[:top_n] if counts[i] > 0]
+                errors["by_code"] = {str(values[i]): int(counts[i]) for i in ranked}
+                if t is not None:
+                    hits = t[mask]
+                    errors["first"], errors["last"] = _iso(hits[0]), _iso(hits[-1])
+                    errors["per_day"] = _num(mask.sum() / max(t_days[-1], 1.0), 3)
+            stats["errors"] = errors
+
+    numeric: Dict[str, Any] = {}
+    for key in keys:
+        if key == time_key or key in mode_keys or key == error_key:
+            continue
+        if not _is_number(next((e[key] for e in sample if e.get(key) is not None), None)):
+            continue
+        values = _numeric_column(events, key)
+        if values is None:
+            continue
+        if order is not None:
+            values = values[order]
+        valid = ~np.isnan(values)
+        y = values[valid]
+        summary = {"min": _num(y.min()), "mean": _num(y.mean()), "max": _num(y.max())}
+        if t_days is not None:
+            slope = _slope_per_day(t_days[valid], y)
+            if slope is not None:
+                summary["trend_per_day"] = _num(slope, 4)
+        if modes and not active.all() and (active & valid).any():
+            summary["mean_active"] = _num(values[active & valid].mean())
+        numeric[key] = summary
+    if numeric:
+        stats["numeric"] = numeric
+    return stats
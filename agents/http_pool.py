@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import socket
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import get_section
+from .metrics import registry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+UPSTREAM_REQUESTS = registry.counter(
+    "hrm_upstream_requests_total",
+    "HTTP attempts made to upstream LLM APIs by status code ('error' for network failures).",
+    ("host", "status"),
+)
+UPSTREAM_RETRIES = registry.counter(
+    "hrm_upstream_retries_total",
+    "Upstream HTTP attempts retried after a retryable status or connection error.",
+    ("host", "reason"),
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _RetryPolicy:
+    """Timeouts, backoff and counters shared by the sync and async pooled clients.
+
+    Attempts that fail with a connection error or a retryable status (429,
+    5xx) are retried up to ``max_retries`` times with jittered exponential
+    backoff; a ``Retry-After`` header overrides the backoff. Read timeouts
+    are not retried, since the upstream may already be generating.
+
+    A ``timeout`` passed to ``request`` is the budget for the whole call,
+    retries and waits included; each attempt gets the configured
+    connect/read timeouts capped by what is left of it.
+    """
+
+    def __init__(
+        self,
+        origin: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        max_retry_after: float = 60.0,
+    ) -> None:
+        self.origin = origin
+        self.host = urlsplit(origin).netloc
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.max_retry_after = float(max_retry_after)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def _attempt_timeout(self, remaining: Optional[float]) -> Tuple[float, float]:
+        if remaining is None:
+            return (self.connect_timeout, self.read_timeout)
+        remaining = max(0.001, remaining)
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def _backoff(self, attempt: int, headers: Optional[Mapping[str, str]]) -> float:
+        retry_after = parse_retry_after(headers.get("Retry-After")) if headers is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _should_retry(self, attempt: int, wait: float, deadline: Optional[float]) -> bool:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if attempt >= self.max_retries or (remaining is not None and wait >= remaining):
+            self._count("failures")
+            return False
+        return True
+
+    def _note_retry(self, method: str, attempt: int, reason: str, wait: float) -> None:
+        self._count("retries")
+        UPSTREAM_RETRIES.inc(host=self.host, reason=reason)
+        print(f"[{type(self).__name__}] {method} {self.host} failed ({reason}); retry {attempt}/{self.max_retries} in {wait:.2f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "failures": self.failures}
+
+
+class PooledHTTPClient(_RetryPolicy):
+    """Keep-alive ``requests.Session`` for one upstream origin, with retries (see ``_RetryPolicy``)."""
+
+    def __init__(self, origin: str, pool_maxsize: int = 16, **policy: Any) -> None:
+        super().__init__(origin, **policy)
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_maxsize)), max_retries=0)
+        self.session = requests.Session()
+        self.session.mount(origin, self.adapter)
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """Send a request, retrying as described above; returns the last response or raises the last error."""
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            response: Optional[requests.Response] = None
+            error: Optional[requests.exceptions.RequestException] = None
+            self._count("requests")
+            try:
+                response = self.session.request(method, url, timeout=self._attempt_timeout(remaining), **kwargs)
+                UPSTREAM_REQUESTS.inc(host=self.host, status=response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                reason = str(response.status_code)
+            except requests.exceptions.ConnectionError as e:
+                UPSTREAM_REQUESTS.inc(host=self.host, status="error")
+                error = e
+                reason = type(e).__name__
+            except requests.exceptions.RequestException:
+                UPSTREAM_REQUESTS.inc(host=self.host, status="error")
+                self._count("failures")
+                raise
+
+            wait = self._backoff(attempt, response.headers if response is not None else None)
+            if not self._should_retry(attempt, wait, deadline):
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                response.close()
+            attempt += 1
+            self._note_retry(method, attempt, reason, wait)
+            time.sleep(wait)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Connections opened vs. requests sent on this client's urllib3 pools."""
+        pools = self.adapter.poolmanager.pools
+        opened = sent = idle = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+            # The queue is pre-filled with None placeholders for slots never connected
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+        return {"connections_opened": opened, "requests_sent": sent, "idle_connections": idle}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(self.connection_stats())
+        sent = stats["requests_sent"]
+        stats["connection_reuse_ratio"] = round(1 - stats["connections_opened"] / sent, 4) if sent else 0.0
+        return stats
+
+
+def abort_response(response: requests.Response) -> None:
+    """Close a streaming response from another thread, waking a reader blocked on it.
+
+    ``Response.close`` alone does not interrupt a ``recv`` already in
+    progress, so the socket is shut down first; the connection is discarded
+    rather than returned to the pool. The blocked read then ends (usually
+    as if the body were complete), so callers must check why it ended.
+    """
+    raw = getattr(response, "raw", None)
+    sock = getattr(getattr(raw, "_connection", None), "sock", None)
+    if sock is None:
+        # urllib3 releases the connection object once headers are read; reach the socket through the body
+        fp = getattr(getattr(raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def abort_on_cancel(response: requests.Response, token: Any) -> Callable[[], None]:
+    """Abort ``response`` (see ``abort_response``) if ``token`` is cancelled while it is read.
+
+    Returns a function to call when reading is over; after it a late
+    cancellation no longer touches the connection, which may be back in the
+    pool serving another request. ``token`` is a CancellationToken or None.
+    """
+    if token is None:
+        return lambda: None
+    lock = threading.Lock()
+    reading = [True]
+
+    def abort() -> None:
+        with lock:
+            if reading[0]:
+                abort_response(response)
+
+    def done() -> None:
+        with lock:
+            reading[0] = False
+
+    token.on_cancel(abort)
+    return done
+
+
+class AsyncPooledHTTPClient(_RetryPolicy):
+    """``httpx.AsyncClient`` counterpart of PooledHTTPClient for one origin and event loop.
+
+    Connections pooled by httpx belong to the event loop that opened them,
+    so ``get_async_http_client`` keeps one client per origin per loop.
+    """
+
+    def __init__(self, origin: str, pool_maxsize: int = 16, **policy: Any) -> None:
+        import httpx
+
+        super().__init__(origin, **policy)
+        self._httpx = httpx
+        size = max(1, int(pool_maxsize))
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size)
+        )
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, stream: bool = False, **kwargs: Any):
+        """Async ``request``; with ``stream=True`` the body is left unread and the caller must ``aclose`` it."""
+        httpx = self._httpx
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        attempt = 0
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            connect, read = self._attempt_timeout(remaining)
+            response = None
+            error: Optional[Exception] = None
+            self._count("requests")
+            try:
+                request = self.client.build_request(
+                    method, url, timeout=httpx.Timeout(read, connect=connect), **kwargs
+                )
+                response = await self.client.send(request, stream=stream)
+                UPSTREAM_REQUESTS.inc(host=self.host, status=response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                reason = str(response.status_code)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                UPSTREAM_REQUESTS.inc(host=self.host, status="error")
+                error = e
+                reason = type(e).__name__
+            except httpx.HTTPError:
+                UPSTREAM_REQUESTS.inc(host=self.host, status="error")
+                self._count("failures")
+                raise
+
+            wait = self._backoff(attempt, response.headers if response is not None else None)
+            if not self._should_retry(attempt, wait, deadline):
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None:
+                await response.aclose()
+            attempt += 1
+            self._note_retry(method, attempt, reason, wait)
+            await asyncio.sleep(wait)
+
+
+def _policy_kwargs(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "pool_maxsize": cfg.get("pool_maxsize", 16),
+        "connect_timeout": cfg.get("connect_timeout_seconds", 5),
+        "read_timeout": cfg.get("read_timeout_seconds", 120),
+        "max_retries": cfg.get("max_retries", 3),
+        "backoff_base": cfg.get("backoff_base_seconds", 0.5),
+        "backoff_max": cfg.get("backoff_max_seconds", 8),
+        "max_retry_after": cfg.get("max_retry_after_seconds", 60),
+    }
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+_clients: Dict[str, PooledHTTPClient] = {}
+_clients_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncPooledHTTPClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client(url: str) -> PooledHTTPClient:
+    """Process-wide pooled client for the origin (scheme and host) of ``url``.
+
+    APIs served from the same host (e.g. Gauss and GaussO) share one pool.
+    Configured by the ``http_pool`` section of configure.json.
+    """
+    key = _origin(url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            if not _clients:
+                registry.gauge_callback(
+                    "hrm_upstream_connections_opened", "TCP/TLS connections opened to upstream LLM APIs.",
+                    ("host",), lambda: _gauge_samples("connections_opened"),
+                )
+                registry.gauge_callback(
+                    "hrm_upstream_idle_connections", "Idle keep-alive connections pooled per upstream host.",
+                    ("host",), lambda: _gauge_samples("idle_connections"),
+                )
+            client = PooledHTTPClient(key, **_policy_kwargs(get_section("http_pool")))
+            _clients[key] = client
+        return client
+
+
+def get_async_http_client(url: str) -> AsyncPooledHTTPClient:
+    """Async pooled client for the origin of ``url`` on the running event loop."""
+    key = _origin(url)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncPooledHTTPClient(key, **_policy_kwargs(get_section("http_pool")))
+            clients[key] = client
+        return client
+
+
+def _gauge_samples(field: str):
+    with _clients_lock:
+        clients = list(_clients.values())
+    return [({"host": client.host}, client.connection_stats()[field]) for client in clients]
+
+
+def http_pool_stats() -> Dict[str, Any]:
+    with _clients_lock:
+        clients = dict(_clients)
+        async_clients = [(url, c) for per_loop in _async_clients.values() for url, c in per_loop.items()]
+    stats = {url: client.stats() for url, client in clients.items()}
+    for url, client in async_clients:
+        totals = stats.setdefault(url, {}).setdefault("async", {"requests": 0, "retries": 0, "failures": 0})
+        for name, value in client.stats().items():
+            totals[name] += value
+    return stats
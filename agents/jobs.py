@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, Iterable, Optional
+
+from .admission import AdmissionRejected, get_admission_controller
+from .cancellation import CancellationToken
+from .config import project_root
+from .stream_buffer import StreamBuffer
+
+JOB_KINDS = ("diagnosis", "operation_history", "actions_guide", "pipeline")
+TERMINAL_STATUSES = ("succeeded", "partial", "failed")
+
+# Key of the ``{stage: error message}`` map in a job's stored output
+ERRORS_KEY = "errors"
+
+# Rate-limit tokens per job kind, matching the streaming endpoints. The pipeline's
+# actions guide call is charged by RootAgent.run_pipeline only when that stage runs.
+JOB_COST = {"pipeline": 2}
+
+
+class SQLiteJobStore:
+    """Persistent job records (status, parameters, partial and final output).
+
+    Output is stored as JSON: a ``{stage: text}`` dict, where single-stage
+    jobs use their kind as the only stage, plus an ``ERRORS_KEY`` map of the
+    pipeline stages that failed. A job that finishes with failed stages is
+    ``partial``. Finished jobs are purged after ``retention_seconds``.
+    """
+
+    def __init__(self, path: str, retention_seconds: float = 7 * 24 * 3600) -> None:
+        self.path = path
+        self.retention_seconds = float(retention_seconds)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " llm_provider TEXT,"
+            " owner TEXT,"
+            " params TEXT NOT NULL,"
+            " output TEXT NOT NULL DEFAULT '{}',"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def owner_id() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def create(self, job_id: str, kind: str, params: Dict[str, Any], llm_provider: Optional[str]) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, llm_provider, owner, params, created_at)"
+            " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, llm_provider, self.owner_id(), json.dumps(params, ensure_ascii=False), time.time()),
+        )
+        conn.commit()
+
+    def mark_running(self, job_id: str) -> None:
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job_id))
+        conn.commit()
+
+    def save_output(self, job_id: str, output: Dict[str, Any]) -> None:
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET output = ? WHERE id = ?", (json.dumps(output, ensure_ascii=False), job_id))
+        conn.commit()
+
+    def finish(self, job_id: str, output: Dict[str, Any], error: Optional[str] = None) -> None:
+        status = "failed" if error else "partial" if output.get(ERRORS_KEY) else "succeeded"
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = ?, output = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(output, ensure_ascii=False), error, time.time(), job_id),
+        )
+        conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["output"] = json.loads(job["output"] or "{}")
+        return job
+
+    def mark_interrupted(self) -> int:
+        """Fail unfinished jobs whose owning process on this host is gone; returns the count.
+
+        Jobs owned by other live worker processes sharing the store are left alone.
+        """
+        conn = self._conn()
+        host = socket.gethostname()
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        dead = []
+        for row in rows:
+            owner_host, _, pid = (row["owner"] or "").rpartition(":")
+            if owner_host != host:
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except (ValueError, ProcessLookupError):
+                dead.append(row["id"])
+            except PermissionError:
+                pass
+        if dead:
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted by server restart', finished_at = ?"
+                " WHERE id = ?",
+                [(time.time(), job_id) for job_id in dead],
+            )
+            conn.commit()
+        return len(dead)
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        cur = conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at <= ?",
+            (time.time() - self.retention_seconds,),
+        )
+        conn.commit()
+        return max(0, cur.rowcount)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {row[0]: int(row[1]) for row in rows}
+
+
+class JobManager:
+    """Run RootAgent generations as background jobs on a bounded worker pool.
+
+    Live output goes to a per-job StreamBuffer for attached streams and is
+    persisted to the store every ``persist_interval`` seconds, so status
+    polls see partial output and results survive the request that created
+    them.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        agent_factory: Callable[[Optional[str]], Any],
+        max_workers: int = 4,
+        persist_interval: float = 0.5,
+    ) -> None:
+        self.store = store
+        self.agent_factory = agent_factory
+        self.persist_interval = float(persist_interval)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="hrm-job")
+        self._live: Dict[str, StreamBuffer] = {}
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        interrupted = store.mark_interrupted()
+        if interrupted:
+            print(f"[JobManager] Marked {interrupted} unfinished job(s) from a previous run as failed")
+
+    def submit(self, kind: str, params: Dict[str, Any], llm_provider: Optional[str] = None) -> str:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+        self._purge_if_due()
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, kind, params, llm_provider)
+        with self._lock:
+            self._live[job_id] = StreamBuffer()
+        self.executor.submit(self._run, job_id, kind, params, llm_provider)
+        return job_id
+
+    def _purge_if_due(self) -> None:
+        now = time.time()
+        if now - self._purged_at < 60:
+            return
+        self._purged_at = now
+        try:
+            purged = self.store.purge_expired()
+            if purged:
+                print(f"[JobManager] Purged {purged} expired job(s)")
+        except Exception as e:
+            print(f"[JobManager] Purge failed: {e}")
+
+    def _generate(self, agent: Any, kind: str, params: Dict[str, Any], token: CancellationToken) -> Iterable[Any]:
+        language = params.get("language")
+        if kind == "diagnosis":
+            return agent.run_diagnosis(params["analytics"], language=language, cancel_token=token)
+        if kind == "operation_history":
+            return agent.run_op_history(params["operation_history"], language=language, cancel_token=token)
+        if kind == "actions_guide":
+            return agent.run_actions_guide(
+                params["diagnosis_summary"], category=params.get("category", ""), language=language, cancel_token=token
+            )
+        return agent.run_pipeline(
+            params["analytics"],
+            params.get("operation_history") or {},
+            category=params.get("category", ""),
+            language=language,
+            require_self_repair=params.get("require_self_repair", True),
+            cancel_token=token,
+        )
+
+    def _admit(self, provider: str, kind: str, token: CancellationToken):
+        # Jobs are fire-and-forget, so wait out rejections instead of failing, up to the job's deadline
+        admission = get_admission_controller()
+        while True:
+            token.raise_if_cancelled()
+            try:
+                return admission.admit(provider, cost=JOB_COST.get(kind, 1), timeout=token.remaining())
+            except AdmissionRejected as e:
+                remaining = token.remaining()
+                time.sleep(e.retry_after if remaining is None else min(e.retry_after, remaining))
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any], llm_provider: Optional[str]) -> None:
+        buffer = self._live[job_id]
+        output: Dict[str, Any] = {}
+        error: Optional[BaseException] = None
+        # params["timeout"] (seconds, if the request set one) bounds admission wait and generation
+        token = CancellationToken(params.get("timeout"))
+        try:
+            agent = self.agent_factory(llm_provider)
+            with self._admit(agent.admission_key, kind, token):
+                self.store.mark_running(job_id)
+                persisted_at = time.monotonic()
+                for event in self._generate(agent, kind, params, token):
+                    if isinstance(event, dict):
+                        stage = event.get("stage", kind)
+                        if "chunk" in event:
+                            output[stage] = output.get(stage, "") + event["chunk"]
+                        elif "error" in event:
+                            output.setdefault(ERRORS_KEY, {})[stage] = event["error"]
+                    else:
+                        output[kind] = output.get(kind, "") + event
+                    buffer.append(event)
+                    if time.monotonic() - persisted_at >= self.persist_interval:
+                        self.store.save_output(job_id, output)
+                        persisted_at = time.monotonic()
+            stage_errors = output.get(ERRORS_KEY)
+            if stage_errors and not any(text for stage, text in output.items() if stage != ERRORS_KEY):
+                # Every stage that ran failed; there is nothing partial to keep
+                error = RuntimeError("; ".join(f"{stage}: {message}" for stage, message in stage_errors.items()))
+                print(f"[JobManager] Job {job_id} failed: {error}")
+        except Exception as e:
+            print(f"[JobManager] Job {job_id} failed: {e}")
+            error = e
+        finally:
+            try:
+                self.store.finish(job_id, output, str(error) if error else None)
+            except Exception as e:
+                print(f"[JobManager] Failed to persist job {job_id}: {e}")
+            buffer.close(error)
+            with self._lock:
+                self._live.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        job["errors"] = job["output"].pop(ERRORS_KEY, {})
+        if job["kind"] != "pipeline":
+            job["output"] = job["output"].get(job["kind"], "")
+        return job
+
+    def stream(self, job_id: str, poll_interval: float = 0.5) -> Generator[Any, None, None]:
+        """Yield a job's output from the start, following it live until it finishes.
+
+        Jobs running in this process are followed through their StreamBuffer;
+        jobs owned by another worker process (or already finished) are
+        followed by polling the store and yielding new output and the
+        ``{"stage", "error", "stage_done"}`` events of failed stages.
+        """
+        with self._lock:
+            buffer = self._live.get(job_id)
+        if buffer is not None:
+            yield from buffer.iter_from(0)
+            return
+
+        sent: Dict[str, int] = {}
+        sent_errors = set()
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            stage_errors = job["output"].pop(ERRORS_KEY, {})
+            for stage, text in job["output"].items():
+                new_text = text[sent.get(stage, 0):]
+                if new_text:
+                    sent[stage] = len(text)
+                    yield {"stage": stage, "chunk": new_text} if job["kind"] == "pipeline" else new_text
+            for stage, message in stage_errors.items():
+                if stage not in sent_errors:
+                    sent_errors.add(stage)
+                    yield {"stage": stage, "error": message, "stage_done": True}
+            if job["status"] in TERMINAL_STATUSES:
+                if job["status"] == "failed":
+                    raise RuntimeError(job["error"] or "job failed")
+                return
+            time.sleep(poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = len(self._live)
+        return {"live": live, "statuses": self.store.counts()}
+
+
+def build_job_manager(cfg: Dict[str, Any], agent_factory: Callable[[Optional[str]], Any]) -> JobManager:
+    """Build a JobManager from the ``jobs`` section of configure.json."""
+    path = cfg.get("path") or os.path.join("cache", "jobs.sqlite3")
+    if not os.path.isabs(path):
+        path = os.path.join(project_root(), path)
+    store = SQLiteJobStore(path, retention_seconds=cfg.get("retention_seconds", 7 * 24 * 3600))
+    return JobManager(
+        store,
+        agent_factory,
+        max_workers=cfg.get("max_workers", 4),
+        persist_interval=float(cfg.get("persist_interval_ms", 500)) / 1000.0,
+    )
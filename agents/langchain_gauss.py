@@ -3,9 +3,9 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, Iterator, List, Mapping, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional
 
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
 from langchain_core.outputs import GenerationChunk
 
@@ -64,6 +64,7 @@ class GaussLLM(LLM):
             temperature=kwargs.get("temperature", self.temperature),
             top_p=kwargs.get("top_p", self.top_p),
             repetition_penalty=kwargs.get("repetition_penalty", self.repetition_penalty),
+            timeout=kwargs.get("timeout"),
         )
         
         if not response:
@@ -82,58 +83,65 @@ class GaussLLM(LLM):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> Iterator[GenerationChunk]:
-        """Stream the LLM on the given prompt."""
-        
-        response = self._client.chat_completion(
+        """Stream the LLM on the given prompt, yielding deltas as the API sends them.
+
+        Transient failures (connection errors, 429/5xx) are retried with backoff
+        by the pooled HTTP client before the stream starts; anything still
+        failing is raised rather than re-sent as a second, non-streaming
+        request. A ``timeout`` kwarg is the budget for the whole call; a
+        ``cancel_token`` kwarg closes the HTTP response as soon as it is cancelled.
+        """
+        emitted = False
+        for text in self._client.stream_chat_completion(
             prompt,
-            stream=True,
             temperature=kwargs.get("temperature", self.temperature),
             top_p=kwargs.get("top_p", self.top_p),
             repetition_penalty=kwargs.get("repetition_penalty", self.repetition_penalty),
-        )
-        
-        # Fallback: if streaming response is empty, try non-streaming once
-        if not response:
-            response = self._client.chat_completion(
-                prompt,
-                stream=False,
-                temperature=kwargs.get("temperature", self.temperature),
-                top_p=kwargs.get("top_p", self.top_p),
-                repetition_penalty=kwargs.get("repetition_penalty", self.repetition_penalty),
-            )
-            if not response:
-                # As a last resort, emit a single empty chunk to avoid upstream errors
-                yield GenerationChunk(text="")
-                return
-            
-        try:
-            text = response["choices"][0]["message"]["content"]
-        except (KeyError, IndexError) as e:
-            # If parsing fails, try non-streaming fallback
-            response = self._client.chat_completion(
-                prompt,
-                stream=False,
-                temperature=kwargs.get("temperature", self.temperature),
-                top_p=kwargs.get("top_p", self.top_p),
-                repetition_penalty=kwargs.get("repetition_penalty", self.repetition_penalty),
-            )
-            try:
-                text = response["choices"][0]["message"]["content"] if response else ""
-            except Exception:
-                text = ""
-            if text == "":
-                # Emit a single empty chunk so that callers do not crash
-                yield GenerationChunk(text="")
-                return
-            
-        # Simulate streaming by splitting into lines
-        full_response = ""
-        for line in text.split("\n"):
-            if line:
-                chunk_text = line + "\n"
-                chunk = GenerationChunk(text=chunk_text)
-                full_response += chunk_text
-                
-                yield chunk
-        
-        # Completed streaming
+            timeout=kwargs.get("timeout"),
+            cancel_token=kwargs.get("cancel_token"),
+        ):
+            emitted = True
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        if not emitted:
+            # Emit a single empty chunk so that callers do not crash
+            yield GenerationChunk(text="")
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Async ``_stream`` over the API's async HTTP client, without an executor thread."""
+        emitted = False
+        async for text in self._client.astream_chat_completion(
+            prompt,
+            temperature=kwargs.get("temperature", self.temperature),
+            top_p=kwargs.get("top_p", self.top_p),
+            repetition_penalty=kwargs.get("repetition_penalty", self.repetition_penalty),
+            timeout=kwargs.get("timeout"),
+        ):
+            emitted = True
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        if not emitted:
+            yield GenerationChunk(text="")
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Async call, assembled from the streamed deltas."""
+        parts = []
+        async for chunk in self._astream(prompt, stop=stop, run_manager=run_manager, **kwargs):
+            parts.append(chunk.text)
+        return "".join(parts)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
 
 
 class StreamingChunk(dict):
@@ -9,9 +14,43 @@ class StreamingChunk(dict):
     pass
 
 
+async def iterate_in_thread(iterable: Iterable[T]) -> AsyncIterator[T]:
+    """Drive a blocking iterator from async code, pulling each item on the default executor.
+
+    The iterator is closed (on the executor) if the consumer stops early, so
+    upstream streams are released as they are in the synchronous path.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    try:
+        while True:
+            item = await loop.run_in_executor(None, next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await loop.run_in_executor(None, close)
+
+
 class LLMClient(ABC):
     @abstractmethod
     def generate(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:  # pragma: no cover - interface
         ...
 
+    async def astream(self, prompt: str, **kwargs: Any) -> AsyncIterator[StreamingChunk]:
+        """Stream chunks without blocking the event loop.
+
+        The default runs the synchronous ``generate`` stream on the executor;
+        clients with a native async path override it.
+        """
+        async for chunk in iterate_in_thread(self.generate(prompt, stream=True, **kwargs)):
+            yield chunk
 
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        """Return the complete output; accepts the same kwargs as ``generate``."""
+        parts = []
+        async for chunk in self.astream(prompt, **kwargs):
+            parts.append(chunk.get("text", ""))
+        return "".join(parts)
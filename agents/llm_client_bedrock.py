@@ -1,38 +1,87 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Optional
+import threading
+from typing import Any, Dict, Optional
 
 from .llm_client_base import LLMClient, StreamingChunk
 from .langsmith_config import setup_langsmith, create_run_name, get_langsmith_tags
 
+# Read-timeout buckets (seconds) for calls under a request deadline. botocore
+# timeouts are per client, so one shared ChatBedrock is kept per bucket and a
+# call uses the smallest bucket covering its remaining budget.
+TIMEOUT_BUCKETS = (5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
 
 class BedrockClient(LLMClient):
+    """Bedrock chat client; one instance is shared by all requests for a configuration.
+
+    ChatBedrock (and its boto3 client and connection pool) is built once per
+    timeout bucket on first use. Sampling parameters are bound per call, so
+    concurrent requests never mutate shared state.
+    """
+
     def __init__(self, model_id: Optional[str] = None, region: Optional[str] = None):
         # Defer to LangChain's Bedrock wrapper for LangSmith tracing
         self.model_id = model_id or os.getenv(
             "BEDROCK_MODEL_ID", "anthropic.claude-3-5-sonnet-20240620-v1:0"
         )
         self.region = region or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "ap-northeast-2"
+        self._llms: Dict[Optional[float], Any] = {}
+        self._lock = threading.Lock()
         
         # Setup LangSmith tracing
         setup_langsmith()
 
-    def generate(self, prompt: str, stream: bool = False, **kwargs: Any):
-        from langchain_aws import ChatBedrock
+    @staticmethod
+    def _timeout_bucket(timeout: Optional[float]) -> Optional[float]:
+        if timeout is None:
+            return None
+        for bucket in TIMEOUT_BUCKETS:
+            if timeout <= bucket:
+                return bucket
+        return TIMEOUT_BUCKETS[-1]
+
+    @staticmethod
+    def _timeout_config(timeout: Optional[float]):
+        """botocore config bounding the call to the remaining request budget (None: SDK defaults)."""
+        if timeout is None:
+            return None
+        from botocore.config import Config
+
+        return Config(
+            connect_timeout=min(10.0, float(timeout)),
+            read_timeout=float(timeout),
+            retries={"max_attempts": 1},
+        )
+
+    def _llm(self, timeout: Optional[float]):
+        bucket = self._timeout_bucket(timeout)
+        with self._lock:
+            llm = self._llms.get(bucket)
+            if llm is None:
+                from langchain_aws import ChatBedrock
+
+                llm = ChatBedrock(
+                    model_id=self.model_id,
+                    region_name=self.region,
+                    config=self._timeout_config(bucket),
+                )
+                self._llms[bucket] = llm
+            return llm
+
+    def _prepare(self, prompt: str, stream: bool, kwargs: Dict[str, Any]):
+        """Bound LLM, messages and tracing config shared by the sync and async paths."""
         from langchain_core.messages import HumanMessage
         from langchain_core.runnables import RunnableConfig
 
-        llm = ChatBedrock(
-            model_id=self.model_id,
-            region_name=self.region,
-            # temperature/top_p supported for some providers; harmless if ignored
-            model_kwargs={
-                "temperature": kwargs.get("temperature", 0.3),
-                "top_p": kwargs.get("top_p", 0.9),
-                "max_tokens": kwargs.get("max_tokens", 800),
-            },
-        )
+        # temperature/top_p supported for some providers; harmless if ignored
+        params: Dict[str, Any] = {
+            "temperature": kwargs.get("temperature", 0.3),
+            "top_p": kwargs.get("top_p", 0.9),
+            "max_tokens": kwargs.get("max_tokens", 800),
+        }
+        llm = self._llm(kwargs.get("timeout")).bind(**params)
         
         # Convert prompt to message format for ChatBedrock
         messages = [HumanMessage(content=prompt)]
@@ -44,13 +93,14 @@ class BedrockClient(LLMClient):
             metadata={
                 "model_id": self.model_id,
                 "region": self.region,
-                "temperature": kwargs.get("temperature", 0.3),
-                "top_p": kwargs.get("top_p", 0.9),
-                "max_tokens": kwargs.get("max_tokens", 800),
+                **params,
                 "stream": stream,
             }
         )
-        
+        return llm, messages, config
+
+    def generate(self, prompt: str, stream: bool = False, **kwargs: Any):
+        llm, messages, config = self._prepare(prompt, stream, kwargs)
         if stream:
             for chunk in llm.stream(messages, config=config):
                 text = getattr(chunk, "content", None) or ""
@@ -61,4 +111,16 @@ class BedrockClient(LLMClient):
         result = llm.invoke(messages, config=config)
         return getattr(result, "content", None) or ""
 
+    async def astream(self, prompt: str, **kwargs: Any):
+        # boto3 has no asyncio transport; ChatBedrock's async path runs the calls on its executor
+        llm, messages, config = self._prepare(prompt, True, kwargs)
+        async for chunk in llm.astream(messages, config=config):
+            text = getattr(chunk, "content", None) or ""
+            if text:
+                yield StreamingChunk({"text": text})
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        llm, messages, config = self._prepare(prompt, False, kwargs)
+        result = await llm.ainvoke(messages, config=config)
+        return getattr(result, "content", None) or ""
 
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Generator, Optional
+
+from .config import get_section, project_root
+from .llm_client_base import LLMClient, StreamingChunk
+from .metrics import registry
+from .response_cache import ResponseCache, SQLiteCacheBackend
+
+LLM_CACHE_LOOKUPS = registry.counter(
+    "hrm_llm_cache_lookups_total",
+    "Prompt-level LLM cache lookups by provider and result (hit/miss).",
+    ("provider", "result"),
+)
+
+# Connection settings (and the per-call cancel token) that never change what the model generates
+_NON_KEY_KWARGS = {"api_key", "access_key", "secret_key", "timeout", "cancel_token"}
+
+
+class CachedLLMClient(LLMClient):
+    """Wraps an LLM client with a persistent prompt-level completion cache.
+
+    The key is a hash of the provider, the client configuration (model,
+    region, ...) and the call's sampling parameters, and the prompt text;
+    credentials and timeouts are left out. Completed generations are stored
+    in a SQLite file shared by every process on the host (TTL, size cap,
+    least-recently-used eviction), and a hit streams back as StreamingChunk
+    pieces like a live response. Generations that fail or are abandoned
+    mid-stream are not stored.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        provider: str,
+        config: Dict[str, Any],
+        backend: SQLiteCacheBackend,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        replay_chunk_chars: int = 64,
+    ) -> None:
+        self.client = client
+        self.provider = provider
+        self.config = {k: v for k, v in config.items() if k not in _NON_KEY_KWARGS and v is not None}
+        # Resolved defaults (e.g. a model taken from the environment) are part of the key too
+        for attr in ("model", "model_id"):
+            if getattr(client, attr, None):
+                self.config[attr] = getattr(client, attr)
+        self.backend = backend
+        self.ttl = ttl
+        self.replay_chunk_chars = max(1, int(replay_chunk_chars))
+
+    def make_key(self, prompt: str, kwargs: Dict[str, Any]) -> str:
+        params = {k: v for k, v in kwargs.items() if k not in _NON_KEY_KWARGS}
+        return ResponseCache.make_key(provider=self.provider, config=self.config, params=params, prompt=prompt)
+
+    def _replay(self, value: str) -> Generator[StreamingChunk, None, None]:
+        step = self.replay_chunk_chars
+        for start in range(0, len(value), step):
+            yield StreamingChunk({"text": value[start:start + step]})
+
+    def _lookup(self, key: str) -> Optional[str]:
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            print(f"[CachedLLMClient] Lookup failed: {e}")
+            cached = None
+        LLM_CACHE_LOOKUPS.inc(provider=self.provider, result="miss" if cached is None else "hit")
+        return cached
+
+    def _store(self, key: str, output: str) -> None:
+        if not output:
+            return
+        try:
+            self.backend.set(key, output, self.ttl)
+        except Exception as e:
+            print(f"[CachedLLMClient] Store failed: {e}")
+
+    def generate(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        chunks = self._stream(prompt, kwargs)
+        if stream:
+            return chunks
+        return "".join(chunk.get("text", "") for chunk in chunks)
+
+    def _stream(self, prompt: str, kwargs: Dict[str, Any]) -> Generator[StreamingChunk, None, None]:
+        key = self.make_key(prompt, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield from self._replay(cached)
+            return
+        parts = []
+        for chunk in self.client.generate(prompt, stream=True, **kwargs):
+            parts.append(chunk.get("text", ""))
+            yield chunk
+        self._store(key, "".join(parts))
+
+    async def astream(self, prompt: str, **kwargs: Any) -> AsyncIterator[StreamingChunk]:
+        key = self.make_key(prompt, kwargs)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            for chunk in self._replay(cached):
+                yield chunk
+            return
+        parts = []
+        async for chunk in self.client.astream(prompt, **kwargs):
+            parts.append(chunk.get("text", ""))
+            yield chunk
+        await asyncio.to_thread(self._store, key, "".join(parts))
+
+
+_backend: Optional[SQLiteCacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def llm_cache_path(cfg: Dict[str, Any]) -> str:
+    path = cfg.get("path") or os.path.join("cache", "llm_cache.sqlite3")
+    return path if os.path.isabs(path) else os.path.join(project_root(), path)
+
+
+def get_llm_cache_backend() -> SQLiteCacheBackend:
+    """Process-wide SQLite store of the ``llm_cache`` section of configure.json."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            cfg = get_section("llm_cache")
+            _backend = SQLiteCacheBackend(llm_cache_path(cfg), max_bytes=cfg.get("max_bytes", 256 * 1024 * 1024))
+        return _backend
+
+
+def wrap_with_llm_cache(client: LLMClient, provider: str, config: Dict[str, Any]) -> LLMClient:
+    """Wrap ``client`` in a CachedLLMClient if ``llm_cache`` is enabled for ``provider``.
+
+    Off by default. The agents' ResponseCache already caches their outputs
+    above this layer, keyed on the same rendered prompt, so with both on an
+    agent completion is stored twice; a ResponseCache hit never reaches this
+    cache. Enable it for completions that must survive restarts or be shared
+    across processes, or for LLM calls made outside the agents::
+
+        "llm_cache": {
+          "enabled": false,
+          "path": "cache/llm_cache.sqlite3",
+          "ttl_seconds": 604800,
+          "max_bytes": 268435456,
+          "exclude_providers": ["fake", "replay"]
+        }
+    """
+    cfg = get_section("llm_cache")
+    if not cfg.get("enabled", False) or provider in (cfg.get("exclude_providers") or []):
+        return client
+    return CachedLLMClient(
+        client,
+        provider,
+        config,
+        get_llm_cache_backend(),
+        ttl=cfg.get("ttl_seconds", 7 * 24 * 3600),
+        replay_chunk_chars=cfg.get("replay_chunk_chars", 64),
+    )
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    cfg = get_section("llm_cache")
+    if not cfg.get("enabled", False):
+        return {"enabled": False}
+    backend = get_llm_cache_backend()
+    entries, size = backend.usage()
+    return {
+        "enabled": True,
+        "path": backend.path,
+        "entries": entries,
+        "bytes": size,
+        "max_bytes": backend.max_bytes,
+        "evictions": backend.evictions,
+        "expirations": backend.expirations,
+    }
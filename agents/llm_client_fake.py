@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .cancellation import CancellationToken, GenerationCancelled
+from .config import project_root
+from .llm_client_base import LLMClient, StreamingChunk
+from .logger import prompt_hash
+
+# Words with their trailing whitespace, so joining the tokens restores the text exactly
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+DEFAULT_OUTPUTS = (
+    "Conclusion: Self-repairable.\n"
+    "1. The filter cleaning interval has passed; clean the filter.\n"
+    "2. No error history was found.\n"
+    "3. Power consumption is within the normal range.",
+    "결론: 자가 조치 가능\n"
+    "1. 필터 청소 주기가 지났습니다. 필터를 청소해 주세요.\n"
+    "2. 에러 이력이 없습니다.\n"
+    "3. 소비 전력은 정상 범위입니다.",
+)
+
+
+class FakeProviderError(RuntimeError):
+    """Injected failure of the stand-in provider (see ``error_rate``)."""
+
+
+def load_replay_outputs(path: str) -> Tuple[Dict[str, str], List[str]]:
+    """Read ``*_llm_output`` previews from an agent log (hrm_agent_log.json).
+
+    Returns ``(by prompt hash, all outputs)``: each output is paired with the
+    ``prompt_hash`` (digest of the full prompt) of the latest
+    ``*_build_prompt`` event of the same stage and language before it, so a
+    replayed prompt gets the answer it got originally. Events logged before
+    ``prompt_hash`` existed only contribute to the output pool.
+    """
+    prompts: Dict[Tuple[str, Any], str] = {}
+    by_prompt: Dict[str, str] = {}
+    outputs: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            stage = str(event.get("stage", ""))
+            if stage.endswith("_build_prompt") and event.get("prompt_hash"):
+                prompts[(stage[: -len("_build_prompt")], event.get("language"))] = event["prompt_hash"]
+            elif stage.endswith("_llm_output") and event.get("output_preview"):
+                outputs.append(event["output_preview"])
+                digest = prompts.pop((stage[: -len("_llm_output")], event.get("language")), None)
+                if digest:
+                    by_prompt[digest] = event["output_preview"]
+    return by_prompt, outputs
+
+
+class FakeClient(LLMClient):
+    """Offline stand-in provider that streams canned or replayed outputs at a set pace.
+
+    Every call waits ``ttft`` seconds, then streams the output word by word
+    at ``tokens_per_second``; each delay is scaled by a random factor within
+    ``±jitter``. A fraction ``error_rate`` of calls raise FakeProviderError
+    after the TTFT wait. With ``replay_log`` outputs come from the
+    ``output_preview``s of that agent log (the original answer when the
+    prompt was logged, otherwise one picked by prompt hash), else from
+    ``outputs``.
+
+    The output and all random draws for a call are derived from ``seed``,
+    the prompt and how many times this client has seen the prompt, so a
+    benchmark replays identically regardless of thread scheduling. Seen
+    counts are kept for the ``max_tracked_prompts`` most recently used
+    prompts; a prompt evicted from that LRU starts counting from zero again.
+    """
+
+    def __init__(
+        self,
+        outputs: Optional[Sequence[str]] = None,
+        replay_log: Optional[str] = None,
+        ttft: float = 0.5,
+        tokens_per_second: float = 40.0,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        max_tracked_prompts: int = 10000,
+    ) -> None:
+        self.by_prompt: Dict[str, str] = {}
+        self.outputs: List[str] = list(outputs or [])
+        if replay_log:
+            path = replay_log if os.path.isabs(replay_log) else os.path.join(project_root(), replay_log)
+            try:
+                self.by_prompt, replayed = load_replay_outputs(path)
+                self.outputs = replayed or self.outputs
+                print(f"[FakeClient] Loaded {len(replayed)} outputs from {path}")
+            except OSError as e:
+                print(f"[FakeClient] Could not read replay log {path}: {e}")
+        if not self.outputs:
+            self.outputs = list(DEFAULT_OUTPUTS)
+        self.ttft = max(0.0, float(ttft))
+        self.token_interval = 1.0 / float(tokens_per_second) if tokens_per_second else 0.0
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+        self.error_rate = min(1.0, max(0.0, float(error_rate)))
+        self.seed = seed
+        self.max_tracked_prompts = max(1, int(max_tracked_prompts))
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _plan(self, prompt: str) -> Tuple[List[str], List[float], bool]:
+        """Tokens, the delay before each of them, and whether this call fails."""
+        digest = prompt_hash(prompt)
+        with self._lock:
+            n = self._seen.pop(digest, 0)
+            self._seen[digest] = n + 1
+            if len(self._seen) > self.max_tracked_prompts:
+                self._seen.popitem(last=False)
+        rng = random.Random(f"{self.seed}:{digest}:{n}")
+        output = self.by_prompt.get(digest)
+        if output is None:
+            output = self.outputs[int(digest, 16) % len(self.outputs)]
+        tokens = _TOKEN_RE.findall(output)
+        scale = lambda: 1.0 + rng.uniform(-self.jitter, self.jitter)
+        delays = [self.ttft * scale()] + [self.token_interval * scale() for _ in tokens[1:]]
+        return tokens, delays, rng.random() < self.error_rate
+
+    @staticmethod
+    def _check_timeout(started: float, timeout: Optional[float]) -> None:
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"fake provider exceeded timeout of {timeout:.3f}s")
+
+    def _stream(
+        self, prompt: str, timeout: Optional[float], cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator[StreamingChunk]:
+        started = time.monotonic()
+        tokens, delays, fail = self._plan(prompt)
+        for i, (token, delay) in enumerate(zip(tokens, delays)):
+            # Like a real client closing its HTTP response, a cancel interrupts the wait for a token
+            if cancel_token is None:
+                time.sleep(delay)
+            elif cancel_token.wait(delay):
+                raise GenerationCancelled(cancel_token.reason or "cancelled")
+            self._check_timeout(started, timeout)
+            if i == 0 and fail:
+                raise FakeProviderError("injected fake provider error")
+            yield StreamingChunk({"text": token})
+
+    def generate(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        chunks = self._stream(prompt, kwargs.get("timeout"), kwargs.get("cancel_token"))
+        if stream:
+            return chunks
+        return "".join(chunk["text"] for chunk in chunks)
+
+    async def astream(self, prompt: str, **kwargs: Any):
+        timeout = kwargs.get("timeout")
+        started = time.monotonic()
+        tokens, delays, fail = self._plan(prompt)
+        for i, (token, delay) in enumerate(zip(tokens, delays)):
+            await asyncio.sleep(delay)
+            self._check_timeout(started, timeout)
+            if i == 0 and fail:
+                raise FakeProviderError("injected fake provider error")
+            yield StreamingChunk({"text": token})
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Any, Optional
 
 from .llm_client_base import LLMClient, StreamingChunk
+from .rate_limit import acquire_rate_limit
 from .langchain_gausso import GaussOLLM
  
 
 
 class GaussOClient(LLMClient):
+    """GaussO chat client; one instance is shared by all requests for a configuration."""
+
     def __init__(self, access_key: Optional[str] = None, secret_key: Optional[str] = None):
         self.llm = GaussOLLM(
             access_key=access_key or os.getenv("GAUSSO_ACCESS_KEY", ""),
@@ -20,18 +24,15 @@ class GaussOClient(LLMClient):
         
 
     def generate(self, prompt: str, stream: bool = False, **kwargs: Any):
-        # Update LLM parameters if provided
-        if "temperature" in kwargs:
-            self.llm.temperature = kwargs["temperature"]
-        if "top_p" in kwargs:
-            self.llm.top_p = kwargs["top_p"]
-        if "repetition_penalty" in kwargs:
-            self.llm.repetition_penalty = kwargs["repetition_penalty"]
-        
+        # Sampling parameters (temperature, top_p, repetition_penalty) and timeout are
+        # passed per call; the shared LLM's defaults are never mutated across requests
+        # Wait for the host-wide gausso quota locally instead of being rejected with 429 upstream
+        kwargs["timeout"] = acquire_rate_limit("gausso", kwargs.get("timeout"))
         if stream:
             # Use LangChain's streaming
             for chunk in self.llm.stream(prompt, **kwargs):
-                text = getattr(chunk, "text", "") or ""
+                # LangChain LLMs stream plain strings
+                text = chunk if isinstance(chunk, str) else getattr(chunk, "text", "") or ""
                 if text:
                     yield StreamingChunk({"text": text})
             return
@@ -40,4 +41,17 @@ class GaussOClient(LLMClient):
         result = self.llm.invoke(prompt, **kwargs)
         return result or ""
 
+    async def astream(self, prompt: str, **kwargs: Any):
+        # The quota lock may block on another process; wait for it off the event loop
+        kwargs["timeout"] = await asyncio.to_thread(acquire_rate_limit, "gausso", kwargs.get("timeout"))
+        async for chunk in self.llm.astream(prompt, **kwargs):
+            text = chunk if isinstance(chunk, str) else getattr(chunk, "text", "") or ""
+            if text:
+                yield StreamingChunk({"text": text})
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        kwargs["timeout"] = await asyncio.to_thread(acquire_rate_limit, "gausso", kwargs.get("timeout"))
+        result = await self.llm.ainvoke(prompt, **kwargs)
+        return result or ""
+
 
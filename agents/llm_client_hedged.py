@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Generator, List, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .llm_client_base import LLMClient, StreamingChunk
+from .metrics import registry
+
+HEDGES_FIRED = registry.counter(
+    "hrm_llm_hedges_total",
+    "Secondary-provider requests fired because the primary was slow to first token ('slow') or failed ('error').",
+    ("agent", "primary", "secondary", "reason"),
+)
+HEDGES_WON = registry.counter(
+    "hrm_llm_hedge_wins_total",
+    "Hedged generations by the provider whose stream was used.",
+    ("agent", "provider"),
+)
+
+# Cancel reason of a leg stopped because the other leg produced first
+HEDGE_LOST = "hedge_lost"
+
+
+class LatencyTracker:
+    """Rolling window of recent time-to-first-chunk samples for one provider."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(float(seconds))
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile (0-100) of the window, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = min(len(samples), max(1, math.ceil(len(samples) * float(pct) / 100.0)))
+        return samples[rank - 1]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+_trackers: Dict[Tuple[str, int], LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(provider: str, window: int = 200) -> LatencyTracker:
+    """Process-wide TTFT tracker for ``provider``, shared by every hedged client using it."""
+    key = (str(provider).lower(), int(window))
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = LatencyTracker(window)
+        return tracker
+
+
+class HedgedLLMClient(LLMClient):
+    """Streams from ``primary`` and hedges to ``secondary`` when the first chunk is late.
+
+    If the primary has not produced its first chunk within the hedge delay,
+    the same prompt is sent to the secondary and whichever produces a first
+    chunk first is streamed; the other request is cancelled through its own
+    CancellationToken, which closes its HTTP response even while it is still
+    waiting for a first token. The delay is the ``percentile`` of the
+    primary's recent time-to-first-chunk, clamped to ``[min_delay,
+    max_delay]`` (``default_delay`` until ``min_samples`` have been seen).
+    With ``failover`` the secondary is also fired right away when the
+    primary fails, or ends without any output, before its first chunk. Once
+    a chunk has been streamed the winner is fixed: a later error is raised,
+    not retried, since the caller has already seen part of the output.
+
+    Every leg records its TTFT when its first chunk arrives, winner or not.
+    A primary cancelled before its first chunk records the time it had
+    waited, a lower bound of its TTFT, so slow patches raise the hedge delay
+    instead of being left out of the window.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        primary: LLMClient,
+        primary_provider: str,
+        secondary: LLMClient,
+        secondary_provider: str,
+        percentile: float = 95,
+        min_delay: float = 1.0,
+        max_delay: float = 10.0,
+        default_delay: float = 4.0,
+        min_samples: int = 20,
+        window: int = 200,
+        failover: bool = True,
+    ) -> None:
+        self.agent = agent
+        self.clients = (primary, secondary)
+        self.providers = (primary_provider, secondary_provider)
+        self.percentile = float(percentile)
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max_delay)
+        self.default_delay = float(default_delay)
+        self.min_samples = max(1, int(min_samples))
+        self.failover = bool(failover)
+        self.trackers = tuple(get_latency_tracker(p, window) for p in self.providers)
+        self.calls = 0
+        self.hedged = 0
+        self.wins = [0, 0]
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float:
+        tracker = self.trackers[0]
+        observed = tracker.percentile(self.percentile) if len(tracker) >= self.min_samples else None
+        delay = self.default_delay if observed is None else observed
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def _leg_kwargs(self, kwargs: Dict[str, Any], started: float) -> Dict[str, Any]:
+        # The secondary starts late; give it only what is left of the caller's timeout
+        timeout = kwargs.get("timeout")
+        if timeout is None:
+            return kwargs
+        return {**kwargs, "timeout": max(0.001, timeout - (time.monotonic() - started))}
+
+    def _fire(self, index: int, reason: Optional[str]) -> None:
+        if index == 0:
+            with self._lock:
+                self.calls += 1
+        else:
+            with self._lock:
+                self.hedged += 1
+            HEDGES_FIRED.inc(agent=self.agent, primary=self.providers[0], secondary=self.providers[1], reason=reason)
+            print(f"[HedgedLLMClient] {self.agent}: {self.providers[0]} {reason}, hedging to {self.providers[1]}")
+
+    def _won(self, index: int, hedged: bool) -> None:
+        with self._lock:
+            self.wins[index] += 1
+        if hedged:
+            HEDGES_WON.inc(agent=self.agent, provider=self.providers[index])
+
+    def generate(self, prompt: str, stream: bool = False, **kwargs: Any) -> Any:
+        chunks = self._race(prompt, kwargs)
+        if stream:
+            return chunks
+        return "".join(chunk.get("text", "") for chunk in chunks)
+
+    def _first_chunk(self, index: int, started: float) -> None:
+        self.trackers[index].record(time.monotonic() - started)
+
+    def _beaten(self, index: int, started: float) -> None:
+        if index == 0:
+            # Censored sample: the primary's TTFT is at least what it had waited
+            self.trackers[0].record(time.monotonic() - started)
+
+    def _pump(
+        self, index: int, prompt: str, kwargs: Dict[str, Any], events: "queue.Queue", token: CancellationToken
+    ) -> None:
+        started = time.monotonic()
+        chunks = None
+        first = True
+        try:
+            # Inside the try: an error creating the stream must still reach _race
+            chunks = self.clients[index].generate(prompt, stream=True, **{**kwargs, "cancel_token": token})
+            for chunk in chunks:
+                if first:
+                    first = False
+                    self._first_chunk(index, started)
+                if token.cancelled:
+                    return
+                events.put((index, "chunk", chunk))
+            events.put((index, "end", None))
+        except Exception as e:
+            events.put((index, "error", e))
+        finally:
+            if first and token.reason == HEDGE_LOST:
+                self._beaten(index, started)
+            # Closing the stream releases its HTTP connection; the token already aborted a blocked read
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def _empty(self, index: int) -> Exception:
+        return RuntimeError(f"{self.providers[index]} returned an empty response")
+
+    def _race(self, prompt: str, kwargs: Dict[str, Any]) -> Generator[StreamingChunk, None, None]:
+        events: "queue.Queue[Tuple[int, str, Any]]" = queue.Queue()
+        tokens = (CancellationToken(), CancellationToken())
+        starts: List[float] = []
+        caller_token: Optional[CancellationToken] = kwargs.get("cancel_token")
+        if caller_token is not None:
+            caller_token.on_cancel(lambda: [t.cancel(caller_token.reason or "cancelled") for t in tokens])
+
+        def start(index: int, reason: Optional[str] = None) -> None:
+            self._fire(index, reason)
+            leg_kwargs = kwargs if index == 0 else self._leg_kwargs(kwargs, starts[0])
+            starts.append(time.monotonic())
+            threading.Thread(
+                target=self._pump, args=(index, prompt, leg_kwargs, events, tokens[index]),
+                name=f"hedge-{self.agent}-{self.providers[index]}", daemon=True,
+            ).start()
+
+        start(0)
+        hedge_at = starts[0] + self.hedge_delay()
+        failed: Dict[int, BaseException] = {}
+        try:
+            winner: Optional[int] = None
+            first: Any = None
+            while winner is None:
+                wait = None if len(starts) > 1 else max(0.0, hedge_at - time.monotonic())
+                try:
+                    index, kind, value = events.get(timeout=wait)
+                except queue.Empty:
+                    start(1, "slow")
+                    continue
+                if kind == "end":
+                    # No output at all: as useless as an error, so fail over
+                    kind, value = "error", self._empty(index)
+                if kind == "error":
+                    failed[index] = value
+                    if len(starts) == 1 and self.failover:
+                        print(f"[HedgedLLMClient] {self.agent}: {self.providers[0]} failed: {value}")
+                        start(1, "error")
+                        continue
+                    if len(failed) == len(starts):
+                        raise failed[0] if 0 in failed else value
+                    continue
+                winner, first = index, value
+            tokens[1 - winner].cancel(HEDGE_LOST)
+            self._won(winner, len(starts) > 1)
+
+            kind, value = "chunk", first
+            while True:
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+                index, kind, value = events.get()
+                while index != winner:
+                    index, kind, value = events.get()
+        finally:
+            for token in tokens:
+                token.cancel("closed")
+
+    async def astream(self, prompt: str, **kwargs: Any) -> AsyncIterator[StreamingChunk]:
+        events: "asyncio.Queue[Tuple[int, str, Any]]" = asyncio.Queue()
+        tasks: List["asyncio.Task[None]"] = []
+        starts: List[float] = []
+        beaten = set()
+
+        async def pump(index: int, leg_kwargs: Dict[str, Any]) -> None:
+            started = time.monotonic()
+            first = True
+            try:
+                async for chunk in self.clients[index].astream(prompt, **leg_kwargs):
+                    if first:
+                        first = False
+                        self._first_chunk(index, started)
+                    await events.put((index, "chunk", chunk))
+                await events.put((index, "end", None))
+            except asyncio.CancelledError:
+                if first and index in beaten:
+                    self._beaten(index, started)
+                raise
+            except Exception as e:
+                await events.put((index, "error", e))
+
+        def start(index: int, reason: Optional[str] = None) -> None:
+            self._fire(index, reason)
+            leg_kwargs = kwargs if index == 0 else self._leg_kwargs(kwargs, starts[0])
+            starts.append(time.monotonic())
+            tasks.append(asyncio.ensure_future(pump(index, leg_kwargs)))
+
+        start(0)
+        hedge_at = starts[0] + self.hedge_delay()
+        failed: Dict[int, BaseException] = {}
+        try:
+            winner: Optional[int] = None
+            first: Any = None
+            while winner is None:
+                wait = None if len(starts) > 1 else max(0.0, hedge_at - time.monotonic())
+                try:
+                    index, kind, value = await asyncio.wait_for(events.get(), wait)
+                except asyncio.TimeoutError:
+                    start(1, "slow")
+                    continue
+                if kind == "end":
+                    kind, value = "error", self._empty(index)
+                if kind == "error":
+                    failed[index] = value
+                    if len(starts) == 1 and self.failover:
+                        print(f"[HedgedLLMClient] {self.agent}: {self.providers[0]} failed: {value}")
+                        start(1, "error")
+                        continue
+                    if len(failed) == len(starts):
+                        raise failed[0] if 0 in failed else value
+                    continue
+                winner, first = index, value
+            # Cancelling the losing task closes its stream (and HTTP response) right away
+            if len(tasks) > 1:
+                beaten.add(1 - winner)
+                tasks[1 - winner].cancel()
+            self._won(winner, len(starts) > 1)
+
+            kind, value = "chunk", first
+            while True:
+                if kind == "end":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+                index, kind, value = await events.get()
+                while index != winner:
+                    index, kind, value = await events.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, hedged, wins = self.calls, self.hedged, list(self.wins)
+        return {
+            "agent": self.agent,
+            "primary": self.providers[0],
+            "secondary": self.providers[1],
+            "hedge_delay_seconds": round(self.hedge_delay(), 4),
+            "primary_ttft_samples": len(self.trackers[0]),
+            "calls": calls,
+            "hedged": hedged,
+            "hedge_rate": round(hedged / calls, 4) if calls else 0.0,
+            "primary_wins": wins[0],
+            "secondary_wins": wins[1],
+        }
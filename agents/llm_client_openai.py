@@ -1,33 +1,66 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Optional
+import threading
+from typing import Any, Dict, Optional
 
 from .llm_client_base import LLMClient, StreamingChunk
 from .langsmith_config import setup_langsmith, create_run_name, get_langsmith_tags
 
 
 class OpenAIClient(LLMClient):
+    """OpenAI chat client; one instance is shared by all requests for a configuration.
+
+    The underlying ChatOpenAI (and its HTTP connection pool) is built once on
+    first use. Sampling parameters and the per-call timeout are bound per
+    call, so concurrent requests never mutate shared state.
+    """
+
     def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._llms: Dict[bool, Any] = {}
+        self._http_client: Any = None
+        self._lock = threading.Lock()
         
         # Setup LangSmith tracing
         setup_langsmith()
 
-    def generate(self, prompt: str, stream: bool = False, **kwargs: Any):
+    def _llm(self, with_deadline: bool):
+        """Shared ChatOpenAI; calls under a deadline use a variant without retries on the same connection pool."""
+        with self._lock:
+            llm = self._llms.get(with_deadline)
+            if llm is None:
+                import httpx
+                from langchain_openai import ChatOpenAI
+
+                if self._http_client is None:
+                    self._http_client = httpx.Client()
+                llm = ChatOpenAI(
+                    model=self.model,
+                    api_key=self.api_key,
+                    http_client=self._http_client,
+                    # Retrying would overrun the remaining request budget
+                    max_retries=0 if with_deadline else 2,
+                )
+                self._llms[with_deadline] = llm
+            return llm
+
+    def _prepare(self, prompt: str, stream: bool, kwargs: Dict[str, Any]):
+        """Bound LLM, messages and tracing config shared by the sync and async paths."""
         # Use LangChain wrapper to enable LangSmith auto-tracing
-        from langchain_openai import ChatOpenAI
         from langchain_core.messages import HumanMessage
         from langchain_core.runnables import RunnableConfig
 
-        llm = ChatOpenAI(
-            model=self.model,
-            api_key=self.api_key,
-            temperature=kwargs.get("temperature", 0.3),
-            max_tokens=kwargs.get("max_tokens", 800),
-            top_p=kwargs.get("top_p", 0.9),
-        )
+        timeout = kwargs.get("timeout")
+        params: Dict[str, Any] = {
+            "temperature": kwargs.get("temperature", 0.3),
+            "max_tokens": kwargs.get("max_tokens", 800),
+            "top_p": kwargs.get("top_p", 0.9),
+        }
+        if timeout is not None:
+            params["timeout"] = timeout
+        llm = self._llm(timeout is not None).bind(**params)
         
         # Convert prompt to message format for ChatOpenAI
         messages = [HumanMessage(content=prompt)]
@@ -38,13 +71,16 @@ class OpenAIClient(LLMClient):
             tags=get_langsmith_tags("openai", stream),
             metadata={
                 "model": self.model,
-                "temperature": kwargs.get("temperature", 0.3),
-                "max_tokens": kwargs.get("max_tokens", 800),
-                "top_p": kwargs.get("top_p", 0.9),
+                "temperature": params["temperature"],
+                "max_tokens": params["max_tokens"],
+                "top_p": params["top_p"],
                 "stream": stream,
             }
         )
-        
+        return llm, messages, config
+
+    def generate(self, prompt: str, stream: bool = False, **kwargs: Any):
+        llm, messages, config = self._prepare(prompt, stream, kwargs)
         if stream:
             for chunk in llm.stream(messages, config=config):
                 text = getattr(chunk, "content", None) or ""
@@ -55,4 +91,15 @@ class OpenAIClient(LLMClient):
         result = llm.invoke(messages, config=config)
         return getattr(result, "content", None) or ""
 
+    async def astream(self, prompt: str, **kwargs: Any):
+        llm, messages, config = self._prepare(prompt, True, kwargs)
+        async for chunk in llm.astream(messages, config=config):
+            text = getattr(chunk, "content", None) or ""
+            if text:
+                yield StreamingChunk({"text": text})
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        llm, messages, config = self._prepare(prompt, False, kwargs)
+        result = await llm.ainvoke(messages, config=config)
+        return getattr(result, "content", None) or ""
 
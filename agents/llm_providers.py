@@ -1,23 +1,208 @@
 from __future__ import annotations
 
-from typing import Any
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
 
+from .config import get_section
 from .llm_client_base import LLMClient, StreamingChunk
 from .llm_client_openai import OpenAIClient
 from .llm_client_bedrock import BedrockClient
 from .llm_client_gauss import GaussClient
 from .llm_client_gausso import GaussOClient
+from .llm_client_fake import FakeClient
+from .llm_client_cached import wrap_with_llm_cache
+from .llm_client_hedged import HedgedLLMClient
 
 
-def build_llm(provider: str, **kwargs: Any) -> LLMClient:
+ClientKey = Tuple[str, str]
+
+
+def _canonical_provider(provider: str) -> str:
     key = (provider or "").lower()
     if key in ("openai", "oai"):
-        return OpenAIClient(model=kwargs.get("model"), api_key=kwargs.get("api_key"))
+        return "openai"
     if key in ("bedrock", "aws"):
-        return BedrockClient(model_id=kwargs.get("model_id"), region=kwargs.get("region"))
+        return "bedrock"
     if key in ("gauss",):
-        return GaussClient(access_key=kwargs.get("access_key"), secret_key=kwargs.get("secret_key"))
+        return "gauss"
     if key in ("gausso", "gauss_o", "gauss-vision"):
-        return GaussOClient(access_key=kwargs.get("access_key"), secret_key=kwargs.get("secret_key"))
+        return "gausso"
+    if key in ("fake", "replay"):
+        return key
     raise ValueError(f"Unsupported LLM provider: {provider}")
 
+
+def create_llm(provider: str, **kwargs: Any) -> LLMClient:
+    """Construct a new, unshared LLM client for the provider (behind the prompt-level cache if enabled)."""
+    key = _canonical_provider(provider)
+    return wrap_with_llm_cache(_create_client(key, kwargs), key, kwargs)
+
+
+def _create_client(key: str, kwargs: Dict[str, Any]) -> LLMClient:
+    if key == "openai":
+        return OpenAIClient(model=kwargs.get("model"), api_key=kwargs.get("api_key"))
+    if key == "bedrock":
+        return BedrockClient(model_id=kwargs.get("model_id"), region=kwargs.get("region"))
+    if key == "gauss":
+        return GaussClient(access_key=kwargs.get("access_key"), secret_key=kwargs.get("secret_key"))
+    if key in ("fake", "replay"):
+        return _create_fake(key, kwargs)
+    return GaussOClient(access_key=kwargs.get("access_key"), secret_key=kwargs.get("secret_key"))
+
+
+def _create_fake(key: str, kwargs: Dict[str, Any]) -> FakeClient:
+    """Offline stand-in provider configured by ``fake_llm`` in configure.json (kwargs override it).
+
+    ``fake`` streams ``fake_llm.outputs``; ``replay`` streams the output
+    previews logged in ``fake_llm.replay_log`` (default hrm_agent_log.json).
+    """
+    cfg = {**get_section("fake_llm"), **kwargs}
+    return FakeClient(
+        outputs=cfg.get("outputs"),
+        replay_log=(cfg.get("replay_log") or "hrm_agent_log.json") if key == "replay" else None,
+        ttft=cfg.get("ttft_seconds", 0.5),
+        tokens_per_second=cfg.get("tokens_per_second", 40),
+        jitter=cfg.get("jitter", 0.2),
+        error_rate=cfg.get("error_rate", 0.0),
+        seed=cfg.get("seed", 0),
+        max_tracked_prompts=cfg.get("max_tracked_prompts", 10000),
+    )
+
+
+class LLMClientRegistry:
+    """Thread-safe LRU registry of shared LLM clients, one per (provider, kwargs).
+
+    Clients hold their SDK objects and HTTP connection pools, so reusing one
+    across requests reuses its connections. Clients are safe to share because
+    sampling parameters are passed per call. ``hits`` counts requests served
+    by an already built client (i.e. reusing its connection pool).
+    """
+
+    def __init__(self, max_clients: int = 32, factory: Optional[Callable[..., LLMClient]] = None) -> None:
+        self.max_clients = max(1, int(max_clients))
+        self._factory = factory or create_llm
+        self._clients: "OrderedDict[ClientKey, LLMClient]" = OrderedDict()
+        self._uses: Dict[ClientKey, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, kwargs: Dict[str, Any]) -> ClientKey:
+        relevant = {k: v for k, v in kwargs.items() if v is not None}
+        return (_canonical_provider(provider), json.dumps(relevant, sort_keys=True, default=str))
+
+    def get(self, provider: str, **kwargs: Any) -> LLMClient:
+        key = self.make_key(provider, kwargs)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._uses[key] += 1
+                self.hits += 1
+                return client
+            # Client construction is cheap (SDK objects are built lazily on first call),
+            # so building under the lock keeps one client per key without per-key locks
+            client = self._factory(provider, **kwargs)
+            self._clients[key] = client
+            self._uses[key] = 1
+            self.builds += 1
+            while len(self._clients) > self.max_clients:
+                evicted, _ = self._clients.popitem(last=False)
+                self._uses.pop(evicted, None)
+                self.evictions += 1
+        print(f"[LLMClientRegistry] Built {key[0]} client (size={len(self._clients)})")
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._uses.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.builds
+            return {
+                "size": len(self._clients),
+                "max_clients": self.max_clients,
+                "hits": self.hits,
+                "builds": self.builds,
+                "evictions": self.evictions,
+                "reuse_ratio": round(self.hits / total, 4) if total else 0.0,
+                "clients": [
+                    {"provider": key[0], "uses": self._uses.get(key, 0)} for key in self._clients.keys()
+                ],
+            }
+
+
+_registry: Optional[LLMClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_client_registry() -> LLMClientRegistry:
+    """Process-wide LLM client registry, sized by ``llm_clients.max_clients`` in configure.json."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            cfg = get_section("llm_clients")
+            _registry = LLMClientRegistry(max_clients=cfg.get("max_clients", 32))
+        return _registry
+
+
+def build_llm(provider: str, **kwargs: Any) -> LLMClient:
+    """Return the shared LLM client for the provider and configuration, building it on first use."""
+    return get_llm_client_registry().get(provider, **kwargs)
+
+
+_hedged: Dict[Tuple[str, ClientKey], HedgedLLMClient] = {}
+_hedged_lock = threading.Lock()
+
+
+def build_agent_llm(agent: str, provider: str, **kwargs: Any) -> LLMClient:
+    """``build_llm`` for an agent, wrapped in a HedgedLLMClient if ``hedging`` configures one for it::
+
+        "hedging": {
+          "enabled": true,
+          "agents": {
+            "diagnosis_summarizer": {"secondary": "openai", "percentile": 95, "max_delay_seconds": 10}
+          }
+        }
+
+    ``secondary_kwargs`` configures the secondary client (model, region, ...).
+    Agents whose secondary is their own provider are not hedged.
+    """
+    primary = build_llm(provider, **kwargs)
+    cfg = get_section("hedging")
+    policy = (cfg.get("agents") or {}).get(agent)
+    if not cfg.get("enabled", False) or not policy or not policy.get("secondary"):
+        return primary
+    secondary_kwargs = policy.get("secondary_kwargs") or {}
+    if _canonical_provider(policy["secondary"]) == _canonical_provider(provider):
+        return primary
+    key = (agent, LLMClientRegistry.make_key(provider, kwargs))
+    with _hedged_lock:
+        client = _hedged.get(key)
+        if client is None or client.clients[0] is not primary:
+            client = HedgedLLMClient(
+                agent,
+                primary, _canonical_provider(provider),
+                build_llm(policy["secondary"], **secondary_kwargs), _canonical_provider(policy["secondary"]),
+                percentile=policy.get("percentile", 95),
+                min_delay=policy.get("min_delay_seconds", 1.0),
+                max_delay=policy.get("max_delay_seconds", 10.0),
+                default_delay=policy.get("default_delay_seconds", 4.0),
+                min_samples=policy.get("min_samples", 20),
+                window=policy.get("window", 200),
+                failover=policy.get("failover", True),
+            )
+            _hedged[key] = client
+        return client
+
+
+def hedging_stats() -> Dict[str, Any]:
+    with _hedged_lock:
+        clients = list(_hedged.values())
+    return {"clients": [client.stats() for client in clients]}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import time
@@ -13,6 +14,11 @@ def _log_path() -> str:
     return os.path.join(project_root, "hrm_agent_log.json")
 
 
+def prompt_hash(prompt: str) -> str:
+    """Digest of a full rendered prompt, logged next to its (truncated) preview."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
 def log_event(event: Dict[str, Any]) -> None:
     try:
         payload = {
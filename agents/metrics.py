@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+from .cancellation import GenerationCancelled
+
+# Seconds; covers sub-millisecond guardrail work up to multi-minute generations
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+AGENT_LABELS = ("agent", "provider", "language")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = self.header()
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels: Any) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        lines = self.header()
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]) -> None:
+        self._histogram = histogram
+        self._labels = labels
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, **self._labels)
+
+
+GaugeSample = Tuple[Dict[str, Any], float]
+
+
+class MetricsRegistry:
+    """Minimal in-process Prometheus registry (text exposition format 0.0.4).
+
+    Metrics are plain dicts guarded by a per-metric lock, so recording an
+    observation costs one bisect and one uncontended lock acquisition.
+    Gauges are collected on scrape from callbacks instead of being updated
+    on every change.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._gauges: Dict[str, Tuple[str, Sequence[str], Callable[[], Iterable[GaugeSample]]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[GaugeSample]],
+    ) -> None:
+        with self._lock:
+            self._gauges[name] = (documentation, tuple(labelnames), collect)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            gauges = list(self._gauges.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, (documentation, labelnames, collect) in gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            try:
+                for labels, value in collect():
+                    values = [labels.get(label, "") for label in labelnames]
+                    lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+            except Exception as e:
+                print(f"[Metrics] Gauge {name} collection failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "hrm_request_duration_seconds",
+    "HTTP request latency until the last response byte (streams included).",
+    ("endpoint", "provider", "language", "status"),
+)
+TIME_TO_FIRST_TOKEN = registry.histogram(
+    "hrm_llm_time_to_first_token_seconds",
+    "Time from prompt ready to the first output chunk of an agent.",
+    AGENT_LABELS,
+)
+GENERATION_TIME = registry.histogram(
+    "hrm_llm_generation_seconds",
+    "Total time from prompt ready to the last output chunk of an agent.",
+    AGENT_LABELS,
+)
+RETRIEVER_LATENCY = registry.histogram(
+    "hrm_retriever_duration_seconds",
+    "Latency of guide document retrieval.",
+    AGENT_LABELS,
+)
+GUARDRAIL_TIME = registry.histogram(
+    "hrm_guardrail_duration_seconds",
+    "Time spent in guardrail post-processing including the readability report.",
+    AGENT_LABELS,
+)
+PROMPT_BUILD_TIME = registry.histogram(
+    "hrm_prompt_build_duration_seconds",
+    "Time spent rendering an agent prompt.",
+    AGENT_LABELS,
+)
+OUTPUT_CHUNKS = registry.counter(
+    "hrm_llm_output_chunks_total",
+    "Output chunks streamed by agents.",
+    AGENT_LABELS,
+)
+OUTPUT_CHARS = registry.counter(
+    "hrm_llm_output_chars_total",
+    "Output characters streamed by agents.",
+    AGENT_LABELS,
+)
+ERRORS = registry.counter(
+    "hrm_errors_total",
+    "Errors by agent and stage.",
+    AGENT_LABELS + ("stage",),
+)
+GENERATIONS_CANCELLED = registry.counter(
+    "hrm_llm_generations_cancelled_total",
+    "Agent generations stopped early because the client went away.",
+    AGENT_LABELS + ("reason",),
+)
+
+
+class _StreamObservation:
+    """TTFT, generation time, chunk/char, error and cancellation metrics of one agent stream."""
+
+    def __init__(self, agent: str, provider: str, language: str) -> None:
+        self.labels = {"agent": agent, "provider": provider, "language": language}
+        self.started = time.perf_counter()
+        self.first = True
+
+    def chunk(self, chunk: str) -> None:
+        if self.first:
+            TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - self.started, **self.labels)
+            self.first = False
+        OUTPUT_CHUNKS.inc(**self.labels)
+        OUTPUT_CHARS.inc(len(chunk), **self.labels)
+
+    def failed(self, error: BaseException) -> None:
+        # GeneratorExit/CancelledError mean the consumer went away, not that generation failed
+        if isinstance(error, GenerationCancelled):
+            GENERATIONS_CANCELLED.inc(reason=error.reason, **self.labels)
+        elif isinstance(error, Exception):
+            ERRORS.inc(stage="generate", **self.labels)
+
+    def completed(self) -> None:
+        GENERATION_TIME.observe(time.perf_counter() - self.started, **self.labels)
+
+
+def observe_stream(
+    chunks: Iterable[str],
+    agent: str,
+    provider: str,
+    language: str,
+) -> Generator[str, None, None]:
+    """Pass chunks through while recording TTFT, generation time, chunk/char counts, errors and cancellations."""
+    observation = _StreamObservation(agent, provider, language)
+    try:
+        for chunk in chunks:
+            observation.chunk(chunk)
+            yield chunk
+    except BaseException as e:
+        observation.failed(e)
+        raise
+    observation.completed()
+
+
+async def aobserve_stream(
+    chunks: AsyncIterable[str],
+    agent: str,
+    provider: str,
+    language: str,
+) -> AsyncIterator[str]:
+    """Async counterpart of ``observe_stream``."""
+    observation = _StreamObservation(agent, provider, language)
+    try:
+        async for chunk in chunks:
+            observation.chunk(chunk)
+            yield chunk
+    except BaseException as e:
+        observation.failed(e)
+        raise
+    observation.completed()
+
+
+REQUEST_LANGUAGES = ("ko", "en")
+
+
+def request_labels(provider: Optional[str], language: Optional[str]) -> Dict[str, str]:
+    """Bounded provider/language label values for REQUEST_LATENCY.
+
+    Both come from the request body or query string, so anything but a
+    supported provider (by canonical name) or ko/en is reported as "other";
+    a missing value stays "".
+    """
+    # Imported here: llm_providers imports the clients, which import this module
+    from .llm_providers import _canonical_provider
+
+    provider_label = ""
+    if provider:
+        try:
+            provider_label = _canonical_provider(str(provider))
+        except ValueError:
+            provider_label = "other"
+    language_label = ""
+    if language:
+        language_label = str(language).lower()
+        if language_label not in REQUEST_LANGUAGES:
+            language_label = "other"
+    return {"provider": provider_label, "language": language_label}
+
+
+def instrument_flask_app(app: Any, labels: Optional[Callable[[], Dict[str, Any]]] = None) -> None:
+    """Record REQUEST_LATENCY for every request of a Flask app.
+
+    Latency is taken when the WSGI server closes the response, so streamed
+    SSE responses are measured to their last byte rather than to the headers.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _metrics_start() -> None:
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _metrics_finish(response: Any) -> Any:
+        started = getattr(g, "_metrics_started", None)
+        if started is None:
+            return response
+        extra = {}
+        if labels is not None:
+            try:
+                extra = labels() or {}
+            except Exception:
+                extra = {}
+        request_labels = {
+            "endpoint": request.endpoint or "unknown",
+            "provider": extra.get("provider", ""),
+            "language": extra.get("language", ""),
+            "status": response.status_code,
+        }
+        response.call_on_close(lambda: REQUEST_LATENCY.observe(time.perf_counter() - started, **request_labels))
+        return response
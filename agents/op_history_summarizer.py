@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from .llm_providers import build_llm
+from .cancellation import CancellationToken, acancellable, cancellable, time_budget
+from .config import get_section
+from .history_stats import available as history_stats_available, compute_history_stats, find_events, without_path
+from .llm_providers import build_agent_llm
 from .prompt_builder import PromptBuilder
 from .guardrails import Guardrail
-from .logger import log_event
+from .logger import log_event, prompt_hash
+from .metrics import PROMPT_BUILD_TIME, aobserve_stream, observe_stream
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import SingleFlight, get_single_flight
+from .token_budget import agent_budget, fit_history, get_token_estimator, record_prompt_tokens
 
 
 class OperationHistorySummarizer:
@@ -14,40 +23,214 @@ class OperationHistorySummarizer:
         provider: str = "gauss",
         prompt_builder: Optional[PromptBuilder] = None,
         guardrail: Optional[Guardrail] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
         **provider_kwargs: Any,
     ) -> None:
         self.provider = provider
         self.provider_kwargs = provider_kwargs
         self.prompt_builder = prompt_builder or PromptBuilder(default_language="ko")
         self.guardrail = guardrail or Guardrail()
+        self.response_cache = response_cache or get_response_cache()
+        self.single_flight = single_flight or get_single_flight()
 
-    def summarize(self, operation_history: Dict[str, Any], language: str = "ko", stream: bool = True):
+    def _prepare(self, operation_history: Dict[str, Any], language: str, stream: bool) -> Tuple[str, str]:
+        """Render the prompt and its response cache key."""
         payload = {"operation_history": operation_history, "language": language}
         payload = self.guardrail.pre_guard(payload)
+        # One template version for the whole request, even if prompt.json is reloaded meanwhile
+        builder = self.prompt_builder.pinned()
+        operation_history, stats = self._history_stats(builder, operation_history, language)
+        operation_history = self._fit_token_budget(builder, operation_history, language, stats)
         
         # Build prompt using PromptBuilder with operation history data
-        prompt = self.prompt_builder.build_operation_history_prompt(operation_history, self.provider, language)
+        with PROMPT_BUILD_TIME.time(agent="op_history_summarizer", provider=self.provider, language=language):
+            prompt = builder.build_operation_history_prompt(
+                operation_history, self.provider, language, stats=stats
+            )
         print(f"[OperationHistorySummarizer] provider={self.provider}, language={language}")
         log_event({
             "stage": "op_history_build_prompt",
             "provider": self.provider,
             "language": language,
+            "prompt_version": builder.version,
             "prompt_preview": prompt[:300],
+            "prompt_hash": prompt_hash(prompt),
         })
-        llm = build_llm(self.provider, **self.provider_kwargs)
+        cache_key = self.response_cache.make_key(
+            agent="op_history_summarizer",
+            prompt=prompt,
+            provider=self.provider,
+            model=self.provider_kwargs.get("model") or self.provider_kwargs.get("model_id"),
+            language=language,
+            prompt_version=builder.version,
+            stream=stream,
+        )
+        return prompt, cache_key
 
-        # For Gauss provider, force non-streaming and emit once
-        if stream and self.provider.lower() != "gauss":
+    def _history_stats(
+        self, builder: PromptBuilder, operation_history: Dict[str, Any], language: str
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Statistics stage: summarize the full event list with NumPy for the prompt's statistics block.
+
+        Runs before the token budget so the statistics cover every event even
+        when the raw records are trimmed; with ``history_stats: "replace"`` the
+        raw records are left out of the prompt altogether.
+        """
+        mode = builder.history_stats_mode(language)
+        cfg = get_section("history_stats")
+        if mode == "off" or not cfg.get("enabled", True) or not isinstance(operation_history, dict):
+            return operation_history, None
+        if not history_stats_available():
+            print("[OperationHistorySummarizer] numpy is not installed, skipping history statistics")
+            return operation_history, None
+        found = find_events(operation_history)
+        if found is None or len(found[1]) < cfg.get("min_events", 20):
+            return operation_history, None
+        path, events = found
+        started = time.perf_counter()
+        try:
+            stats = compute_history_stats(events, cfg)
+        except Exception as e:
+            print(f"[OperationHistorySummarizer] History statistics failed: {e}")
+            return operation_history, None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if mode == "replace":
+            operation_history = without_path(operation_history, path)
+        log_event({
+            "stage": "op_history_stats",
+            "provider": self.provider,
+            "language": language,
+            "mode": mode,
+            "events": len(events),
+            "elapsed_ms": round(elapsed_ms, 2),
+        })
+        return operation_history, stats
+
+    def _fit_token_budget(
+        self,
+        builder: PromptBuilder,
+        operation_history: Dict[str, Any],
+        language: str,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Token-budget stage: shrink the history to the agent's input budget and log the token counts."""
+        estimator = get_token_estimator(self.provider)
+        budget_cfg = agent_budget("op_history_summarizer")
+        # Count the history as the prompt serializes it, plus the prompt text around it
+        render = lambda history: builder.serialize_operation_history(history, language)
+        overhead = max(0, estimator.count(
+            builder.build_operation_history_prompt({}, self.provider, language, stats=stats)
+        ) - estimator.count(render({})))
+        max_tokens = budget_cfg.get("max_input_tokens")
+        budget = max(0, int(max_tokens) - overhead) if max_tokens else float("inf")
+        operation_history, report = fit_history(
+            operation_history, budget, estimator.count, render=render, min_entries=budget_cfg.get("min_entries", 1)
+        )
+        tokens_before = report["tokens_before"] + overhead
+        tokens_after = report["tokens_after"] + overhead
+        record_prompt_tokens("op_history_summarizer", self.provider, tokens_before, tokens_after)
+        if tokens_after < tokens_before or report.get("over_budget"):
+            print(
+                f"[OperationHistorySummarizer] Input tokens {tokens_before} -> {tokens_after} "
+                f"(budget {max_tokens}, entries {report.get('entries_before')} -> {report.get('entries_after')})"
+            )
+        log_event({
+            "stage": "op_history_token_budget",
+            "provider": self.provider,
+            "language": language,
+            "max_input_tokens": max_tokens,
+            **{k: v for k, v in report.items() if k != "budget"},
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+        })
+        return operation_history
+
+    def summarize(
+        self,
+        operation_history: Dict[str, Any],
+        language: str = "ko",
+        stream: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        prompt, cache_key = self._prepare(operation_history, language, stream)
+        # Identical requests already in flight share one upstream generation; a cancelled
+        # request only detaches itself, the LLM stream stops once no subscriber is left
+        yield from observe_stream(
+            cancellable(
+                self.response_cache.stream(
+                    cache_key,
+                    lambda: self.single_flight.stream(
+                        cache_key,
+                        lambda flight_token: self._generate(
+                            prompt, language, stream, time_budget(cancel_token), flight_token
+                        ),
+                        cancel_token,
+                    ),
+                ),
+                cancel_token,
+            ),
+            "op_history_summarizer", self.provider, language,
+        )
+
+    async def asummarize(
+        self,
+        operation_history: Dict[str, Any],
+        language: str = "ko",
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """Async streaming ``summarize``, generating through the client's native async path."""
+        # Prompt building (serialization, token counting, stats) is CPU work kept off the event loop
+        prompt, cache_key = await asyncio.to_thread(self._prepare, operation_history, language, True)
+        async for chunk in aobserve_stream(
+            acancellable(
+                self.response_cache.astream(
+                    cache_key,
+                    lambda: self.single_flight.astream(
+                        cache_key, lambda: self._agenerate(prompt, time_budget(cancel_token))
+                    ),
+                ),
+                cancel_token,
+            ),
+            "op_history_summarizer", self.provider, language,
+        ):
+            yield chunk
+
+    async def _agenerate(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        llm = build_agent_llm("op_history_summarizer", self.provider, **self.provider_kwargs)
+        async for chunk in llm.astream(prompt, timeout=timeout):
+            text = chunk.get("text", "")
+            if text:
+                yield text
+
+    def _generate(
+        self,
+        prompt: str,
+        language: str,
+        stream: bool,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        llm = build_agent_llm("op_history_summarizer", self.provider, **self.provider_kwargs)
+
+        if stream:
             preview = []
-            for chunk in llm.generate(prompt, stream=True):
+            for chunk in llm.generate(prompt, stream=True, timeout=timeout, cancel_token=cancel_token):
                 text = chunk.get("text", "")
                 if text:
                     if len("".join(preview)) < 500:
                         preview.append(text)
                     yield text
+            # Streamed outputs are logged too, so the replay provider can serve them
+            log_event({
+                "stage": "op_history_llm_output",
+                "provider": self.provider,
+                "language": language,
+                "output_preview": "".join(preview)[:300],
+            })
             return
 
-        output = llm.generate(prompt, stream=False)
+        output = llm.generate(prompt, stream=False, timeout=timeout, cancel_token=cancel_token)
         log_event({
             "stage": "op_history_llm_output",
             "provider": self.provider,
@@ -1,106 +1,254 @@
 from __future__ import annotations
 
 import json
-import os
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+from .prompt_registry import PromptRegistry, PromptTemplates, get_prompt_registry
+from .token_budget import TIME_KEYS
+
+# Serializations of operation history, chosen per prompt with "history_format" in prompt.json
+HISTORY_FORMATS = ("repr", "json", "columnar")
+# Where precomputed history statistics go, chosen per prompt with "history_stats" in prompt.json:
+# not at all, alongside the raw records, or instead of them
+HISTORY_STATS_MODES = ("off", "alongside", "replace")
+
+COLUMNAR_LEGEND = (
+    "Format: each table lists its columns, then one row per record with cells separated by \"|\" "
+    "(empty cell = field missing). @n stands for value n of the table's values line. "
+    "xN in the last column stands for N consecutive identical records; their time cell is first~last."
+)
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _is_records(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def _contains_records(value: Any) -> bool:
+    if _is_records(value):
+        return True
+    return isinstance(value, dict) and any(_contains_records(v) for v in value.values())
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, str):
+        plain = value and value == value.strip() and not value.startswith(("@", '"')) and not any(c in value for c in "|\n~")
+        return value if plain else _compact_json(value)
+    if value is None or isinstance(value, bool):
+        return "null" if value is None else ("true" if value else "false")
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return _compact_json(value)
+
+
+def _columnar_table(name: str, records: List[Dict[str, Any]]) -> List[str]:
+    """Render records as a header row plus one row per run of identical records, strings dictionary-encoded."""
+    columns: List[str] = []
+    for record in records:
+        columns.extend(k for k in record if k not in columns)
+    time_key: Optional[str] = next((k for k in TIME_KEYS if k in columns), None)
+
+    # Runs of records identical apart from their time collapse into one row
+    rows: List[List[Any]] = []
+    last_signature = None
+    for record in records:
+        signature = [(k, v) for k, v in record.items() if k != time_key]
+        if rows and signature == last_signature:
+            rows[-1][1] += 1
+            rows[-1][2] = record.get(time_key)
+            continue
+        rows.append([record, 1, None])
+        last_signature = signature
+
+    cells = [[_cell(r[c]) if c in r else "" for c in columns] for r, _, _ in rows]
+    counts: Dict[str, int] = {}
+    for row in cells:
+        for column, text in zip(columns, row):
+            if column != time_key and text and not text[0].isdigit() and text[0] not in "-[{":
+                counts[text] = counts.get(text, 0) + 1
+    codes: Dict[str, str] = {}
+    for text, n in counts.items():
+        code = f"@{len(codes)}"
+        # Worth it only when the repeats save more than the values line entry costs
+        if n > 1 and (len(text) - len(code)) * n > len(text) + len(code) + 2:
+            codes[text] = code
+
+    lines = [f"[{name}] {len(records)} records in {len(rows)} rows"]
+    if codes:
+        lines.append("values: " + " ".join(f"{code}={_compact_json(text)}" for text, code in codes.items()))
+    collapsed = any(n > 1 for _, n, _ in rows)
+    lines.append("columns: " + "|".join(columns + (["xN"] if collapsed else [])))
+    for (record, n, last_time), row in zip(rows, cells):
+        row = [codes.get(text, text) for text in row]
+        if n > 1:
+            if time_key is not None and time_key in record:
+                row[columns.index(time_key)] += "~" + _cell(last_time)
+            row.append(f"x{n}")
+        elif collapsed:
+            row.append("")
+        lines.append("|".join(row))
+    return lines
+
+
+def serialize_columnar(op_history: Any) -> str:
+    """Compact text form of operation history: record lists become columnar tables, the rest compact JSON."""
+    lines: List[str] = []
+
+    def render(name: str, value: Any) -> None:
+        if _is_records(value):
+            lines.extend(_columnar_table(name, value))
+        elif isinstance(value, dict) and _contains_records(value):
+            for key, child in value.items():
+                render(f"{name}.{key}" if name else str(key), child)
+        else:
+            lines.append(f"{name}: {_compact_json(value)}" if name else _compact_json(value))
+
+    if isinstance(op_history, dict):
+        for key, value in op_history.items():
+            render(str(key), value)
+    else:
+        render("", op_history)
+    if any(line.startswith("columns: ") for line in lines):
+        lines.insert(0, COLUMNAR_LEGEND)
+    return "\n".join(lines)
 
 
 class PromptBuilder:
     """Builds prompts per agent and LLM provider.
 
-    Prompts are loaded from prompt.json configuration file.
+    Templates come from the process-wide PromptRegistry (prompt.json,
+    reloaded when the file changes). A builder follows the registry's
+    latest version; ``pinned()`` returns one fixed to the current version,
+    so every prompt of a request and its ``version`` stay consistent.
     """
 
-    def __init__(self, default_language: str = "ko"):
+    def __init__(
+        self,
+        default_language: str = "ko",
+        registry: Optional[PromptRegistry] = None,
+        templates: Optional[PromptTemplates] = None,
+    ):
         self.default_language = default_language
-        self.prompts = self._load_prompts()
+        self.registry = registry
+        self._templates = templates
+        if templates is None and registry is None:
+            self.registry = get_prompt_registry()
 
-    def _load_prompts(self) -> Dict[str, Any]:
-        """Load prompts from prompt.json configuration file."""
-        try:
-            # Find prompt.json in project root (agents/.. -> project root)
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-            prompt_path = os.path.join(project_root, "prompt.json")
-            
-            if not os.path.exists(prompt_path):
-                print(f"[PromptBuilder] Warning: prompt.json not found at {prompt_path}, using fallback prompts")
-                return self._get_fallback_prompts()
-            
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            if not isinstance(data, dict):
-                print("[PromptBuilder] Warning: Invalid prompt.json format, using fallback prompts")
-                return self._get_fallback_prompts()
-            
-            return data
-        except Exception as e:
-            print(f"[PromptBuilder] Error loading prompt.json: {e}, using fallback prompts")
-            return self._get_fallback_prompts()
-
-    def _get_fallback_prompts(self) -> Dict[str, Any]:
-        """Fallback prompts if prompt.json is not available."""
-        return {
-            "diagnosis": {
-                "ko": {
-                    "header": "진단 데이터를 분석하여 상태를 파악하고 해결책을 제공하세요.\n\n기기 유형: {device_type}\n\n진단 정보:\n{diagnosis_text}\n\n",
-                    "format": "한국어로 분석 결과를 제공하세요."
-                },
-                "en": {
-                    "header": "Analyze diagnostic data and provide solutions.\n\nDevice Type: {device_type}\n\nDiagnostic Information:\n{diagnosis_text}\n\n",
-                    "format": "Provide analysis results in English."
-                }
-            },
-            "operation_history": {
-                "ko": {"base": "운영 이력을 분석하세요.", "example": "한국어로 요약하세요."},
-                "en": {"base": "Analyze operation history.", "example": "Summarize in English."}
-            },
-            "guide": {
-                "ko": {"template": "가이드를 제공하세요.\n진단: {diagnosis_summary}\n이력: {op_summary}"},
-                "en": {"template": "Provide guide.\nDiagnosis: {diagnosis_summary}\nHistory: {op_summary}"}
-            }
-        }
+    @property
+    def templates(self) -> PromptTemplates:
+        return self._templates if self._templates is not None else self.registry.current()
+
+    @property
+    def prompts(self) -> Dict[str, Any]:
+        return self.templates.prompts
+
+    @property
+    def version(self) -> str:
+        """Content hash of the templates; changes whenever prompt.json changes."""
+        return self.templates.version
+
+    def pinned(self) -> "PromptBuilder":
+        """Builder fixed to the current template version (for the duration of one request)."""
+        if self._templates is not None:
+            return self
+        return PromptBuilder(self.default_language, self.registry, self.registry.current())
 
     def build_diagnosis_prompt(self, device_type: str, diagnosis_text: str, provider: str, language: str | None = None) -> str:
         """Build diagnosis prompt using configuration."""
         lang = self._normalize_language(language)
         
         try:
-            prompt_config = self.prompts["diagnosis"][lang]
-            header = prompt_config["header"].format(device_type=device_type, diagnosis_text=diagnosis_text)
-            format_block = prompt_config["format"]
+            templates = self.templates
+            header = templates.template("diagnosis", lang, "header").render(
+                device_type=device_type, diagnosis_text=diagnosis_text
+            )
+            format_block = templates.prompts["diagnosis"][lang]["format"]
             return header + format_block
         except KeyError:
             print(f"[PromptBuilder] Warning: No prompt found for diagnosis/{lang}, using fallback")
             return f"Analyze the diagnostic data for {device_type}:\n{diagnosis_text}\nProvide analysis in {lang}."
 
-    def build_operation_history_prompt(self, op_history: Dict[str, Any], provider: str, language: str | None = None) -> str:
-        """Build operation history prompt using configuration."""
+    def build_operation_history_prompt(
+        self,
+        op_history: Dict[str, Any],
+        provider: str,
+        language: str | None = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Build operation history prompt using configuration.
+
+        ``stats`` (see agents.history_stats) is added as a statistics block
+        ahead of the serialized history.
+        """
         lang = self._normalize_language(language)
         
         try:
             prompt_config = self.prompts["operation_history"][lang]
             base = prompt_config["base"]
             example = prompt_config["example"]
+            history_format = self.history_format(lang)
+            label = "operation history table" if history_format == "columnar" else "operation history JSON"
+            subject, stats_block = label, ""
+            if stats:
+                stats_block = (
+                    f"Operation history statistics (precomputed from all {stats.get('events', 0)} records):\n"
+                    f"{_compact_json(stats)}\n\n"
+                )
+                subject = f"operation history statistics and {label}"
             
             return (
                 f"{base}{example}\n---\n\n"
-                f"Now, based on the given operation history JSON, produce the summary according to the above format.\n\n"
-                f"Operation history JSON:\n{op_history}"
+                f"Now, based on the given {subject}, produce the summary according to the above format.\n\n"
+                f"{stats_block}"
+                f"{label[0].upper()}{label[1:]}:\n{self.serialize_operation_history(op_history, lang)}"
             )
         except KeyError:
             print(f"[PromptBuilder] Warning: No prompt found for operation_history/{lang}, using fallback")
             return f"Analyze the operation history data and provide summary in {lang}:\n{op_history}"
 
+    def history_format(self, language: str | None = None) -> str:
+        """Operation history serialization for the language's prompt (``history_format`` in prompt.json)."""
+        return self._operation_history_option(language, "history_format", HISTORY_FORMATS)
+
+    def history_stats_mode(self, language: str | None = None) -> str:
+        """Placement of precomputed history statistics (``history_stats`` in prompt.json, default off)."""
+        return self._operation_history_option(language, "history_stats", HISTORY_STATS_MODES)
+
+    def _operation_history_option(self, language: str | None, key: str, choices: tuple) -> str:
+        lang = self._normalize_language(language)
+        config = self.prompts.get("operation_history", {}).get(lang, {})
+        value = str(config.get(key, choices[0])).lower() if isinstance(config, dict) else choices[0]
+        if value not in choices:
+            print(f"[PromptBuilder] Warning: Unknown {key} {value!r}, using {choices[0]}")
+            return choices[0]
+        return value
+
+    def serialize_operation_history(self, op_history: Any, language: str | None = None) -> str:
+        """Render operation history as it appears in the prompt.
+
+        ``repr`` is the Python dict repr used so far, ``json`` is compact
+        JSON and ``columnar`` turns record lists into tables (header row,
+        one row per record, repeated strings dictionary-encoded, runs of
+        identical records collapsed).
+        """
+        history_format = self.history_format(language)
+        if history_format == "columnar":
+            return serialize_columnar(op_history)
+        if history_format == "json":
+            return _compact_json(op_history)
+        return f"{op_history}"
+
     def build_guide_prompt(self, diagnosis_summary: str, op_summary: str, provider: str, language: str | None = None) -> str:
         """Build guide prompt using configuration."""
         lang = self._normalize_language(language)
         
         try:
-            prompt_config = self.prompts["guide"][lang]
-            template = prompt_config["template"]
+            template = self.templates.template("guide", lang, "template")
             
-            return template.format(
+            return template.render(
                 language=lang,
                 diagnosis_summary=diagnosis_summary,
                 op_summary=op_summary
@@ -121,9 +269,8 @@ class PromptBuilder:
             # Fallback: still return in ko format to enforce ko output
             lang = "ko"
         try:
-            prompt_config = self.prompts["guide"]["ko_actions"]
-            template = prompt_config["template"]
-            return template.format(
+            template = self.templates.template("guide", "ko_actions", "template")
+            return template.render(
                 diagnosis_summary=diagnosis_summary,
                 reference_summaries=reference_summaries,
             )
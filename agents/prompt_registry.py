@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import string
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import get_section, project_root
+from .logger import log_event
+from .metrics import registry
+
+PROMPT_RELOADS = registry.counter(
+    "hrm_prompt_reloads_total",
+    "prompt.json reloads by the prompt registry by result (ok/error).",
+    ("result",),
+)
+
+FALLBACK_PROMPTS: Dict[str, Any] = {
+    "diagnosis": {
+        "ko": {
+            "header": "진단 데이터를 분석하여 상태를 파악하고 해결책을 제공하세요.\n\n기기 유형: {device_type}\n\n진단 정보:\n{diagnosis_text}\n\n",
+            "format": "한국어로 분석 결과를 제공하세요."
+        },
+        "en": {
+            "header": "Analyze diagnostic data and provide solutions.\n\nDevice Type: {device_type}\n\nDiagnostic Information:\n{diagnosis_text}\n\n",
+            "format": "Provide analysis results in English."
+        }
+    },
+    "operation_history": {
+        "ko": {"base": "운영 이력을 분석하세요.", "example": "한국어로 요약하세요."},
+        "en": {"base": "Analyze operation history.", "example": "Summarize in English."}
+    },
+    "guide": {
+        "ko": {"template": "가이드를 제공하세요.\n진단: {diagnosis_summary}\n이력: {op_summary}"},
+        "en": {"template": "Provide guide.\nDiagnosis: {diagnosis_summary}\nHistory: {op_summary}"}
+    }
+}
+
+
+class CompiledTemplate:
+    """A ``str.format`` template parsed once into literal text and field names.
+
+    ``render`` joins the pieces instead of re-parsing the template on every
+    call and raises KeyError for a missing field like ``str.format``.
+    Templates using format specs, conversions or attribute/index fields are
+    left to ``str.format``.
+    """
+
+    __slots__ = ("text", "_parts")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._parts: Optional[List[Tuple[str, Optional[str]]]] = []
+        try:
+            for literal, field, spec, conversion in string.Formatter().parse(text):
+                if field is not None and (spec or conversion or not field.isidentifier()):
+                    self._parts = None
+                    break
+                self._parts.append((literal, field))
+        except ValueError:
+            # Malformed braces: str.format raises the same error at render time
+            self._parts = None
+
+    def render(self, **values: Any) -> str:
+        if self._parts is None:
+            return self.text.format(**values)
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(str(values[field]))
+        return "".join(out)
+
+
+class PromptTemplates:
+    """One immutable version of the prompt templates.
+
+    ``version`` is a content hash of the templates, used by response caches
+    and logs. Template strings are compiled on construction; callers must
+    not modify ``prompts``.
+    """
+
+    def __init__(self, prompts: Dict[str, Any], source: Optional[str] = None) -> None:
+        self.prompts = prompts
+        self.source = source
+        self.version = hashlib.sha256(
+            json.dumps(prompts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+        self.loaded_at = time.time()
+        self._compiled: Dict[Tuple[str, str, str], CompiledTemplate] = {}
+        for section, languages in prompts.items():
+            if not isinstance(languages, dict):
+                continue
+            for lang, fields in languages.items():
+                if not isinstance(fields, dict):
+                    continue
+                for key, text in fields.items():
+                    if isinstance(text, str):
+                        self._compiled[(section, lang, key)] = CompiledTemplate(text)
+
+    def template(self, section: str, language: str, key: str) -> CompiledTemplate:
+        """Compiled ``prompts[section][language][key]``; KeyError if absent."""
+        return self._compiled[(section, language, key)]
+
+
+class PromptRegistry:
+    """Process-wide prompt.json templates, reloaded when the file changes.
+
+    ``current()`` stats the file at most once per ``check_interval`` seconds
+    and, when its mtime or size changed, parses it into a new
+    PromptTemplates and swaps it in with a single assignment. Callers that
+    hold a PromptTemplates keep a consistent snapshot for the whole request
+    even if a reload happens meanwhile. A file that fails to parse is
+    logged and the previous version stays active.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0) -> None:
+        self.path = path
+        self.check_interval = max(0.0, float(check_interval))
+        self.reloads = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._templates = self._initial()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self) -> Dict[str, Any]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("top level of prompt.json must be an object")
+        return data
+
+    def _initial(self) -> PromptTemplates:
+        self._signature = self._stat()
+        if self._signature is None:
+            print(f"[PromptRegistry] Warning: prompt.json not found at {self.path}, using fallback prompts")
+            return PromptTemplates(FALLBACK_PROMPTS)
+        try:
+            return PromptTemplates(self._read(), source=self.path)
+        except Exception as e:
+            print(f"[PromptRegistry] Error loading prompt.json: {e}, using fallback prompts")
+            self.last_error = str(e)
+            return PromptTemplates(FALLBACK_PROMPTS)
+
+    def current(self) -> PromptTemplates:
+        """The active templates, reloading first if the file changed since the last check."""
+        if time.monotonic() >= self._next_check:
+            self._check()
+        return self._templates
+
+    def _check(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                return
+            self._signature = signature
+            self._reload()
+
+    def reload(self) -> PromptTemplates:
+        """Re-read prompt.json now, regardless of its mtime."""
+        with self._lock:
+            self._signature = self._stat()
+            self._reload()
+        return self._templates
+
+    def _reload(self) -> None:
+        previous = self._templates
+        try:
+            templates = PromptTemplates(self._read(), source=self.path)
+        except Exception as e:
+            # Typically a file caught mid-write; finishing the write changes the mtime again
+            self.errors += 1
+            self.last_error = str(e)
+            PROMPT_RELOADS.inc(result="error")
+            print(f"[PromptRegistry] Reload failed, keeping version {previous.version}: {e}")
+            return
+        self.last_error = None
+        PROMPT_RELOADS.inc(result="ok")
+        if templates.version == previous.version:
+            return
+        self._templates = templates
+        self.reloads += 1
+        print(f"[PromptRegistry] Reloaded prompt.json: {previous.version} -> {templates.version}")
+        log_event({
+            "stage": "prompt_reload",
+            "previous_version": previous.version,
+            "version": templates.version,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        templates = self._templates
+        return {
+            "path": self.path,
+            "version": templates.version,
+            "fallback": templates.source is None,
+            "loaded_at": templates.loaded_at,
+            "check_interval_seconds": self.check_interval,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Process-wide registry of the ``prompt_registry`` section of configure.json::
+
+        "prompt_registry": {"path": "prompt.json", "check_interval_seconds": 1.0}
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            cfg = get_section("prompt_registry")
+            path = cfg.get("path") or "prompt.json"
+            if not os.path.isabs(path):
+                path = os.path.join(project_root(), path)
+            _registry = PromptRegistry(path, check_interval=cfg.get("check_interval_seconds", 1.0))
+        return _registry
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+from .admission import AdmissionRejected
+from .config import get_section, project_root
+from .metrics import registry
+
+RATE_LIMIT_WAIT = registry.histogram(
+    "hrm_rate_limit_wait_seconds",
+    "Time LLM calls waited for the host-wide provider token bucket.",
+    ("provider",),
+)
+RATE_LIMIT_REJECTED = registry.counter(
+    "hrm_rate_limit_rejected_total",
+    "LLM calls that could not get a host-wide provider token within their wait budget.",
+    ("provider",),
+)
+
+# (tokens, refilled_at wall-clock seconds)
+_STATE = struct.Struct("<dd")
+
+
+class FileTokenBucket:
+    """Token bucket shared by every thread and process on one host.
+
+    The bucket state is 16 bytes in a file under an exclusive ``flock``, so
+    API workers started as separate processes draw from one provider quota.
+    Refill uses wall-clock time since that is what all processes agree on.
+    A thread lock serialises threads of the same process, because ``flock``
+    is held per open file, not per thread. Without ``fcntl`` (non-POSIX) the
+    bucket is only shared within the process.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        path: str,
+        rate_per_minute: float,
+        burst: Optional[float] = None,
+        max_wait: float = 30.0,
+    ) -> None:
+        self.provider = provider
+        self.path = path
+        self.rate = float(rate_per_minute) / 60.0
+        self.capacity = float(burst or rate_per_minute)
+        self.max_wait = float(max_wait)
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            print(f"[FileTokenBucket] fcntl unavailable; {provider} rate limit is per process only")
+
+    def _take(self, cost: float) -> Tuple[float, float]:
+        """Take ``cost`` tokens if available; returns (seconds until they will be, tokens left)."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                data = os.pread(self._fd, _STATE.size, 0)
+                if len(data) == _STATE.size:
+                    tokens, refilled_at = _STATE.unpack(data)
+                    tokens = min(self.capacity, tokens + max(0.0, now - refilled_at) * self.rate)
+                else:
+                    tokens = self.capacity
+                wait = 0.0 if tokens >= cost else (cost - tokens) / self.rate
+                if wait == 0.0:
+                    tokens -= cost
+                os.pwrite(self._fd, _STATE.pack(tokens, now), 0)
+                return wait, tokens
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self, cost: float = 1, timeout: Optional[float] = None) -> float:
+        """Block until ``cost`` tokens are taken; returns the seconds waited.
+
+        Raises AdmissionRejected (reason ``rate_limited``) without waiting
+        when the tokens cannot be available within ``timeout``.
+        """
+        cost = min(float(cost), self.capacity)
+        started = time.monotonic()
+        deadline = None if timeout is None else started + max(0.0, float(timeout))
+        while True:
+            wait, _ = self._take(cost)
+            if wait == 0.0:
+                break
+            now = time.monotonic()
+            if deadline is not None and now + wait > deadline:
+                with self._lock:
+                    self.rejected += 1
+                RATE_LIMIT_REJECTED.inc(provider=self.provider)
+                raise AdmissionRejected(self.provider, "rate_limited", wait)
+            # Another process may take the refilled token first; re-check after sleeping
+            time.sleep(wait)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.acquired += 1
+            self.wait_seconds_total += waited
+        RATE_LIMIT_WAIT.observe(waited, provider=self.provider)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        _, tokens = self._take(0.0)
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.rate * 60, 3),
+                "burst": self.capacity,
+                "tokens": round(tokens, 3),
+                "shared": fcntl is not None,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+            }
+
+
+_buckets: Dict[str, Optional[FileTokenBucket]] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> Optional[FileTokenBucket]:
+    """Host-wide token bucket for ``provider`` from ``rate_limits`` in configure.json (None if not limited)::
+
+        "rate_limits": {
+          "dir": "cache/rate_limits",
+          "max_wait_seconds": 30,
+          "providers": {"gauss": {"rate_per_minute": 20, "burst": 5}}
+        }
+    """
+    key = str(provider or "").lower()
+    with _buckets_lock:
+        if key not in _buckets:
+            cfg = get_section("rate_limits")
+            limits = (cfg.get("providers") or {}).get(key) or {}
+            bucket = None
+            if cfg.get("enabled", True) and limits.get("rate_per_minute"):
+                directory = cfg.get("dir") or os.path.join("cache", "rate_limits")
+                if not os.path.isabs(directory):
+                    directory = os.path.join(project_root(), directory)
+                bucket = FileTokenBucket(
+                    key,
+                    os.path.join(directory, f"{key}.bucket"),
+                    limits["rate_per_minute"],
+                    burst=limits.get("burst"),
+                    max_wait=cfg.get("max_wait_seconds", 30),
+                )
+            _buckets[key] = bucket
+        return _buckets[key]
+
+
+def acquire_rate_limit(provider: str, timeout: Optional[float] = None) -> Optional[float]:
+    """Take one call's token for ``provider`` before calling out; returns what is left of ``timeout``.
+
+    The wait is bounded by ``rate_limits.max_wait_seconds`` and ``timeout``
+    (the caller's remaining request budget).
+    """
+    bucket = get_rate_limiter(provider)
+    if bucket is None:
+        return timeout
+    waited = bucket.acquire(timeout=bucket.max_wait if timeout is None else min(bucket.max_wait, timeout))
+    return None if timeout is None else max(0.001, timeout - waited)
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    with _buckets_lock:
+        buckets = {name: bucket for name, bucket in _buckets.items() if bucket is not None}
+    return {name: bucket.stats() for name, bucket in buckets.items()}
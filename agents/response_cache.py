@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Generator, Iterable, Optional, Tuple
+
+from .config import get_section, project_root
+
+
+class CacheBackend(ABC):
+    """Key/value store for cached agent outputs with TTL and size-based eviction."""
+
+    def __init__(self) -> None:
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:  # pragma: no cover - interface
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:  # pragma: no cover - interface
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:  # pragma: no cover - interface
+        ...
+
+    @abstractmethod
+    def usage(self) -> Tuple[int, int]:  # pragma: no cover - interface
+        """Return (entries, total bytes)."""
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU backend bounded by entry count and total value bytes."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> None:
+        super().__init__()
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def usage(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._entries), self._bytes
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk single-file backend; survives restarts and is shared by processes on one host.
+
+    Uses WAL journaling so readers in other processes are not blocked by writers.
+    Eviction is least-recently-accessed first once ``max_bytes`` is exceeded.
+
+    The entry count and total size live in a one-row ``usage`` table kept up
+    to date by triggers, so stores and stats never scan the entries. Access
+    times of hits are buffered in memory and written in one statement per
+    ``touch_batch`` hits or ``touch_interval`` seconds (and before eviction),
+    so a hit does not cost a write transaction; touches not yet flushed when
+    the process exits are lost, which only affects the eviction order.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        touch_batch: int = 64,
+        touch_interval: float = 5.0,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.max_bytes = max(1, int(max_bytes))
+        self.touch_batch = max(1, int(touch_batch))
+        self.touch_interval = max(0.0, float(touch_interval))
+        self._local = threading.local()
+        self._touched: Dict[str, float] = {}
+        self._touched_hits = 0
+        self._touched_since = 0.0
+        self._touch_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        # One transaction, so concurrent first opens seed the usage row exactly once
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " expires_at REAL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0),"
+            " entries INTEGER NOT NULL,"
+            " bytes INTEGER NOT NULL)"
+        )
+        # Files written before the usage table existed are summed once here
+        conn.execute("INSERT OR IGNORE INTO usage SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_usage_insert AFTER INSERT ON entries BEGIN"
+            " UPDATE usage SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0; END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_usage_delete AFTER DELETE ON entries BEGIN"
+            " UPDATE usage SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0; END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS entries_usage_update AFTER UPDATE OF size ON entries BEGIN"
+            " UPDATE usage SET bytes = bytes + new.size - old.size WHERE id = 0; END"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+            self.expirations += 1
+            return None
+        self._touch(key, now)
+        return value
+
+    def _touch(self, key: str, now: float) -> None:
+        with self._touch_lock:
+            if not self._touched:
+                self._touched_since = now
+            self._touched[key] = now
+            self._touched_hits += 1
+            due = self._touched_hits >= self.touch_batch or now - self._touched_since >= self.touch_interval
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self) -> None:
+        """Write the buffered access times of hits in one statement."""
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+            self._touched_hits = 0
+        if not touched:
+            return
+        conn = self._conn()
+        conn.executemany(
+            "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+            [(at, key) for key, at in touched.items()],
+        )
+        conn.commit()
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the usage triggers
+        conn.execute(
+            "INSERT INTO entries (key, value, size, created_at, expires_at, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+            " created_at = excluded.created_at, expires_at = excluded.expires_at, last_access = excluded.last_access",
+            (key, value, size, now, now + ttl if ttl else None, now),
+        )
+        conn.commit()
+        if self._total_bytes(conn) > self.max_bytes:
+            self._evict(conn)
+
+    @staticmethod
+    def _total_bytes(conn: sqlite3.Connection) -> int:
+        return int(conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0])
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Pending touches first, so recently hit entries are not taken for the oldest
+        self.flush_touches()
+        expired = conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        self.expirations += max(0, expired.rowcount)
+        total = self._total_bytes(conn)
+        while total > self.max_bytes:
+            row = conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC LIMIT 1").fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.evictions += 1
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.commit()
+
+    def file_bytes(self) -> int:
+        """Size on disk of the database file and its write-ahead log."""
+        return sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+
+    def compact(self) -> Dict[str, int]:
+        """Drop expired entries, evict down to ``max_bytes`` and VACUUM the file to return freed space.
+
+        VACUUM rewrites the whole file under an exclusive lock, so run this
+        offline or at a quiet time; other processes wait up to the busy timeout.
+        """
+        conn = self._conn()
+        before = self.file_bytes()
+        evictions, expirations = self.evictions, self.expirations
+        self._evict(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        entries, size = self.usage()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "expired": self.expirations - expirations,
+            "evicted": self.evictions - evictions,
+            "file_bytes_before": before,
+            "file_bytes_after": self.file_bytes(),
+        }
+
+    def usage(self) -> Tuple[int, int]:
+        row = self._conn().execute("SELECT entries, bytes FROM usage WHERE id = 0").fetchone()
+        return int(row[0]), int(row[1])
+
+
+class ResponseCache:
+    """Content-addressed cache of complete agent outputs.
+
+    Keys are a canonical hash of everything that determines the output (agent,
+    rendered prompt, provider, model, language, prompt.json version). A hit is
+    replayed as a stream of chunks so streaming callers behave the same.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = 24 * 3600,
+        enabled: bool = True,
+        replay_chunk_chars: int = 64,
+    ) -> None:
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.enabled = enabled
+        self.replay_chunk_chars = max(1, int(replay_chunk_chars))
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def replay(self, value: str) -> Generator[str, None, None]:
+        step = self.replay_chunk_chars
+        for start in range(0, len(value), step):
+            yield value[start:start + step]
+
+    def stream(self, key: str, producer: Callable[[], Iterable[str]]) -> Generator[str, None, None]:
+        """Replay a cached output, or pass through the producer and store its complete output."""
+        if not self.enabled:
+            yield from producer()
+            return
+
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            print(f"[ResponseCache] Lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            self._count("hits")
+            yield from self.replay(cached)
+            return
+
+        self._count("misses")
+        parts = []
+        for chunk in producer():
+            parts.append(chunk)
+            yield chunk
+
+        # Only reached when the producer completed without error and the consumer kept reading
+        output = "".join(parts)
+        if output:
+            try:
+                self.backend.set(key, output, self.ttl)
+                self._count("stores")
+            except Exception as e:
+                print(f"[ResponseCache] Store failed: {e}")
+
+    async def astream(self, key: str, producer: Callable[[], AsyncIterable[str]]) -> AsyncIterator[str]:
+        """Async ``stream``; backend lookups and stores run on the executor (SQLite does disk I/O)."""
+        if not self.enabled:
+            async for chunk in producer():
+                yield chunk
+            return
+
+        try:
+            cached = await asyncio.to_thread(self.backend.get, key)
+        except Exception as e:
+            print(f"[ResponseCache] Lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            self._count("hits")
+            for chunk in self.replay(cached):
+                yield chunk
+            return
+
+        self._count("misses")
+        parts = []
+        async for chunk in producer():
+            parts.append(chunk)
+            yield chunk
+
+        output = "".join(parts)
+        if output:
+            try:
+                await asyncio.to_thread(self.backend.set, key, output, self.ttl)
+                self._count("stores")
+            except Exception as e:
+                print(f"[ResponseCache] Store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self.backend.usage()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.backend.evictions,
+            "expirations": self.backend.expirations,
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def build_response_cache(cfg: Dict[str, Any]) -> ResponseCache:
+    """Build a ResponseCache from the ``response_cache`` section of configure.json."""
+    backend_name = str(cfg.get("backend", "memory")).lower()
+    if backend_name == "sqlite":
+        path = cfg.get("path") or os.path.join("cache", "response_cache.sqlite3")
+        if not os.path.isabs(path):
+            path = os.path.join(project_root(), path)
+        backend: CacheBackend = SQLiteCacheBackend(path, max_bytes=cfg.get("max_bytes", 256 * 1024 * 1024))
+    else:
+        backend = MemoryCacheBackend(
+            max_entries=cfg.get("max_entries", 1024),
+            max_bytes=cfg.get("max_bytes", 64 * 1024 * 1024),
+        )
+    return ResponseCache(
+        backend=backend,
+        ttl=cfg.get("ttl_seconds", 24 * 3600),
+        enabled=bool(cfg.get("enabled", True)),
+        replay_chunk_chars=cfg.get("replay_chunk_chars", 64),
+    )
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by all agents."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = build_response_cache(get_section("response_cache"))
+        return _response_cache
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import requests
 from typing import Dict, Generator, Iterable, List, Optional
+from .cancellation import CancellationToken, time_budget
 from .mcp import ToolMetadata
+from .metrics import ERRORS
 
 
 class GuideRetriever:
@@ -15,8 +17,20 @@ class GuideRetriever:
     def __init__(self, api_base_url: str = "http://localhost:5001"):
         self.api_base_url = api_base_url
 
-    def retrieve(self, query: str, top_k: int = 3, category_filter: Optional[str] = None) -> List[str]:
-        """Retrieve guides from external API."""
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 3,
+        category_filter: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[str]:
+        """Retrieve guides from external API.
+
+        The API timeout is capped by the time left on ``cancel_token``; raises
+        GenerationCancelled instead of calling the API if the token was
+        cancelled or its deadline passed while the request was waiting.
+        """
+        timeout = time_budget(cancel_token, 30)
         try:
             payload = {
                 "query": query,
@@ -26,7 +40,7 @@ class GuideRetriever:
             if category_filter:
                 payload["category_filter"] = category_filter
 
-            response = requests.post(f"{self.api_base_url}/search", json=payload, timeout=30)
+            response = requests.post(f"{self.api_base_url}/search", json=payload, timeout=timeout)
             
             if response.ok:
                 data = response.json()
@@ -49,15 +63,23 @@ class GuideRetriever:
                 return formatted_results
             else:
                 print(f"[GuideRetriever] API 요청 실패: {response.status_code}")
+                ERRORS.inc(agent="guide_retriever", stage="retrieve")
                 return []
                 
         except Exception as e:
             print(f"[GuideRetriever] API 호출 중 오류: {e}")
+            ERRORS.inc(agent="guide_retriever", stage="retrieve")
             return []
 
-    def stream(self, query: str, top_k: int = 3, category_filter: Optional[str] = None) -> Generator[str, None, None]:
+    def stream(
+        self,
+        query: str,
+        top_k: int = 3,
+        category_filter: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
         """Stream guides from external API."""
-        results = self.retrieve(query, top_k=top_k, category_filter=category_filter)
+        results = self.retrieve(query, top_k=top_k, category_filter=category_filter, cancel_token=cancel_token)
         for result in results:
             yield result + "\n\n"
 
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Generator, Iterable, Optional, Protocol, Callable
+from typing import Any, AsyncIterator, Dict, Generator, Iterable, Optional, Protocol, Callable, Tuple
+import asyncio
 import json
 import os
+import queue
+import re
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
 from contextlib import nullcontext
 
+from .admission import AdmissionRejected, get_admission_controller
+from .cancellation import CancellationToken, GenerationCancelled, raise_if_cancelled
+from .metrics import ERRORS, GUARDRAIL_TIME, RETRIEVER_LATENCY
 from .diagnosis_summarizer import DiagnosisSummarizer
 from .op_history_summarizer import OperationHistorySummarizer
 from .guide_provider import GuideProvider
+from .llm_providers import _canonical_provider
 from .retriever import GuideRetriever
 from .mcp import MCPRegistry, ToolMetadata, AgentMetadata
 
@@ -17,6 +26,23 @@ class Tool(Protocol):
         ...
 
 
+# Marker used by guardrails when appending the readability report to an output
+READABILITY_REPORT_MARKER = "📊 **가독성 분석 결과**"
+
+_SELF_REPAIR_CONCLUSION = re.compile(r"자가\s*조치\s*가능|자가\s*해결\s*가능")
+
+
+def strip_readability_report(text: str) -> str:
+    """Return the LLM output without the appended readability report."""
+    return text.split(READABILITY_REPORT_MARKER)[0].strip()
+
+
+def is_self_repairable(diagnosis_summary: str) -> bool:
+    """Whether the diagnosis conclusion (``결론: ...``) says the customer can fix it."""
+    match = re.search(r"결론\s*[:：]\s*([^\n]+)", diagnosis_summary)
+    return bool(match and _SELF_REPAIR_CONCLUSION.search(match.group(1)))
+
+
 class RootAgent:
     """Root agent orchestrating sub-agents and tools via a minimal MCP-like registry.
 
@@ -82,6 +108,11 @@ class RootAgent:
             metadata=guide_retriever.get_mcp_metadata()
         )
 
+    @property
+    def admission_key(self) -> str:
+        """Canonical provider name used for admission, so provider aliases share one limiter."""
+        return _canonical_provider(self.provider)
+
     # MCP-like registry
     def register_agent(self, name: str, agent: Any, metadata: Optional[AgentMetadata] = None) -> None:
         self.agents[name] = agent
@@ -110,7 +141,49 @@ class RootAgent:
         except Exception:
             return nullcontext()
 
-    def run_diagnosis(self, analytics: Dict[str, Any], language: Optional[str] = None) -> Generator[str, None, None]:
+    def _post_guard_addition(
+        self, guardrail: Any, raw_output: str, labels: Dict[str, str], stage: str, name: str
+    ) -> str:
+        """Run the post-guardrail on a full output and return what it appended (the readability report)."""
+        from .logger import log_event
+
+        try:
+            with GUARDRAIL_TIME.time(**labels):
+                processed_output = guardrail.post_guard(raw_output)
+            if len(processed_output) > len(raw_output):
+                log_event({"stage": stage, "status": "readability_added"})
+                return processed_output[len(raw_output):]
+        except Exception as e:
+            ERRORS.inc(stage="post_guard", **labels)
+            print(f"[RootAgent] {name} post-guardrail processing failed: {e}")
+            log_event({"stage": stage, "status": "failed", "error": str(e)})
+        return ""
+
+    def _validate_op_history(
+        self, guardrail: Any, operation_history: Dict[str, Any], lang: str
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Pre-guard operation history; returns (validated data, "") or (None, message to show instead)."""
+        from .guardrails import GuardrailException
+        from .logger import log_event
+
+        try:
+            validated_data = guardrail.pre_guard(operation_history)
+            log_event({"stage": "op_history_guardrail", "status": "passed"})
+            return validated_data, ""
+        except GuardrailException as e:
+            error_msg = str(e)
+            print(f"[RootAgent] Operation history guardrail failed: {error_msg}")
+            log_event({"stage": "op_history_guardrail", "status": "failed", "error": error_msg})
+            if lang == "en":
+                return None, "Insufficient data available. Unable to provide operation history analysis due to lack of adequate operation history data."
+            return None, error_msg
+
+    def run_diagnosis(
+        self,
+        analytics: Dict[str, Any],
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
         from .guardrails import DiagnosisGuardrail
         from .logger import log_event
         
@@ -125,26 +198,24 @@ class RootAgent:
         # Collect all chunks from the LLM
         raw_output = ""
         with self._trace_ctx("diagnosis_summarizer"):
-            for chunk in agent.summarize(analytics, language=lang, stream=True):
+            for chunk in agent.summarize(analytics, language=lang, stream=True, cancel_token=cancel_token):
                 raw_output += chunk
                 yield chunk
+        raise_if_cancelled(cancel_token)
         
         # Apply post-guardrail processing with readability analysis
-        try:
-            processed_output = guardrail.post_guard(raw_output)
-            
-            # If post_guard added content (readability report), yield the additional content
-            if len(processed_output) > len(raw_output):
-                additional_content = processed_output[len(raw_output):]
-                yield additional_content
-                log_event({"stage": "diagnosis_post_guard", "status": "readability_added"})
-                
-        except Exception as e:
-            print(f"[RootAgent] Diagnosis post-guardrail processing failed: {e}")
-            log_event({"stage": "diagnosis_post_guard", "status": "failed", "error": str(e)})
-
-    def run_op_history(self, operation_history: Dict[str, Any], language: Optional[str] = None) -> Generator[str, None, None]:
-        from .guardrails import OperationHistoryGuardrail, GuardrailException
+        labels = {"agent": "diagnosis_summarizer", "provider": agent.provider, "language": lang}
+        additional_content = self._post_guard_addition(guardrail, raw_output, labels, "diagnosis_post_guard", "Diagnosis")
+        if additional_content:
+            yield additional_content
+
+    def run_op_history(
+        self,
+        operation_history: Dict[str, Any],
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
+        from .guardrails import OperationHistoryGuardrail
         from .logger import log_event
         
         lang = language or self.default_language
@@ -153,19 +224,10 @@ class RootAgent:
         
         # Apply pre-guardrail validation
         guardrail = OperationHistoryGuardrail()
-        try:
-            validated_data = guardrail.pre_guard(operation_history)
-            log_event({"stage": "op_history_guardrail", "status": "passed"})
-        except GuardrailException as e:
-            error_msg = str(e)
-            print(f"[RootAgent] Operation history guardrail failed: {error_msg}")
-            log_event({"stage": "op_history_guardrail", "status": "failed", "error": error_msg})
-            
+        validated_data, error_msg = self._validate_op_history(guardrail, operation_history, lang)
+        if validated_data is None:
             # Return error message instead of calling LLM
-            if lang == "en":
-                yield "Insufficient data available. Unable to provide operation history analysis due to lack of adequate operation history data."
-            else:
-                yield error_msg
+            yield error_msg
             return
         
         # If validation passes, proceed with LLM processing
@@ -174,25 +236,26 @@ class RootAgent:
         # Collect all chunks from the LLM
         raw_output = ""
         with self._trace_ctx("op_history_summarizer"):
-            for chunk in agent.summarize(validated_data, language=lang, stream=True):
+            for chunk in agent.summarize(validated_data, language=lang, stream=True, cancel_token=cancel_token):
                 raw_output += chunk
                 yield chunk
+        raise_if_cancelled(cancel_token)
         
         # Apply post-guardrail processing with readability analysis
-        try:
-            processed_output = guardrail.post_guard(raw_output)
-            
-            # If post_guard added content (readability report), yield the additional content
-            if len(processed_output) > len(raw_output):
-                additional_content = processed_output[len(raw_output):]
-                yield additional_content
-                log_event({"stage": "op_history_post_guard", "status": "readability_added"})
-                
-        except Exception as e:
-            print(f"[RootAgent] Post-guardrail processing failed: {e}")
-            log_event({"stage": "op_history_post_guard", "status": "failed", "error": str(e)})
-
-    def run_actions_guide(self, diagnosis_summary: str, category: str, language: Optional[str] = None) -> Generator[str, None, None]:
+        labels = {"agent": "op_history_summarizer", "provider": agent.provider, "language": lang}
+        additional_content = self._post_guard_addition(
+            guardrail, raw_output, labels, "op_history_post_guard", "Operation history"
+        )
+        if additional_content:
+            yield additional_content
+
+    def run_actions_guide(
+        self,
+        diagnosis_summary: str,
+        category: str,
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
         """Generate customer action guide in Korean using diagnosis summary and top-3 retrieved docs.
 
         - Only operates when language == 'ko'
@@ -209,36 +272,356 @@ class RootAgent:
         print(f"[RootAgent] run_actions_guide language={lang}")
         log_event({"stage": "run_actions_guide", "language": lang})
 
+        agent: GuideProvider = self.agents["guide_provider"]
+        labels = {"agent": "actions_guide_provider", "provider": agent.provider, "language": lang}
+
         # Retrieve 3 reference documents using the tool
         retrieved_docs_text = ""
-        for doc_chunk in self.call_tool("guider_retriever", query=diagnosis_summary, category_filter=category):
-            retrieved_docs_text += doc_chunk
+        with RETRIEVER_LATENCY.time(**labels):
+            for doc_chunk in self.call_tool(
+                "guider_retriever", query=diagnosis_summary, category_filter=category, cancel_token=cancel_token
+            ):
+                retrieved_docs_text += doc_chunk
+        raise_if_cancelled(cancel_token)
 
         # Initialize guardrail with readability analysis
         guardrail = GuideGuardrail(include_readability_report=True)
 
-        # Get GuideProvider agent and collect all chunks
-        agent: GuideProvider = self.agents["guide_provider"]
+        # Collect all chunks from the GuideProvider agent
         raw_output = ""
         
         with self._trace_ctx("actions_guide_provider"):
-            for chunk in agent.provide_actions_guide(diagnosis_summary, retrieved_docs_text, language=lang, stream=True):
+            for chunk in agent.provide_actions_guide(
+                diagnosis_summary, retrieved_docs_text, language=lang, stream=True, cancel_token=cancel_token
+            ):
                 raw_output += chunk
                 yield chunk
+        raise_if_cancelled(cancel_token)
 
         # Apply post-guardrail processing with readability analysis
+        additional_content = self._post_guard_addition(
+            guardrail, raw_output, labels, "actions_guide_post_guard", "Actions guide"
+        )
+        if additional_content:
+            yield additional_content
+
+    # Async runners: same stages as the sync ones, but LLM calls use the clients' native
+    # async paths so one event loop can drive many concurrent generations. Blocking
+    # work (retriever HTTP call, readability analysis) runs on the default executor.
+    async def arun_diagnosis(
+        self,
+        analytics: Dict[str, Any],
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        from .guardrails import DiagnosisGuardrail
+        from .logger import log_event
+
+        agent: DiagnosisSummarizer = self.agents["diagnosis_summarizer"]
+        lang = language or self.default_language
+        print(f"[RootAgent] arun_diagnosis language={lang}")
+        log_event({"stage": "run_diagnosis", "language": lang})
+        guardrail = DiagnosisGuardrail(include_readability_report=True)
+
+        raw_output = ""
+        async for chunk in agent.asummarize(analytics, language=lang, cancel_token=cancel_token):
+            raw_output += chunk
+            yield chunk
+        raise_if_cancelled(cancel_token)
+
+        labels = {"agent": "diagnosis_summarizer", "provider": agent.provider, "language": lang}
+        additional_content = await asyncio.to_thread(
+            self._post_guard_addition, guardrail, raw_output, labels, "diagnosis_post_guard", "Diagnosis"
+        )
+        if additional_content:
+            yield additional_content
+
+    async def arun_op_history(
+        self,
+        operation_history: Dict[str, Any],
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        from .guardrails import OperationHistoryGuardrail
+        from .logger import log_event
+
+        lang = language or self.default_language
+        print(f"[RootAgent] arun_op_history language={lang}")
+        log_event({"stage": "run_op_history", "language": lang})
+
+        guardrail = OperationHistoryGuardrail()
+        validated_data, error_msg = self._validate_op_history(guardrail, operation_history, lang)
+        if validated_data is None:
+            yield error_msg
+            return
+
+        agent: OperationHistorySummarizer = self.agents["op_history_summarizer"]
+        raw_output = ""
+        async for chunk in agent.asummarize(validated_data, language=lang, cancel_token=cancel_token):
+            raw_output += chunk
+            yield chunk
+        raise_if_cancelled(cancel_token)
+
+        labels = {"agent": "op_history_summarizer", "provider": agent.provider, "language": lang}
+        additional_content = await asyncio.to_thread(
+            self._post_guard_addition, guardrail, raw_output, labels, "op_history_post_guard", "Operation history"
+        )
+        if additional_content:
+            yield additional_content
+
+    async def arun_actions_guide(
+        self,
+        diagnosis_summary: str,
+        category: str,
+        language: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[str]:
+        """Async ``run_actions_guide`` (KO only)."""
+        from .guardrails import GuideGuardrail
+        from .logger import log_event
+
+        lang = (language or self.default_language).lower()
+        if lang != "ko":
+            return
+
+        print(f"[RootAgent] arun_actions_guide language={lang}")
+        log_event({"stage": "run_actions_guide", "language": lang})
+
+        agent: GuideProvider = self.agents["guide_provider"]
+        labels = {"agent": "actions_guide_provider", "provider": agent.provider, "language": lang}
+
+        def retrieve() -> str:
+            with RETRIEVER_LATENCY.time(**labels):
+                return "".join(self.call_tool(
+                    "guider_retriever", query=diagnosis_summary, category_filter=category, cancel_token=cancel_token
+                ))
+
+        retrieved_docs_text = await asyncio.to_thread(retrieve)
+        raise_if_cancelled(cancel_token)
+
+        guardrail = GuideGuardrail(include_readability_report=True)
+        raw_output = ""
+        async for chunk in agent.aprovide_actions_guide(
+            diagnosis_summary, retrieved_docs_text, language=lang, cancel_token=cancel_token
+        ):
+            raw_output += chunk
+            yield chunk
+        raise_if_cancelled(cancel_token)
+
+        additional_content = await asyncio.to_thread(
+            self._post_guard_addition, guardrail, raw_output, labels, "actions_guide_post_guard", "Actions guide"
+        )
+        if additional_content:
+            yield additional_content
+
+    def run_pipeline(
+        self,
+        analytics: Dict[str, Any],
+        operation_history: Dict[str, Any],
+        category: Optional[str] = None,
+        language: Optional[str] = None,
+        require_self_repair: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Run diagnosis, operation history and actions guide as one multiplexed stream.
+
+        Diagnosis and operation history start concurrently; the actions guide starts
+        as soon as the diagnosis summary is complete (KO only, and by default only
+        when the conclusion is self-repairable, mirroring the web UI). Yields
+        ``{"stage", "chunk"}`` events, ``{"stage", "stage_done": True}`` when a stage
+        finishes, and ``{"stage", "error"}`` / ``{"stage", "skipped"}`` as needed.
+        Cancelling ``cancel_token`` stops every running stage and raises
+        GenerationCancelled from this generator.
+        """
+        from .logger import log_event
+
+        lang = language or self.default_language
+        guide_category = category or analytics.get("deviceType", "")
+        log_event({"stage": "run_pipeline", "language": lang})
+
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        stop = threading.Event()
+
+        def pump(stage: str, factory: Callable[[], Iterable[str]], on_done: Optional[Callable[[str], None]] = None) -> None:
+            text = ""
+            gen = None
+            try:
+                gen = factory()
+                for chunk in gen:
+                    if stop.is_set():
+                        break
+                    text += chunk
+                    events.put({"stage": stage, "chunk": chunk})
+                else:
+                    events.put({"stage": stage, "stage_done": True})
+                    if on_done is not None:
+                        on_done(text)
+            except GenerationCancelled:
+                pass
+            except Exception as e:
+                print(f"[RootAgent] Pipeline stage {stage} failed: {e}")
+                log_event({"stage": "pipeline_stage_failed", "pipeline_stage": stage, "error": str(e)})
+                events.put({"stage": stage, "error": str(e), "stage_done": True})
+            finally:
+                close = getattr(gen, "close", None)
+                if close is not None:
+                    close()
+                events.put({"stage": stage, "finished": True})
+
+        def start(stage: str, factory: Callable[[], Iterable[str]], on_done: Optional[Callable[[str], None]] = None) -> None:
+            threading.Thread(target=pump, args=(stage, factory, on_done), name=f"pipeline-{stage}", daemon=True).start()
+
+        def start_actions_guide(diagnosis_output: str) -> None:
+            summary = strip_readability_report(diagnosis_output)
+            if lang.lower() != "ko":
+                events.put({"stage": "actions_guide", "skipped": True, "reason": "language"})
+            elif require_self_repair and not is_self_repairable(summary):
+                events.put({"stage": "actions_guide", "skipped": True, "reason": "conclusion"})
+            else:
+                # Admission charged the pipeline for diagnosis and operation history only;
+                # the guide's LLM call is charged now that it is known to run
+                try:
+                    get_admission_controller().charge(
+                        self.admission_key, timeout=cancel_token.remaining() if cancel_token is not None else None
+                    )
+                except AdmissionRejected as e:
+                    events.put({"stage": "actions_guide", "error": str(e), "retry_after": e.retry_after, "stage_done": True})
+                    return
+                events.put({"stage": "actions_guide", "started": True})
+                start(
+                    "actions_guide",
+                    lambda: self.run_actions_guide(summary, category=guide_category, language=lang, cancel_token=cancel_token),
+                )
+
+        if cancel_token is not None:
+            # Wake the consumer loop below right away instead of at the next stage event
+            cancel_token.on_cancel(lambda: events.put({"cancelled": True}))
+
+        pending = 2
         try:
-            processed_output = guardrail.post_guard(raw_output)
-            
-            # If post_guard added content (readability report), yield the additional content
-            if len(processed_output) > len(raw_output):
-                additional_content = processed_output[len(raw_output):]
-                yield additional_content
-                log_event({"stage": "actions_guide_post_guard", "status": "readability_added"})
-                
-        except Exception as e:
-            print(f"[RootAgent] Actions guide post-guardrail processing failed: {e}")
-            log_event({"stage": "actions_guide_post_guard", "status": "failed", "error": str(e)})
+            start(
+                "diagnosis",
+                lambda: self.run_diagnosis(analytics, language=lang, cancel_token=cancel_token),
+                start_actions_guide,
+            )
+            start("op_history", lambda: self.run_op_history(operation_history, language=lang, cancel_token=cancel_token))
+
+            # "started" for the actions guide is queued by the diagnosis thread before
+            # its own "finished" event, so pending can never drop to zero early.
+            while pending > 0:
+                try:
+                    # Wake up at the request deadline even if no stage produces anything
+                    event = events.get(timeout=cancel_token.remaining() if cancel_token is not None else None)
+                except queue.Empty:
+                    raise_if_cancelled(cancel_token)
+                    continue
+                raise_if_cancelled(cancel_token)
+                if event.get("started"):
+                    pending += 1
+                    continue
+                if event.get("finished"):
+                    pending -= 1
+                    continue
+                yield event
+        finally:
+            stop.set()
+
+    # Batch runners
+    def run_diagnosis_batch(
+        self,
+        items: Iterable[Dict[str, Any]],
+        max_concurrency: int = 4,
+        executor: Optional[Executor] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Run run_diagnosis over many ``{id, analytics, language}`` items concurrently.
+
+        Yields one result dict per item in completion order; a failing item
+        yields ``{"id", "success": False, "error"}`` without affecting others.
+        ``cancel_token`` (the request deadline) is shared by every item and
+        cancelled when the consumer stops reading, stopping in-flight LLM calls.
+        """
+        def run_item(item: Dict[str, Any]) -> str:
+            analytics = item.get("analytics")
+            if not analytics:
+                raise ValueError("analytics 데이터가 필요합니다.")
+            return "".join(self.run_diagnosis(analytics, language=item.get("language"), cancel_token=cancel_token))
+
+        return self._run_batch(run_item, items, "diagnosis", max_concurrency, executor, cancel_token)
+
+    def run_op_history_batch(
+        self,
+        items: Iterable[Dict[str, Any]],
+        max_concurrency: int = 4,
+        executor: Optional[Executor] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Run run_op_history over many ``{id, operation_history, language}`` items concurrently."""
+        def run_item(item: Dict[str, Any]) -> str:
+            operation_history = item.get("operation_history")
+            if not operation_history:
+                raise ValueError("operation_history 데이터가 필요합니다.")
+            return "".join(
+                self.run_op_history(operation_history, language=item.get("language"), cancel_token=cancel_token)
+            )
+
+        return self._run_batch(run_item, items, "operation_history_summary", max_concurrency, executor, cancel_token)
+
+    def _run_batch(
+        self,
+        run_item: Callable[[Dict[str, Any]], str],
+        items: Iterable[Dict[str, Any]],
+        result_key: str,
+        max_concurrency: int,
+        executor: Optional[Executor],
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        from .logger import log_event
+
+        items = list(items)
+        own_executor = executor is None
+        pool = executor or ThreadPoolExecutor(
+            max_workers=max(1, min(int(max_concurrency), len(items) or 1)),
+            thread_name_prefix="root-agent-batch",
+        )
+        log_event({"stage": "run_batch", "kind": result_key, "items": len(items), "provider": self.provider})
+
+        admission = get_admission_controller()
+
+        def admitted_run_item(item: Dict[str, Any]) -> str:
+            # Each item waits for a provider slot/rate token before any LLM call,
+            # but no longer than the batch deadline allows
+            raise_if_cancelled(cancel_token)
+            with admission.admit(self.admission_key, timeout=cancel_token.remaining() if cancel_token is not None else None):
+                return run_item(item)
+
+        futures: Dict[Future, Dict[str, Any]] = {}
+        try:
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    item = {"id": index}
+                futures[pool.submit(admitted_run_item, item)] = item
+
+            for future in as_completed(futures):
+                item = futures[future]
+                item_id = item.get("id")
+                language = item.get("language") or self.default_language
+                try:
+                    yield {"id": item_id, "success": True, result_key: future.result(), "language": language}
+                except AdmissionRejected as e:
+                    print(f"[RootAgent] Batch item {item_id} rejected: {e}")
+                    yield {"id": item_id, "success": False, "error": str(e), "retry_after": e.retry_after, "language": language}
+                except Exception as e:
+                    print(f"[RootAgent] Batch item {item_id} failed: {e}")
+                    yield {"id": item_id, "success": False, "error": str(e), "language": language}
+        finally:
+            # Drop items that have not started yet and stop the in-flight ones if the consumer went away
+            for future in futures:
+                future.cancel()
+            if cancel_token is not None:
+                cancel_token.cancel("client_disconnected")
+            if own_executor:
+                pool.shutdown(wait=False)
 
     def call_tool(self, tool_name: str, *args: Any, **kwargs: Any) -> Generator[str, None, None]:
         tool = self.tools.get(tool_name)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Generator, Iterable, Iterator, List, Optional
+
+from .cancellation import CancellationToken
+from .config import get_section
+
+
+class _Flight:
+    """One in-progress generation shared by every subscriber with the same key.
+
+    There is no background thread: whichever subscriber runs out of buffered
+    chunks pulls the next one from the producer while the others wait, so the
+    flight keeps going as long as at least one subscriber is still reading.
+
+    The producer gets the flight's own CancellationToken, cancelled once
+    every subscriber's request has been cancelled, so one caller giving up
+    never aborts a generation that others are still reading.
+    """
+
+    def __init__(self, producer: Callable[[CancellationToken], Iterable[str]]) -> None:
+        self._producer = producer
+        self._iterator: Optional[Iterator[str]] = None
+        self.token = CancellationToken()
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Subscriptions whose request has not been cancelled
+        self.live: set = set()
+        self._pumping = False
+        self._cond = threading.Condition()
+
+    def _pump(self) -> None:
+        # Called without holding the condition; only one thread pumps at a time
+        try:
+            if self._iterator is None:
+                self._iterator = iter(self._producer(self.token))
+            chunk = next(self._iterator)
+        except StopIteration:
+            with self._cond:
+                self.done = True
+        except BaseException as e:
+            with self._cond:
+                self.error = e
+                self.done = True
+        else:
+            with self._cond:
+                self.chunks.append(chunk)
+        finally:
+            with self._cond:
+                self._pumping = False
+                self._cond.notify_all()
+
+    def subscribe(self) -> Generator[str, None, None]:
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done and self._pumping:
+                    self._cond.wait()
+                if index < len(self.chunks):
+                    chunk = self.chunks[index]
+                    index += 1
+                elif self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    self._pumping = True
+                    chunk = None
+            if chunk is None:
+                self._pump()
+                continue
+            yield chunk
+
+    def abandon(self) -> None:
+        """Close the upstream generation once nobody is reading it any more."""
+        iterator = self._iterator
+        self._iterator = None
+        close = getattr(iterator, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"[SingleFlight] Failed to close abandoned producer: {e}")
+
+
+class _AsyncFlight:
+    """Async counterpart of ``_Flight``, for generations driven from an event loop.
+
+    A task on the loop pumps the producer into the shared chunk list and
+    wakes subscribers; ``abandon`` cancels the task, which closes the
+    producer at its current await.
+    """
+
+    def __init__(self, producer: Callable[[], AsyncIterable[str]]) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run(producer))
+
+    async def _run(self, producer: Callable[[], AsyncIterable[str]]) -> None:
+        try:
+            async for chunk in producer():
+                self.chunks.append(chunk)
+                self._wake()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._wake()
+
+    def _wake(self) -> None:
+        event, self._changed = self._changed, asyncio.Event()
+        event.set()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                chunk = self.chunks[index]
+                index += 1
+                yield chunk
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+    def abandon(self) -> None:
+        self._task.cancel()
+
+
+class SingleFlight:
+    """Coalesce identical concurrent generations into one upstream call.
+
+    The first caller for a key becomes the leader and starts the producer;
+    callers arriving while it is in flight subscribe to the same chunk stream,
+    starting with the chunks already produced. Completed flights are dropped
+    immediately, so reuse across time is left to the response cache.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, _AsyncFlight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.abandoned = 0
+
+    def stream(
+        self,
+        key: str,
+        producer: Callable[[Optional[CancellationToken]], Iterable[str]],
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Generator[str, None, None]:
+        """Subscribe to the flight for ``key``, starting ``producer(flight token)`` if there is none.
+
+        ``cancel_token`` is the caller's request token; the flight's token is
+        cancelled once the tokens of all its current subscribers are.
+        """
+        if not self.enabled:
+            yield from producer(cancel_token)
+            return
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None or flight.done:
+                flight = _Flight(producer)
+                self._flights[key] = flight
+                self.leaders += 1
+            else:
+                self.followers += 1
+            flight.subscribers += 1
+            subscription = object()
+            flight.live.add(subscription)
+
+        if cancel_token is not None:
+            cancel_token.on_cancel(lambda: self._cancelled(flight, subscription, cancel_token))
+        try:
+            yield from flight.subscribe()
+        finally:
+            with self._lock:
+                flight.live.discard(subscription)
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0 and not flight.done
+                if flight.subscribers == 0 or flight.done:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+                if abandoned:
+                    self.abandoned += 1
+            if abandoned:
+                flight.abandon()
+
+    def _cancelled(self, flight: _Flight, subscription: object, cancel_token: CancellationToken) -> None:
+        with self._lock:
+            if subscription not in flight.live:
+                return
+            flight.live.discard(subscription)
+            last = not flight.live and not flight.done
+        if last:
+            # Nobody left to read it: abort the upstream call even if it is blocked waiting for a token
+            flight.token.cancel(cancel_token.reason or "cancelled")
+
+    async def astream(self, key: str, producer: Callable[[], AsyncIterable[str]]) -> AsyncIterator[str]:
+        """Async ``stream``. Async and threaded callers are coalesced separately.
+
+        Must be used from a single event loop, which owns the pumping tasks.
+        """
+        if not self.enabled:
+            async for chunk in producer():
+                yield chunk
+            return
+
+        with self._lock:
+            flight = self._async_flights.get(key)
+            if flight is None or flight.done:
+                flight = _AsyncFlight(producer)
+                self._async_flights[key] = flight
+                self.leaders += 1
+            else:
+                self.followers += 1
+            flight.subscribers += 1
+
+        try:
+            async for chunk in flight.subscribe():
+                yield chunk
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0 and not flight.done
+                if flight.subscribers == 0 or flight.done:
+                    if self._async_flights.get(key) is flight:
+                        del self._async_flights[key]
+                if abandoned:
+                    self.abandoned += 1
+            if abandoned:
+                flight.abandon()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            flights = list(self._flights.values()) + list(self._async_flights.values())
+            in_flight = len(flights)
+            subscribers = sum(f.subscribers for f in flights)
+        return {
+            "enabled": self.enabled,
+            "in_flight": in_flight,
+            "subscribers": subscribers,
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "abandoned": self.abandoned,
+        }
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide single-flight registry shared by all agents."""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            cfg = get_section("single_flight")
+            _single_flight = SingleFlight(enabled=bool(cfg.get("enabled", True)))
+        return _single_flight
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Generator, List, Optional, Tuple
+
+
+class BufferOverrun(RuntimeError):
+    """A reader asked for events the bounded buffer has already dropped."""
+
+    def __init__(self, index: int, base: int) -> None:
+        super().__init__(f"events {index}..{base - 1} were dropped before they could be read")
+        self.index = index
+        self.base = base
+
+
+class StreamBuffer:
+    """Append-only event buffer that any number of readers can follow.
+
+    A producer appends events and finally calls ``close`` (optionally with an
+    error). Readers iterate from any index: events already buffered are
+    replayed immediately, then readers block until new events arrive or the
+    buffer is closed, in which case the producer's error is re-raised.
+
+    With ``max_events`` set, the oldest events are dropped once the buffer is
+    full; indexes stay absolute and ``base`` is the oldest index still held.
+    A reader that falls behind ``base`` gets BufferOverrun instead of a
+    silently truncated stream.
+    """
+
+    def __init__(self, max_events: Optional[int] = None) -> None:
+        self.events: List[Any] = []
+        self.max_events = max_events
+        self.base = 0
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def append(self, event: Any) -> int:
+        """Append an event and return its absolute index."""
+        with self._cond:
+            self.events.append(event)
+            if self.max_events is not None and len(self.events) > self.max_events:
+                dropped = len(self.events) - self.max_events
+                del self.events[:dropped]
+                self.base += dropped
+            self._cond.notify_all()
+            return self.base + len(self.events) - 1
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.closed = True
+            self.error = error
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self.base + len(self.events)
+
+    def iter_from(self, index: int = 0, poll_timeout: Optional[float] = None) -> Generator[Any, None, None]:
+        """Yield events from absolute ``index`` on until the buffer is closed.
+
+        Raises BufferOverrun when ``index`` (or a reader that fell behind) is
+        older than ``base``. With ``poll_timeout`` set, ``None`` is yielded
+        whenever no event arrived within that many seconds, so callers can
+        emit keepalives or give up.
+        """
+        for _, event in self.iter_indexed_from(index, poll_timeout):
+            yield event
+
+    def iter_indexed_from(
+        self, index: int = 0, poll_timeout: Optional[float] = None
+    ) -> Generator[Tuple[Optional[int], Any], None, None]:
+        """Like ``iter_from`` but yields ``(absolute index, event)`` pairs; keepalives are ``(None, None)``."""
+        while True:
+            with self._cond:
+                while index >= self.base + len(self.events) and not self.closed:
+                    if not self._cond.wait(poll_timeout) and poll_timeout is not None:
+                        break
+                if index < self.base:
+                    raise BufferOverrun(index, self.base)
+                end = self.base + len(self.events)
+                if index < end:
+                    batch = list(enumerate(self.events[index - self.base:], start=index))
+                    index = end
+                elif self.closed:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                else:
+                    batch = [(None, None)]
+            yield from batch
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Generator, Iterable, List, Optional, Union
+
+Chunk = Union[str, Dict[str, Any]]
+
+_CHUNK, _END, _ERROR = range(3)
+
+
+def _mergeable_stage(chunk: Chunk) -> Optional[str]:
+    """Return the stage of a plain pipeline text event, or None if it must pass through as-is."""
+    if isinstance(chunk, dict) and set(chunk) == {"stage", "chunk"} and isinstance(chunk["chunk"], str):
+        return chunk["stage"]
+    return None
+
+
+class _Merger:
+    """Buffering rules of ``coalesce_chunks``, independent of how chunks are received."""
+
+    def __init__(self, max_bytes: int, max_latency: float) -> None:
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.parts: List[str] = []
+        self.size = 0
+        self.stage: Optional[str] = None
+        self.is_text = False
+        self.deadline = 0.0
+        self.started_stages = set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the buffered text is due, or None when nothing is buffered."""
+        if not self.parts:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def flush(self) -> List[Chunk]:
+        if not self.parts:
+            return []
+        text = "".join(self.parts)
+        self.parts, self.size = [], 0
+        return [{"stage": self.stage, "chunk": text} if self.stage is not None else text]
+
+    def push(self, chunk: Chunk) -> List[Chunk]:
+        """Add a chunk and return the events to send now."""
+        if isinstance(chunk, str):
+            chunk_stage: Optional[str] = None
+            text = chunk
+        else:
+            chunk_stage = _mergeable_stage(chunk)
+            text = chunk["chunk"] if chunk_stage is not None else None
+
+        if text is None:
+            # Control event: emit buffered text first to keep ordering
+            return self.flush() + [chunk]
+
+        if chunk_stage not in self.started_stages:
+            self.started_stages.add(chunk_stage)
+            return self.flush() + [chunk]
+
+        out: List[Chunk] = []
+        if self.parts and (chunk_stage != self.stage or isinstance(chunk, str) != self.is_text):
+            out = self.flush()
+
+        if not self.parts:
+            self.stage = chunk_stage
+            self.is_text = isinstance(chunk, str)
+            self.deadline = time.perf_counter() + self.max_latency
+        self.parts.append(text)
+        self.size += len(text.encode("utf-8"))
+
+        if self.size >= self.max_bytes or time.perf_counter() >= self.deadline:
+            out.extend(self.flush())
+        return out
+
+
+def coalesce_chunks(
+    chunks: Iterable[Chunk],
+    max_bytes: int = 512,
+    max_latency_ms: float = 30.0,
+) -> Generator[Chunk, None, None]:
+    """Merge consecutive small text chunks so each SSE event carries more text.
+
+    A buffer is flushed when it reaches ``max_bytes`` (UTF-8) or when
+    ``max_latency_ms`` has passed since its first chunk, whichever comes first.
+    The first chunk of a stream (of each stage, for pipeline events) is never
+    held back, so time to first token is unchanged. Plain strings are merged
+    with strings; pipeline events of the form ``{"stage", "chunk"}`` are merged
+    within the same stage; any other event (stage_done, error, ...) flushes
+    the buffer and passes through.
+
+    ``chunks`` is read on a helper thread through a queue, so the latency
+    window holds even while the producer is stalled between chunks. Buffered
+    text is flushed before the producer's error is re-raised.
+    ``max_bytes <= 0`` disables coalescing.
+    """
+    if max_bytes <= 0:
+        yield from chunks
+        return
+
+    merger = _Merger(max_bytes, max(0.0, float(max_latency_ms)) / 1000.0)
+    items: "queue.Queue[tuple]" = queue.Queue()
+    stop = threading.Event()
+
+    def pump() -> None:
+        it = iter(chunks)
+        try:
+            for chunk in it:
+                items.put((_CHUNK, chunk))
+                if stop.is_set():
+                    break
+            items.put((_END, None))
+        except BaseException as e:
+            items.put((_ERROR, e))
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=pump, name="sse-coalescer", daemon=True).start()
+    try:
+        while True:
+            try:
+                kind, value = items.get(timeout=merger.remaining())
+            except queue.Empty:
+                yield from merger.flush()
+                continue
+            if kind == _CHUNK:
+                yield from merger.push(value)
+                continue
+            yield from merger.flush()
+            if kind == _ERROR:
+                raise value
+            return
+    finally:
+        # The pump stops after its next chunk; cancelling the producer is the caller's job
+        stop.set()
+
+
+async def acoalesce_chunks(
+    chunks: AsyncIterable[Chunk],
+    max_bytes: int = 512,
+    max_latency_ms: float = 30.0,
+) -> AsyncIterator[Chunk]:
+    """Async ``coalesce_chunks``: waits for the next chunk with the latency window as timeout."""
+    it = chunks.__aiter__()
+    if max_bytes <= 0:
+        async for chunk in it:
+            yield chunk
+        return
+
+    merger = _Merger(max_bytes, max(0.0, float(max_latency_ms)) / 1000.0)
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+            # asyncio.wait leaves the pending read running on timeout, unlike wait_for
+            done, _ = await asyncio.wait({pending}, timeout=merger.remaining())
+            if not done:
+                for event in merger.flush():
+                    yield event
+                continue
+            future, pending = pending, None
+            try:
+                chunk = future.result()
+            except StopAsyncIteration:
+                break
+            except BaseException:
+                for event in merger.flush():
+                    yield event
+                raise
+            for event in merger.push(chunk):
+                yield event
+        for event in merger.flush():
+            yield event
+    finally:
+        if pending is not None:
+            # The generator cannot be closed while a read is still running on it
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(it, "aclose", None)
+        if aclose is not None:
+            await aclose()
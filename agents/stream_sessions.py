@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, Callable, Dict, Generator, Iterable, Optional, Set, Tuple
+
+from .cancellation import CancellationToken, GenerationCancelled
+from .stream_buffer import StreamBuffer
+
+
+class StreamSession:
+    """One generation whose events are buffered so clients can reconnect to it.
+
+    The producer runs on the registry's worker pool, independent of any HTTP
+    connection, and writes into a bounded StreamBuffer. Each event is
+    identified by ``"<session id>:<sequence>"`` for use as the SSE ``id``
+    field. ``scope`` (route and request hash) ties the session to the request
+    that started it, so an id cannot be replayed on a different stream.
+
+    The producer receives the session's CancellationToken, which is cancelled
+    once no client has been reading the session for ``cancel_grace_seconds``
+    (long enough for an ``EventSource`` reconnect to re-attach).
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        max_events: int,
+        cancel_grace_seconds: Optional[float] = None,
+        token: Optional[CancellationToken] = None,
+        scope: Optional[str] = None,
+    ) -> None:
+        self.id = session_id
+        self.scope = scope
+        self.buffer = StreamBuffer(max_events=max_events)
+        self.token = token or CancellationToken()
+        self.cancel_grace_seconds = cancel_grace_seconds
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self._detached_at: Optional[float] = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def run(
+        self,
+        producer: Callable[[CancellationToken], Iterable[Any]],
+        on_finish: Optional[Callable[[], None]] = None,
+    ) -> None:
+        error: Optional[BaseException] = None
+        try:
+            for event in producer(self.token):
+                self.buffer.append(event)
+        except GenerationCancelled as e:
+            print(f"[StreamSession] Generation {self.id} cancelled ({e.reason})")
+            error = e
+        except Exception as e:
+            print(f"[StreamSession] Generation {self.id} failed: {e}")
+            error = e
+        finally:
+            self._finish(error, on_finish)
+
+    async def arun(
+        self,
+        producer: Callable[[CancellationToken], AsyncIterable[Any]],
+        on_finish: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Async ``run`` for producers driven by the event loop."""
+        error: Optional[BaseException] = None
+        try:
+            async for event in producer(self.token):
+                self.buffer.append(event)
+        except GenerationCancelled as e:
+            print(f"[StreamSession] Generation {self.id} cancelled ({e.reason})")
+            error = e
+        except asyncio.CancelledError:
+            self.token.cancel("shutdown")
+            error = GenerationCancelled("shutdown")
+            raise
+        except Exception as e:
+            print(f"[StreamSession] Generation {self.id} failed: {e}")
+            error = e
+        finally:
+            self._finish(error, on_finish)
+
+    def _finish(self, error: Optional[BaseException], on_finish: Optional[Callable[[], None]]) -> None:
+        self.finished_at = time.time()
+        self.buffer.close(error)
+        if on_finish is not None:
+            try:
+                on_finish()
+            except Exception as e:
+                print(f"[StreamSession] on_finish for {self.id} failed: {e}")
+
+    def events(
+        self, start: int = 0, keepalive_seconds: Optional[float] = None
+    ) -> Generator[Tuple[Optional[str], Any], None, None]:
+        """Yield ``(event id, event)`` from sequence ``start`` on, following the live generation.
+
+        With ``keepalive_seconds`` set, ``(None, None)`` is yielded whenever no
+        event arrived for that long, so the caller can write a keepalive and
+        notice a disconnected client even while the generation is silent.
+        Raises BufferOverrun if the reader falls behind the replay buffer.
+        """
+        with self._lock:
+            self.subscribers += 1
+            self._detached_at = None
+        try:
+            for seq, event in self.buffer.iter_indexed_from(start, keepalive_seconds):
+                yield (None, None) if seq is None else (f"{self.id}:{seq}", event)
+        finally:
+            with self._lock:
+                self.subscribers -= 1
+                if self.subscribers == 0:
+                    self._detached_at = time.monotonic()
+
+    def cancel_if_abandoned(self) -> None:
+        """Cancel the generation if no client has read it for ``cancel_grace_seconds``."""
+        with self._lock:
+            detached_at = self._detached_at
+        if self.cancel_grace_seconds is None or self.finished or detached_at is None:
+            return
+        if time.monotonic() - detached_at >= self.cancel_grace_seconds:
+            if self.token.cancel("client_disconnected"):
+                print(f"[StreamSession] Cancelling generation {self.id}: no client for {self.cancel_grace_seconds}s")
+
+
+class StreamSessionRegistry:
+    """Keeps running and recently finished generations addressable by event id.
+
+    Finished sessions are kept for ``ttl_seconds``; at most ``max_sessions``
+    are tracked, evicting the oldest finished ones first. Producers run on a
+    pool of ``max_workers`` threads; sessions started while it is busy wait
+    for a free worker. ``start_async`` runs async producers as tasks on the
+    caller's event loop instead. A running session left without clients for
+    ``cancel_grace_seconds`` is cancelled by a single reaper thread; ``None``
+    lets abandoned generations run to completion.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 300,
+        max_events: int = 2000,
+        cancel_grace_seconds: Optional[float] = 15,
+        max_workers: int = 32,
+    ) -> None:
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_events = max(1, int(max_events))
+        self.cancel_grace_seconds = None if cancel_grace_seconds is None else max(0.0, float(cancel_grace_seconds))
+        self.max_workers = max(1, int(max_workers))
+        self._sessions: "OrderedDict[str, StreamSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sse-session")
+        self._reaper: Optional[threading.Thread] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = 0
+        self.resumed = 0
+        self.rejected_resumes = 0
+
+    def start(
+        self,
+        producer: Callable[[CancellationToken], Iterable[Any]],
+        on_finish: Optional[Callable[[], None]] = None,
+        token: Optional[CancellationToken] = None,
+        scope: Optional[str] = None,
+    ) -> StreamSession:
+        """Run ``producer(token)`` on the worker pool and register its session.
+
+        ``token`` lets the caller supply one carrying the request deadline;
+        ``scope`` identifies the request (see ``resume``).
+        """
+        session = self._register(token, scope)
+        self._executor.submit(session.run, producer, on_finish)
+        return session
+
+    def start_async(
+        self,
+        producer: Callable[[CancellationToken], AsyncIterable[Any]],
+        on_finish: Optional[Callable[[], None]] = None,
+        token: Optional[CancellationToken] = None,
+        scope: Optional[str] = None,
+    ) -> StreamSession:
+        """Like ``start`` for an async producer, run as a task on the running event loop."""
+        session = self._register(token, scope)
+        task = asyncio.get_running_loop().create_task(session.arun(producer, on_finish))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return session
+
+    def _register(self, token: Optional[CancellationToken], scope: Optional[str]) -> StreamSession:
+        session = StreamSession(uuid.uuid4().hex[:16], self.max_events, self.cancel_grace_seconds, token, scope)
+        with self._lock:
+            self._purge_locked()
+            self._sessions[session.id] = session
+            self.started += 1
+            if self.cancel_grace_seconds is not None and self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="sse-session-reaper", daemon=True)
+                self._reaper.start()
+        return session
+
+    def _reap(self) -> None:
+        """Cancel abandoned generations; one thread for all sessions instead of a timer per disconnect."""
+        interval = min(1.0, max(0.1, self.cancel_grace_seconds / 2))
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                running = [s for s in self._sessions.values() if not s.finished]
+            for session in running:
+                session.cancel_if_abandoned()
+
+    def resume(
+        self, last_event_id: Optional[str], scope: Optional[str] = None
+    ) -> Optional[Tuple[StreamSession, int]]:
+        """Return the session and next sequence for a ``Last-Event-ID``, or None if it cannot be resumed.
+
+        A session started with a different ``scope`` (another route or request
+        body) is never resumed. If the buffer already dropped events the client
+        has not seen, the session is still returned: reading it raises
+        BufferOverrun so the gap is reported instead of silently starting a new
+        generation that the client would append to its partial output.
+        """
+        if not last_event_id:
+            return None
+        session_id, _, seq = str(last_event_id).strip().rpartition(":")
+        try:
+            next_seq = int(seq) + 1
+        except ValueError:
+            return None
+        if next_seq < 0:
+            return None
+        with self._lock:
+            self._purge_locked()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.scope != scope:
+                self.rejected_resumes += 1
+                print(f"[StreamSessionRegistry] Refusing to resume {session_id}: started by a different request")
+                return None
+            self.resumed += 1
+        return session, next_seq
+
+    def _purge_locked(self) -> None:
+        now = time.time()
+        expired = [
+            sid for sid, s in self._sessions.items()
+            if s.finished_at is not None and now - s.finished_at > self.ttl_seconds
+        ]
+        for sid in expired:
+            del self._sessions[sid]
+        if len(self._sessions) >= self.max_sessions:
+            for sid in [sid for sid, s in self._sessions.items() if s.finished]:
+                del self._sessions[sid]
+                if len(self._sessions) < self.max_sessions:
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for s in self._sessions.values() if not s.finished)
+            cancelled = sum(1 for s in self._sessions.values() if s.token.cancelled)
+            total = len(self._sessions)
+        return {
+            "sessions": total,
+            "running": running,
+            "cancelled": cancelled,
+            "started": self.started,
+            "resumed": self.resumed,
+            "rejected_resumes": self.rejected_resumes,
+            "max_workers": self.max_workers,
+        }
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import copy
+import threading
+from collections import Counter as TallyCounter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import get_section
+from .metrics import registry
+
+try:
+    import tiktoken
+except ImportError:  # optional; the character heuristic is used without it
+    tiktoken = None
+
+PROMPT_TOKENS = registry.histogram(
+    "hrm_prompt_input_tokens",
+    "Estimated prompt tokens of an agent input after the token-budget stage.",
+    ("agent", "provider"),
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072),
+)
+BUDGET_TRIMMED = registry.counter(
+    "hrm_prompt_budget_trimmed_total",
+    "Agent inputs shrunk to fit the configured input token budget.",
+    ("agent", "provider"),
+)
+
+# Keys treated as an entry's time when ordering or collapsing history entries
+TIME_KEYS = ("timestamp", "time", "datetime", "date", "eventTime", "createdAt", "ts")
+
+DEFAULT_ESTIMATORS: Dict[str, Dict[str, Any]] = {
+    "openai": {"chars_per_token": 4.0, "non_ascii_tokens_per_char": 0.7, "encoding": "o200k_base"},
+    "bedrock": {"chars_per_token": 3.5, "non_ascii_tokens_per_char": 1.0},
+    "gauss": {"chars_per_token": 3.5, "non_ascii_tokens_per_char": 0.8},
+    "gausso": {"chars_per_token": 3.5, "non_ascii_tokens_per_char": 0.8},
+}
+
+
+class TokenEstimator:
+    """Approximate token count of prompt text for one provider.
+
+    Uses the ``tiktoken`` encoding when one is configured and the package is
+    installed; otherwise ASCII text counts ``1/chars_per_token`` tokens per
+    character and other characters (Hangul etc.) ``non_ascii_tokens_per_char``.
+    The heuristic is tuned to over- rather than under-estimate.
+    """
+
+    def __init__(
+        self, chars_per_token: float = 4.0, non_ascii_tokens_per_char: float = 1.0, encoding: Optional[str] = None
+    ) -> None:
+        self.chars_per_token = max(0.1, float(chars_per_token))
+        self.non_ascii_tokens_per_char = max(0.0, float(non_ascii_tokens_per_char))
+        self._encoding = None
+        if encoding and tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                print(f"[TokenEstimator] tiktoken encoding {encoding} unavailable, using heuristic: {e}")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        non_ascii = sum(1 for ch in text if ord(ch) > 127)
+        ascii_chars = len(text) - non_ascii
+        return int(ascii_chars / self.chars_per_token + non_ascii * self.non_ascii_tokens_per_char + 0.999)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _time_key(entries: List[Dict[str, Any]]) -> Optional[str]:
+    """The first of TIME_KEYS whose values are all numbers or all strings, so they sort by value."""
+    for key in TIME_KEYS:
+        values = [e.get(key) for e in entries]
+        if all(_is_number(v) for v in values) or all(isinstance(v, str) for v in values):
+            return key
+    return None
+
+
+def _record_lists(obj: Any, found: List[Tuple[Any, Any]]) -> None:
+    """Collect (container, key) of every list of dict entries nested in ``obj``."""
+    items = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else ()
+    for key, value in items:
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            found.append((obj, key))
+        _record_lists(value, found)
+
+
+def _collapse_repeats(entries: List[Dict[str, Any]], time_key: Optional[str]) -> List[Dict[str, Any]]:
+    """Merge runs of entries that differ only in their time into one with ``repeatCount``/``lastSeen``."""
+    collapsed: List[Dict[str, Any]] = []
+    last_signature = None
+    for entry in entries:
+        signature = repr(sorted((k, repr(v)) for k, v in entry.items() if k != time_key))
+        if collapsed and signature == last_signature:
+            previous = collapsed[-1]
+            previous["repeatCount"] = previous.get("repeatCount", 1) + 1
+            if time_key is not None:
+                previous["lastSeen"] = entry[time_key]
+            continue
+        collapsed.append(dict(entry))
+        last_signature = signature
+    return collapsed
+
+
+def _aggregate(entries: List[Dict[str, Any]], time_key: Optional[str]) -> Dict[str, Any]:
+    """One summary entry for ``entries``: time range, min/mean/max of numbers, most common other values."""
+    summary: Dict[str, Any] = {"aggregatedEntries": sum(e.get("repeatCount", 1) for e in entries)}
+    if time_key is not None:
+        summary["from"] = entries[0][time_key]
+        summary["to"] = entries[-1].get("lastSeen", entries[-1][time_key])
+    keys: List[str] = []
+    for entry in entries:
+        keys.extend(k for k in entry if k not in keys and k not in (time_key, "repeatCount", "lastSeen"))
+    for key in keys:
+        weighted = [(e[key], e.get("repeatCount", 1)) for e in entries if key in e]
+        values = [v for v, _ in weighted]
+        if all(_is_number(v) for v in values):
+            summary[key] = {
+                "min": min(values),
+                "mean": round(sum(v * w for v, w in weighted) / sum(w for _, w in weighted), 3),
+                "max": max(values),
+            }
+        elif all(isinstance(v, (str, bool)) for v in values):
+            tally: TallyCounter = TallyCounter()
+            for v, w in weighted:
+                tally[v] += w
+            summary[key] = tally.most_common(1)[0][0]
+    return summary
+
+
+def fit_history(
+    history: Dict[str, Any],
+    budget: float,
+    count: Callable[[str], int],
+    render: Callable[[Any], str] = str,
+    min_entries: int = 1,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Shrink ``history`` until ``count(render(history)) <= budget``; returns (history, report).
+
+    Works on the longest list of entries in the history (oldest first by
+    their time key, else in list order) and stops at the first step that
+    fits: (1) runs of repeated entries are collapsed, (2) the oldest entries
+    are merged into one aggregate entry, (3) the oldest entries are dropped,
+    keeping at least ``min_entries``. The input is not modified.
+    """
+    tokens_before = count(render(history))
+    report: Dict[str, Any] = {"tokens_before": tokens_before, "tokens_after": tokens_before, "budget": budget}
+    if tokens_before <= budget:
+        return history, report
+
+    history = copy.deepcopy(history)
+    lists: List[Tuple[Any, Any]] = []
+    _record_lists(history, lists)
+    if not lists:
+        report["over_budget"] = True
+        return history, report
+    container, key = max(lists, key=lambda item: len(item[0][item[1]]))
+    entries: List[Dict[str, Any]] = container[key]
+    time_key = _time_key(entries)
+    if time_key is not None:
+        # Epoch numbers sort numerically, ISO-8601 strings lexically
+        entries = sorted(entries, key=lambda e: e[time_key])
+    report["entries_before"] = len(entries)
+
+    def size(candidate: List[Dict[str, Any]]) -> int:
+        container[key] = candidate
+        return count(render(history))
+
+    def smallest(lo: int, hi: int, build: Callable[[int], List[Dict[str, Any]]]) -> Optional[int]:
+        """Smallest n in [lo, hi] whose ``build(n)`` fits (sizes shrink as n grows)."""
+        if lo > hi or size(build(hi)) > budget:
+            return None
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if size(build(mid)) <= budget:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    entries = _collapse_repeats(entries, time_key)
+    report["collapsed"] = report["entries_before"] - len(entries)
+    keep = max(1, int(min_entries))
+    result = entries
+    if size(entries) > budget:
+        aggregate = lambda n: [_aggregate(entries[:n], time_key)] + entries[n:]
+        n = smallest(2, len(entries) - keep, aggregate)
+        if n is not None:
+            result = aggregate(n)
+            report["aggregated"] = n
+        else:
+            drop = lambda n: entries[n:]
+            n = smallest(1, len(entries) - keep, drop)
+            if n is None:
+                n = max(0, len(entries) - keep)
+                report["over_budget"] = True
+            result = drop(n)
+            report["dropped"] = n
+    container[key] = result
+    report["entries_after"] = len(result)
+    report["tokens_after"] = count(render(history))
+    return history, report
+
+
+_estimators: Dict[str, TokenEstimator] = {}
+_estimators_lock = threading.Lock()
+
+
+def get_token_estimator(provider: str) -> TokenEstimator:
+    """Estimator for ``provider`` from ``token_budget.estimators`` in configure.json (built-in defaults otherwise)."""
+    key = str(provider or "").lower()
+    with _estimators_lock:
+        estimator = _estimators.get(key)
+        if estimator is None:
+            configured = get_section("token_budget").get("estimators") or {}
+            cfg = configured.get(key) or DEFAULT_ESTIMATORS.get(key) or configured.get("default") or {}
+            estimator = _estimators[key] = TokenEstimator(
+                chars_per_token=cfg.get("chars_per_token", 4.0),
+                non_ascii_tokens_per_char=cfg.get("non_ascii_tokens_per_char", 1.0),
+                encoding=cfg.get("encoding"),
+            )
+        return estimator
+
+
+def agent_budget(agent: str) -> Dict[str, Any]:
+    """``token_budget.agents.<agent>`` ({} when the agent has no budget)::
+
+        "token_budget": {
+          "agents": {"op_history_summarizer": {"max_input_tokens": 8000, "min_entries": 5}}
+        }
+    """
+    cfg = get_section("token_budget")
+    if not cfg.get("enabled", True):
+        return {}
+    return (cfg.get("agents") or {}).get(agent) or {}
+
+
+def record_prompt_tokens(agent: str, provider: str, tokens_before: int, tokens_after: int) -> None:
+    PROMPT_TOKENS.observe(tokens_after, agent=agent, provider=provider)
+    if tokens_after < tokens_before:
+        BUDGET_TRIMMED.inc(agent=agent, provider=provider)
@@ -5,6 +5,8 @@ import json
 import os
 from flask_cors import CORS
 import logging
+from agents.cancellation import TIMEOUT_HEADER, CancellationToken, parse_timeout
+from agents.metrics import CONTENT_TYPE, instrument_flask_app, registry, request_labels
 
 # 로깅 설정
 logging.basicConfig(
@@ -41,6 +43,44 @@ HRM_AGENT_API_URL = "http://localhost:8000"  # HRM Agent API 서버 URL
 logger.info(f"[App] GuideRetriever API URL configured: {API_BASE_URL}")
 logger.info(f"[App] HRM Agent API URL configured: {HRM_AGENT_API_URL}")
 
+def upstream_error_event(response) -> str:
+    """HRM Agent API 오류 응답을 SSE 오류 이벤트로 변환합니다 (429는 retry_after 포함)."""
+    payload = {'error': 'API 서버 오류', 'done': True}
+    if response.status_code == 429:
+        payload['error'] = '요청이 많아 처리할 수 없습니다.'
+        payload['retry_after'] = int(response.headers.get('Retry-After', 1))
+    return f"data: {json.dumps(payload)}\n\n"
+
+def resume_headers() -> dict:
+    """현재 요청의 Last-Event-ID 헤더를 API 서버 요청용 헤더로 반환합니다."""
+    last_event_id = request.headers.get('Last-Event-ID')
+    return {'Last-Event-ID': last_event_id} if last_event_id else {}
+
+# 요청 마감 시간: 브라우저 요청부터 API 서버의 검색/LLM 호출까지 하나의 예산을 나눠 씀
+_timeouts_config = config.get("timeouts", {}) if isinstance(config.get("timeouts", {}), dict) else {}
+DEFAULT_REQUEST_TIMEOUT = float(_timeouts_config.get("request_seconds", 300))
+MAX_REQUEST_TIMEOUT = float(_timeouts_config.get("max_request_seconds", 600))
+# API 서버가 마감 시간 초과 이벤트를 보낼 수 있도록 읽기 타임아웃에 더하는 여유
+UPSTREAM_GRACE_SECONDS = 5.0
+
+def request_deadline() -> CancellationToken:
+    """현재 요청의 마감 시간(X-Request-Timeout 헤더 또는 timeout 쿼리 파라미터, 초)을 담은 토큰을 만듭니다."""
+    return CancellationToken(parse_timeout(
+        request.headers.get(TIMEOUT_HEADER),
+        request.args.get('timeout'),
+        default=DEFAULT_REQUEST_TIMEOUT,
+        maximum=MAX_REQUEST_TIMEOUT,
+    ))
+
+def deadline_headers(deadline: CancellationToken) -> dict:
+    """남은 마감 시간을 API 서버로 전달하는 헤더를 반환합니다 (이미 지났으면 GenerationCancelled)."""
+    return {TIMEOUT_HEADER: f"{deadline.budget():.3f}"}
+
+def upstream_timeout(deadline: CancellationToken) -> tuple:
+    """API 서버 요청의 (연결, 읽기) 타임아웃을 남은 마감 시간으로 계산합니다."""
+    remaining = deadline.remaining()
+    return (min(5.0, remaining), remaining + UPSTREAM_GRACE_SECONDS)
+
 # JSON 데이터를 메모리에 로드 (서버 시작 시 한 번만 로드)
 json_data = []
 
@@ -78,6 +118,19 @@ def truncate_json_data(data, max_length=1000):
     else:
         return json_str, False  # False indicates no truncation
 
+def request_metric_labels() -> dict:
+    """요청 지연 시간 메트릭에 붙일 provider/language 라벨을 반환합니다."""
+    data = request.get_json(silent=True) if request.method == 'POST' else None
+    data = data if isinstance(data, dict) else {}
+    return request_labels(request.args.get('llm', ''), data.get('language') or request.args.get('language', ''))
+
+instrument_flask_app(app, labels=request_metric_labels)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 형식의 메트릭을 반환합니다."""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 @app.route('/')
 def index():
     """메인 페이지를 렌더링합니다."""
@@ -196,6 +249,10 @@ def stream_diagnosis(item_id):
         # analytics 데이터 추출
         analytics = item_data.get('analytics', {})
         
+        # 브라우저 재연결 시 Last-Event-ID를 API 서버로 전달해 진행 중인 생성을 이어받음
+        upstream_headers = resume_headers()
+        deadline = request_deadline()
+        
         def generate():
             try:
                 # HRM Agent API 서버에 스트리밍 요청
@@ -208,18 +265,21 @@ def stream_diagnosis(item_id):
                 response = requests.post(
                     f"{HRM_AGENT_API_URL}/api/diagnosis/stream",
                     json=api_payload,
+                    headers={**upstream_headers, **deadline_headers(deadline)},
                     stream=True,
-                    timeout=300
+                    timeout=upstream_timeout(deadline)
                 )
                 
                 if response.status_code != 200:
-                    yield f"data: {json.dumps({'error': 'API 서버 오류', 'done': True})}\n\n"
+                    yield upstream_error_event(response)
                     return
                 
-                # API 서버로부터 스트리밍 응답을 그대로 전달
-                for line in response.iter_lines(decode_unicode=True):
-                    if line.startswith('data: '):
-                        yield f"{line}\n\n"
+                # API 서버로부터 스트리밍 응답을 그대로 전달 (이미 SSE 형식이므로 줄 단위 디코딩/재구성 없이 바이트로 중계)
+                try:
+                    yield from response.iter_content(chunk_size=None)
+                finally:
+                    # 브라우저가 연결을 끊어 제너레이터가 닫히면 업스트림 연결도 바로 닫아 API 서버가 생성을 취소하게 함
+                    response.close()
                 
             except Exception as e:
                 logger.error(f"스트리밍 진단 요약 중 오류: {e}")
@@ -259,6 +319,10 @@ def stream_operation_history(item_id):
         # operation history 데이터 추출 (root level의 operation_history)
         operation_history = item_data.get('operation_history', {})
         
+        # 브라우저 재연결 시 Last-Event-ID를 API 서버로 전달해 진행 중인 생성을 이어받음
+        upstream_headers = resume_headers()
+        deadline = request_deadline()
+        
         def generate():
             try:
                 # HRM Agent API 서버에 스트리밍 요청
@@ -271,18 +335,21 @@ def stream_operation_history(item_id):
                 response = requests.post(
                     f"{HRM_AGENT_API_URL}/api/operation-history/stream",
                     json=api_payload,
+                    headers={**upstream_headers, **deadline_headers(deadline)},
                     stream=True,
-                    timeout=300
+                    timeout=upstream_timeout(deadline)
                 )
                 
                 if response.status_code != 200:
-                    yield f"data: {json.dumps({'error': 'API 서버 오류', 'done': True})}\n\n"
+                    yield upstream_error_event(response)
                     return
                 
-                # API 서버로부터 스트리밍 응답을 그대로 전달
-                for line in response.iter_lines(decode_unicode=True):
-                    if line.startswith('data: '):
-                        yield f"{line}\n\n"
+                # API 서버로부터 스트리밍 응답을 그대로 전달 (이미 SSE 형식이므로 줄 단위 디코딩/재구성 없이 바이트로 중계)
+                try:
+                    yield from response.iter_content(chunk_size=None)
+                finally:
+                    # 브라우저가 연결을 끊어 제너레이터가 닫히면 업스트림 연결도 바로 닫아 API 서버가 생성을 취소하게 함
+                    response.close()
                 
             except Exception as e:
                 logger.error(f"스트리밍 운영 이력 요약 중 오류: {e}")
@@ -301,6 +368,79 @@ def stream_operation_history(item_id):
     except Exception as e:
         return jsonify({'error': f'스트리밍 중 오류 발생: {str(e)}'}), 500
 
+@app.route('/api/stream/pipeline/<string:item_id>')
+def stream_pipeline(item_id):
+    """특정 ID의 진단/운영 이력 요약과 조치 가이드를 하나의 스트림으로 생성합니다."""
+    try:
+        # HRM Agent API 서버 상태 확인
+        if not check_api_server_health():
+            return jsonify({'error': 'HRM Agent API 서버에 연결할 수 없습니다.'}), 503
+            
+        # 언어 및 LLM 설정 가져오기
+        language = request.args.get('language', 'ko')
+        llm_provider = request.args.get('llm', 'openai')
+        category = request.args.get('category', '')
+        
+        # 선택된 ID에 해당하는 데이터 찾기
+        item_data = next((item for item in json_data if item.get('id') == item_id), None)
+        
+        if not item_data:
+            return jsonify({'error': f'ID {item_id}에 해당하는 데이터를 찾을 수 없습니다.'}), 404
+            
+        analytics = item_data.get('analytics', {})
+        operation_history = item_data.get('operation_history', {})
+        
+        # 브라우저 재연결 시 Last-Event-ID를 API 서버로 전달해 진행 중인 생성을 이어받음
+        upstream_headers = resume_headers()
+        deadline = request_deadline()
+        
+        def generate():
+            try:
+                # HRM Agent API 서버에 스트리밍 요청
+                api_payload = {
+                    "analytics": analytics,
+                    "operation_history": operation_history,
+                    "category": category or analytics.get('deviceType', ''),
+                    "language": language,
+                    "llm_provider": llm_provider
+                }
+                
+                response = requests.post(
+                    f"{HRM_AGENT_API_URL}/api/pipeline/stream",
+                    json=api_payload,
+                    headers={**upstream_headers, **deadline_headers(deadline)},
+                    stream=True,
+                    timeout=upstream_timeout(deadline)
+                )
+                
+                if response.status_code != 200:
+                    yield upstream_error_event(response)
+                    return
+                
+                # API 서버로부터 스트리밍 응답을 그대로 전달 (이미 SSE 형식이므로 줄 단위 디코딩/재구성 없이 바이트로 중계)
+                try:
+                    yield from response.iter_content(chunk_size=None)
+                finally:
+                    # 브라우저가 연결을 끊어 제너레이터가 닫히면 업스트림 연결도 바로 닫아 API 서버가 생성을 취소하게 함
+                    response.close()
+                
+            except Exception as e:
+                logger.error(f"스트리밍 파이프라인 중 오류: {e}")
+                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+        
+        return Response(
+            generate(),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'Connection': 'keep-alive',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+        
+    except Exception as e:
+        return jsonify({'error': f'스트리밍 중 오류 발생: {str(e)}'}), 500
+
 @app.route('/guide-retriever')
 def guide_retriever():
     """메인 페이지"""
@@ -345,6 +485,10 @@ def stream_actions_guide(item_id):
         device_type = analytics.get('deviceType', category or 'unknown')
         final_category = category or device_type
 
+        # 브라우저 재연결 시 Last-Event-ID를 API 서버로 전달해 진행 중인 생성을 이어받음
+        upstream_headers = resume_headers()
+        deadline = request_deadline()
+        
         def generate():
             try:
                 logger.info(f"[stream_actions_guide] 시작 - category: {final_category}, diagnosis_summary: {diagnosis_summary[:100]}...")
@@ -359,18 +503,21 @@ def stream_actions_guide(item_id):
                 response = requests.post(
                     f"{HRM_AGENT_API_URL}/api/actions-guide/stream",
                     json=api_payload,
+                    headers={**upstream_headers, **deadline_headers(deadline)},
                     stream=True,
-                    timeout=300
+                    timeout=upstream_timeout(deadline)
                 )
                 
                 if response.status_code != 200:
-                    yield f"data: {json.dumps({'error': 'API 서버 오류', 'done': True})}\n\n"
+                    yield upstream_error_event(response)
                     return
                 
-                # API 서버로부터 스트리밍 응답을 그대로 전달
-                for line in response.iter_lines(decode_unicode=True):
-                    if line.startswith('data: '):
-                        yield f"{line}\n\n"
+                # API 서버로부터 스트리밍 응답을 그대로 전달 (이미 SSE 형식이므로 줄 단위 디코딩/재구성 없이 바이트로 중계)
+                try:
+                    yield from response.iter_content(chunk_size=None)
+                finally:
+                    # 브라우저가 연결을 끊어 제너레이터가 닫히면 업스트림 연결도 바로 닫아 API 서버가 생성을 취소하게 함
+                    response.close()
                 
             except Exception as e:
                 logger.error(f"스트리밍 고객 조치 가이드 중 오류: {e}")
@@ -402,9 +549,11 @@ def api_prompt():
             data = request.get_json(silent=True)
             if not isinstance(data, dict):
                 return jsonify({"success": False, "error": "Invalid JSON payload"}), 400
-            # 파일로 저장
-            with open(prompt_path, 'w', encoding='utf-8') as f:
+            # 임시 파일에 쓴 뒤 교체: API 서버의 프롬프트 레지스트리가 쓰는 도중의 파일을 읽지 않도록 함
+            tmp_path = f"{prompt_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, prompt_path)
             return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Gauss 스트리밍 첫 토큰 지연(TTFT) 벤치마크
+
+토큰을 일정 간격으로 생성하는 로컬 스텁 서버(OpenAI 호환 /chat/completions)를 띄우고,
+기존 방식(비스트리밍으로 전체 응답을 받은 뒤 줄 단위로 나눠 흉내 낸 스트리밍)과
+GaussClient의 실제 스트리밍(iter_lines로 SSE 청크를 받는 즉시 yield)의
+첫 토큰까지의 시간/전체 시간/청크 수를 비교합니다. 외부 API는 호출하지 않습니다.
+
+사용법:
+    python bench_gauss_streaming.py
+    python bench_gauss_streaming.py --tokens 400 --token-interval-ms 20 --requests 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List
+
+from agents.llm_client_gauss import GaussClient
+
+SAMPLE_TOKENS = (
+    "결론", ":", " 자가", " 조치", " 가능", ".", "\n", "필터", " 청소", " 주기가", " 지났습니다", ".", "\n",
+    "Conclusion", ":", " self", "-repairable", ".", " Clean", " the", " filter", ".", "\n",
+)
+
+
+def make_handler(tokens: int, interval_ms: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _generate(self) -> Iterator[str]:
+            for i in range(tokens):
+                time.sleep(interval_ms / 1000.0)
+                yield SAMPLE_TOKENS[i % len(SAMPLE_TOKENS)]
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not body.get("stream"):
+                content = "".join(self._generate())
+                data = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write(event: str) -> None:
+                data = event.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            for token in self._generate():
+                write(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n")
+            write("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return StubHandler
+
+
+def measure(chunks: Callable[[], Iterator[str]]) -> Dict[str, float]:
+    started = time.perf_counter()
+    ttft = None
+    count = 0
+    # GaussAPI.chat_completion은 응답 전체를 print하므로 측정 중에는 숨김
+    with contextlib.redirect_stdout(io.StringIO()):
+        for text in chunks():
+            if text and ttft is None:
+                ttft = time.perf_counter() - started
+            count += 1
+    total = time.perf_counter() - started
+    return {"ttft": ttft if ttft is not None else total, "total": total, "chunks": count}
+
+
+def report(label: str, results: List[Dict[str, float]]) -> Dict[str, float]:
+    summary = {
+        "ttft_ms": statistics.median(r["ttft"] for r in results) * 1000,
+        "total_ms": statistics.median(r["total"] for r in results) * 1000,
+        "chunks": statistics.median(r["chunks"] for r in results),
+    }
+    print(
+        f"{label:<10} ttft(p50)={summary['ttft_ms']:>8.1f}ms  "
+        f"total(p50)={summary['total_ms']:>8.1f}ms  chunks={summary['chunks']:>6.0f}"
+    )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gauss 스트리밍 TTFT 벤치마크")
+    parser.add_argument("--tokens", type=int, default=200, help="응답당 토큰 수")
+    parser.add_argument("--token-interval-ms", type=float, default=10.0, help="스텁 서버의 토큰 생성 간격(ms)")
+    parser.add_argument("--requests", type=int, default=5, help="방식별 요청 수")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.tokens, args.token_interval_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = GaussClient(access_key="bench", secret_key="bench")
+    api = client.llm._client
+    api.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    def before() -> Iterator[str]:
+        # 기존 방식: 비스트리밍으로 전체 응답을 받은 뒤 줄 단위로 나눠 전달
+        result = api.chat_completion("bench", stream=False)
+        text = result["choices"][0]["message"]["content"] if result else ""
+        for line in text.split("\n"):
+            if line:
+                yield line + "\n"
+
+    def after() -> Iterator[str]:
+        for chunk in client.generate("bench", stream=True):
+            yield chunk.get("text", "")
+
+    print(f"tokens={args.tokens} token_interval_ms={args.token_interval_ms} requests={args.requests}")
+    try:
+        old = report("before", [measure(before) for _ in range(args.requests)])
+        new = report("after", [measure(after) for _ in range(args.requests)])
+    finally:
+        server.shutdown()
+    if new["ttft_ms"]:
+        print(f"TTFT 개선: {old['ttft_ms'] / new['ttft_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+운영 이력 프롬프트 직렬화 형식 벤치마크
+
+같은 운영 이력을 repr(기존 Python dict 문자열) / json(압축 JSON) / columnar(표 형식)로
+직렬화했을 때, 그리고 NumPy로 미리 계산한 통계 블록을 함께 넣거나(columnar+stats) 원본 레코드
+대신 넣었을 때(stats)의 프롬프트 문자 수, provider별 추정 토큰 수, 프롬프트 생성 시간을 비교합니다.
+통계 계산 시간은 --stats-events 건의 이력으로 따로 측정합니다.
+--provider를 지정하면 각 형식의 프롬프트로 실제 LLM을 호출해 첫 토큰 시간(TTFT)과
+전체 생성 시간도 측정합니다(프롬프트 단위 LLM 캐시는 거치지 않음).
+
+샘플 데이터는 data/sample_original.json의 operation_history를 사용하며, 파일이 없으면
+한 달치 시간별 에어컨 운영 이력을 생성해 사용합니다.
+
+사용법:
+    python bench_prompt_serialization.py
+    python bench_prompt_serialization.py --data data/sample_original.json --language en
+    python bench_prompt_serialization.py --provider openai --requests 3
+    python bench_prompt_serialization.py --stats-events 100000
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from agents.history_stats import compute_history_stats, find_events, without_path
+from agents.llm_providers import build_llm
+from agents.prompt_builder import HISTORY_FORMATS, PromptBuilder
+from agents.prompt_registry import PromptTemplates
+from agents.token_budget import get_token_estimator
+
+ESTIMATOR_PROVIDERS = ("openai", "bedrock", "gauss")
+# (이름, history_format, history_stats)
+VARIANTS = [(f, f, "off") for f in HISTORY_FORMATS] + [
+    ("columnar+stats", "columnar", "alongside"),
+    ("stats", "columnar", "replace"),
+]
+
+
+def synthetic_history(days: int = 30) -> Dict[str, Any]:
+    """시간별 이벤트로 구성된 에어컨 운영 이력 (같은 상태가 연속되는 구간 포함)."""
+    events: List[Dict[str, Any]] = []
+    start = datetime(2024, 1, 1)
+    for hour in range(days * 24):
+        day, h = divmod(hour, 24)
+        running = 9 <= h <= 22
+        events.append({
+            "timestamp": (start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "mode": ("cooling" if h < 18 else "dehumidify") if running else "standby",
+            "status": "running" if running else "off",
+            "targetTemperature": 24 if running else None,
+            "temperature": round(22.5 + (h % 6) * 0.5, 1) if running else 27.0,
+            "humidity": 45 if running else 60,
+            "power_consumption": 150 + (h % 4) * 10 if running else 2,
+            "errorCode": "CH-05" if day == 17 and h == 14 else "",
+        })
+    return {"deviceType": "airconditioner", "summary_period": "1_month", "operationHistory": events}
+
+
+def build_prompt(builder: PromptBuilder, history: Dict[str, Any], language: str, stats_mode: str) -> str:
+    """OperationHistorySummarizer와 같은 순서로 통계 블록을 만든 뒤 프롬프트 생성 (토큰 예산 단계 제외)."""
+    stats = None
+    if stats_mode != "off":
+        path, events = find_events(history)
+        stats = compute_history_stats(events)
+        if stats_mode == "replace":
+            history = without_path(history, path)
+    return builder.build_operation_history_prompt(history, "bench", language, stats=stats)
+
+
+def measure_stats(events: int, runs: int = 5) -> float:
+    history = synthetic_history(days=-(-events // 24))
+    history["operationHistory"] = history["operationHistory"][:events]
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        compute_history_stats(history["operationHistory"])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def load_histories(path: str) -> List[Dict[str, Any]]:
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        histories = [item["operation_history"] for item in items if item.get("operation_history")]
+        if histories:
+            print(f"샘플 데이터: {path} ({len(histories)}건)")
+            return histories
+    print("샘플 데이터 파일이 없어 생성한 한 달치 시간별 운영 이력을 사용합니다.")
+    return [synthetic_history()]
+
+
+def measure_llm(provider: str, prompt: str, requests: int) -> Dict[str, float]:
+    llm = build_llm(provider)
+    # 캐시 적중이 측정을 왜곡하지 않도록 프롬프트 단위 캐시 아래의 클라이언트를 직접 호출
+    llm = getattr(llm, "client", llm)
+    ttfts, totals = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        ttft = None
+        for chunk in llm.generate(prompt, stream=True):
+            if ttft is None and chunk.get("text"):
+                ttft = time.perf_counter() - started
+        totals.append(time.perf_counter() - started)
+        ttfts.append(ttft if ttft is not None else totals[-1])
+    return {"ttft_ms": statistics.median(ttfts) * 1000, "total_ms": statistics.median(totals) * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="운영 이력 프롬프트 직렬화 형식 벤치마크")
+    parser.add_argument("--data", default=os.path.join("data", "sample_original.json"), help="샘플 데이터 파일")
+    parser.add_argument("--language", default="ko", help="프롬프트 언어 (ko/en)")
+    parser.add_argument("--iterations", type=int, default=50, help="프롬프트 생성 시간 측정 반복 횟수")
+    parser.add_argument("--provider", default=None, help="실제 LLM 지연 시간을 측정할 provider")
+    parser.add_argument("--requests", type=int, default=3, help="형식별 LLM 호출 수")
+    parser.add_argument("--stats-events", type=int, default=100000, help="통계 계산 시간 측정용 이력 건수")
+    args = parser.parse_args()
+
+    histories = load_histories(args.data)
+    base_prompts = PromptBuilder().prompts
+    estimators = {p: get_token_estimator(p) for p in ESTIMATOR_PROVIDERS}
+    results: Dict[str, Dict[str, float]] = {}
+
+    for name, history_format, stats_mode in VARIANTS:
+        # 공유 템플릿은 수정하지 않고 형식만 바꾼 사본으로 빌더 생성
+        templates = copy.deepcopy(base_prompts)
+        for lang in ("ko", "en"):
+            templates.setdefault("operation_history", {}).setdefault(lang, {})["history_format"] = history_format
+        builder = PromptBuilder(templates=PromptTemplates(templates))
+        prompts = [build_prompt(builder, h, args.language, stats_mode) for h in histories]
+
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for h in histories:
+                build_prompt(builder, h, args.language, stats_mode)
+        build_ms = (time.perf_counter() - started) * 1000 / (args.iterations * len(histories))
+
+        result = {"chars": sum(len(p) for p in prompts), "build_ms": build_ms}
+        for provider, estimator in estimators.items():
+            result[f"tokens_{provider}"] = sum(estimator.count(p) for p in prompts)
+        if args.provider:
+            result.update(measure_llm(args.provider, prompts[0], args.requests))
+        results[name] = result
+
+    columns = ["chars"] + [f"tokens_{p}" for p in ESTIMATOR_PROVIDERS] + ["build_ms"]
+    if args.provider:
+        columns += ["ttft_ms", "total_ms"]
+    print(f"{'format':<16}" + "".join(f"{c:>16}" for c in columns))
+    for name, result in results.items():
+        print(f"{name:<16}" + "".join(f"{result[c]:>16.1f}" for c in columns))
+
+    base = results["repr"]
+    for name in ("columnar", "stats"):
+        print(f"\nrepr 대비 {name}:")
+        for c in columns:
+            if base[c]:
+                change = (1 - results[name][c] / base[c]) * 100
+                print(f"  {c:<16} {abs(change):>6.1f}% {'감소' if change >= 0 else '증가'}")
+
+    if args.stats_events > 0:
+        print(f"\n통계 계산 시간 ({args.stats_events}건): {measure_stats(args.stats_events):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+SSE 동시 스트림 용량 벤치마크
+
+Flask 서버(hrm_agent_api.py)와 ASGI 서버(hrm_agent_asgi.py)에 동일한 스트리밍 요청을
+동시에 N개 열고, 첫 이벤트까지의 시간/완료 시간/실패 수를 비교합니다.
+외부 의존성 없이 asyncio 소켓으로 HTTP 요청을 보냅니다.
+
+사용법:
+    # 터미널 1: python hrm_agent_api.py          (포트 8000)
+    # 터미널 2: python hrm_agent_asgi.py         (포트 8000, 별도 실행 시 --port 변경)
+    python bench_sse_capacity.py --url http://localhost:8000 --concurrency 50 200 1000
+    python bench_sse_capacity.py --url http://localhost:8000 --url http://localhost:8001
+    # 실제 LLM 호출 없이 오프라인 측정 (configure.json의 fake_llm 설정 사용)
+    python bench_sse_capacity.py --url http://localhost:8000 --llm-provider fake
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+DEFAULT_PAYLOAD = {
+    "analytics": {
+        "deviceType": "airconditioner",
+        "diagnosisLists": [
+            {
+                "deviceSubType": "FAC",
+                "diagnosisResult": "Lack",
+                "diagnosisList": [
+                    {
+                        "title": "Error",
+                        "diagnosisLabel": "Error",
+                        "diagnosisCode": "AC-0102",
+                        "diagnosisResult": "Normal",
+                        "diagnosisDescription": "No error history."
+                    }
+                ]
+            }
+        ]
+    },
+    "language": "ko",
+}
+
+
+async def open_stream(host: str, port: int, path: str, body: bytes, timeout: float) -> Dict[str, Any]:
+    """스트리밍 요청 하나를 보내고 첫 이벤트/완료 시간을 측정합니다."""
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"ok": False, "ttfe": None, "total": None, "events": 0}
+    writer: Optional[asyncio.StreamWriter] = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        request = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Content-Type: application/json\r\n"
+            "Accept: text/event-stream\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("utf-8") + body
+        writer.write(request)
+        await writer.drain()
+
+        deadline = started + timeout
+        buffer = b""
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                result["error"] = "timeout"
+                break
+            data = await asyncio.wait_for(reader.read(65536), remaining)
+            if not data:
+                break
+            buffer += data
+            events = buffer.count(b"data: ")
+            if events and result["ttfe"] is None:
+                result["ttfe"] = time.perf_counter() - started
+            result["events"] = events
+            if b'"done": true' in buffer:
+                result["ok"] = b'"error"' not in buffer
+                break
+    except Exception as e:
+        result["error"] = type(e).__name__
+    finally:
+        result["total"] = time.perf_counter() - started
+        if writer is not None:
+            writer.close()
+    return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(url: str, path: str, payload: Dict[str, Any], concurrency: int, timeout: float) -> Dict[str, Any]:
+    parsed = urlparse(url)
+    host = parsed.hostname or "localhost"
+    port = parsed.port or 80
+    body = json.dumps(payload).encode("utf-8")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        open_stream(host, port, path, body, timeout) for _ in range(concurrency)
+    ])
+    wall = time.perf_counter() - started
+
+    ttfes = [r["ttfe"] for r in results if r["ttfe"] is not None]
+    totals = [r["total"] for r in results if r["ok"]]
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "completed": sum(1 for r in results if r["ok"]),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "ttfe_p50": statistics.median(ttfes) if ttfes else float("nan"),
+        "ttfe_p95": percentile(ttfes, 95),
+        "total_p50": statistics.median(totals) if totals else float("nan"),
+        "total_p95": percentile(totals, 95),
+        "wall": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE 동시 스트림 용량 벤치마크")
+    parser.add_argument("--url", action="append", help="API 서버 URL (여러 번 지정 가능)")
+    parser.add_argument("--path", default="/api/diagnosis/stream", help="스트리밍 엔드포인트 경로")
+    parser.add_argument("--llm-provider", default=None, help="요청에 포함할 llm_provider")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--timeout", type=float, default=120.0, help="스트림당 타임아웃(초)")
+    args = parser.parse_args()
+
+    urls = args.url or ["http://localhost:8000"]
+    payload = dict(DEFAULT_PAYLOAD)
+    if args.llm_provider:
+        payload["llm_provider"] = args.llm_provider
+
+    print(f"{'url':<28} {'conc':>6} {'ok':>6} {'fail':>6} {'ttfe p50':>9} {'ttfe p95':>9} {'total p50':>10} {'total p95':>10} {'wall':>8}")
+    for url in urls:
+        for concurrency in args.concurrency:
+            r = asyncio.run(run_level(url, args.path, payload, concurrency, args.timeout))
+            print(
+                f"{r['url']:<28} {r['concurrency']:>6} {r['completed']:>6} {r['failed']:>6} "
+                f"{r['ttfe_p50']:>9.3f} {r['ttfe_p95']:>9.3f} {r['total_p50']:>10.3f} {r['total_p95']:>10.3f} {r['wall']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+SSE 청크 병합 벤치마크
+
+LLM 토큰 크기의 작은 청크 스트림을 hrm_agent_api.sse_stream과 같은 방식으로 SSE 이벤트로
+만들고, app.py 프록시 단계까지 거쳤을 때의 이벤트 수/초당 이벤트 수/스트림당 CPU 시간을
+병합 전(이벤트당 청크 1개 + 프록시 줄 단위 재구성)과 병합 후(sse.coalesce_* + 바이트 중계)로
+비교합니다. 서버 없이 프로세스 안에서 실행됩니다.
+
+사용법:
+    python bench_sse_coalescing.py
+    python bench_sse_coalescing.py --chunks 2000 --streams 200 --coalesce-bytes 512 --coalesce-ms 30
+    python bench_sse_coalescing.py --token-interval-ms 2 --streams 5   # 실제 토큰 간격을 흉내낸 지연 측정
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+from typing import Dict, Iterator, List
+
+from agents.stream_coalescer import coalesce_chunks
+
+SAMPLE_TEXT = (
+    "결론: 자가 조치 가능. 필터 청소 주기가 지났으며 실외기 주변 통풍이 원활하지 않아 냉방 효율이 떨어졌습니다. "
+    "Conclusion: self-repairable. The filter is overdue for cleaning and airflow around the outdoor unit is restricted. "
+)
+
+
+def token_chunks(count: int, interval_ms: float, seed: int = 7) -> Iterator[str]:
+    """LLM 스트리밍과 비슷한 1~6자 길이의 청크를 생성합니다."""
+    rng = random.Random(seed)
+    pos = 0
+    for _ in range(count):
+        size = rng.randint(1, 6)
+        chunk = (SAMPLE_TEXT * 2)[pos:pos + size]
+        pos = (pos + size) % len(SAMPLE_TEXT)
+        if interval_ms:
+            time.sleep(interval_ms / 1000.0)
+        yield chunk
+
+
+def sse_event(payload: Dict) -> str:
+    # hrm_agent_api.sse_event와 동일한 프레이밍
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def server_events(chunks: Iterator[str], coalesce_bytes: int, coalesce_ms: float) -> Iterator[bytes]:
+    """hrm_agent_api.sse_stream과 같은 순서로 이벤트를 만들고 WSGI처럼 이벤트마다 인코딩합니다."""
+    yield sse_event({'chunk': '', 'done': False}).encode("utf-8")
+    for chunk in coalesce_chunks(chunks, coalesce_bytes, coalesce_ms):
+        yield sse_event({'chunk': chunk, 'done': False}).encode("utf-8")
+    yield sse_event({'chunk': '', 'done': True}).encode("utf-8")
+
+
+def proxy_reframe(events: Iterator[bytes]) -> Iterator[str]:
+    """기존 app.py 프록시: 줄 단위로 디코딩한 뒤 data 줄을 다시 SSE 이벤트로 만듭니다."""
+    pending = b""
+    for data in events:
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for raw in lines:
+            line = raw.decode("utf-8")
+            if line.startswith('data: '):
+                yield f"{line}\n\n"
+
+
+def proxy_passthrough(events: Iterator[bytes]) -> Iterator[bytes]:
+    """변경된 app.py 프록시: 업스트림 바이트를 그대로 중계합니다."""
+    yield from events
+
+
+def run_stream(args: argparse.Namespace, coalesce: bool) -> Dict[str, float]:
+    chunks = token_chunks(args.chunks, args.token_interval_ms)
+    events = server_events(chunks, args.coalesce_bytes if coalesce else 0, args.coalesce_ms)
+    proxied = proxy_passthrough(events) if coalesce else proxy_reframe(events)
+
+    sink = io.BytesIO()
+    writes = 0
+    max_gap = 0.0
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    last = wall_started
+    for item in proxied:
+        # 브라우저로 나가는 write 한 번 (WSGI 서버는 이벤트마다 flush)
+        sink.write(item if isinstance(item, bytes) else item.encode("utf-8"))
+        writes += 1
+        now = time.perf_counter()
+        max_gap = max(max_gap, now - last)
+        last = now
+    return {
+        "events": writes,
+        "bytes": sink.tell(),
+        "cpu": time.process_time() - cpu_started,
+        "wall": time.perf_counter() - wall_started,
+        "max_gap": max_gap,
+    }
+
+
+def report(label: str, results: List[Dict[str, float]]) -> Dict[str, float]:
+    events = sum(r["events"] for r in results)
+    cpu = sum(r["cpu"] for r in results)
+    wall = sum(r["wall"] for r in results)
+    summary = {
+        "events_per_stream": events / len(results),
+        "events_per_sec": events / wall if wall else 0.0,
+        "cpu_ms_per_stream": cpu * 1000 / len(results),
+        "bytes_per_stream": sum(r["bytes"] for r in results) / len(results),
+        "max_gap_ms": max(r["max_gap"] for r in results) * 1000,
+    }
+    print(
+        f"{label:<10} events/stream={summary['events_per_stream']:>8.1f}  "
+        f"events/s={summary['events_per_sec']:>10.0f}  "
+        f"cpu/stream={summary['cpu_ms_per_stream']:>7.2f}ms  "
+        f"bytes/stream={summary['bytes_per_stream']:>9.0f}  "
+        f"max_gap={summary['max_gap_ms']:>6.1f}ms"
+    )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SSE 청크 병합 벤치마크")
+    parser.add_argument("--chunks", type=int, default=1500, help="스트림당 LLM 청크 수")
+    parser.add_argument("--streams", type=int, default=100, help="측정할 스트림 수")
+    parser.add_argument("--coalesce-bytes", type=int, default=512, help="sse.coalesce_bytes")
+    parser.add_argument("--coalesce-ms", type=float, default=30.0, help="sse.coalesce_ms")
+    parser.add_argument("--token-interval-ms", type=float, default=0.0, help="청크 사이 지연(ms)")
+    args = parser.parse_args()
+
+    print(f"chunks/stream={args.chunks} streams={args.streams} "
+          f"coalesce_bytes={args.coalesce_bytes} coalesce_ms={args.coalesce_ms} "
+          f"token_interval_ms={args.token_interval_ms}")
+    before = report("before", [run_stream(args, coalesce=False) for _ in range(args.streams)])
+    after = report("after", [run_stream(args, coalesce=True) for _ in range(args.streams)])
+    if after["cpu_ms_per_stream"]:
+        print(f"CPU 감소: {before['cpu_ms_per_stream'] / after['cpu_ms_per_stream']:.1f}x, "
+              f"이벤트 감소: {before['events_per_stream'] / after['events_per_stream']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
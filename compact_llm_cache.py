@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+프롬프트 단위 LLM 응답 캐시(SQLite) 오프라인 정리 도구
+
+configure.json의 llm_cache 설정(path, max_bytes)을 읽어 만료된 항목을 삭제하고,
+전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거한 뒤
+VACUUM으로 파일 크기를 줄입니다. VACUUM은 파일 전체를 다시 쓰므로 서버가
+한가한 시간이나 배포 중에 실행하세요.
+
+사용법:
+    python compact_llm_cache.py
+    python compact_llm_cache.py --stats
+    python compact_llm_cache.py --path cache/llm_cache.sqlite3 --max-bytes 134217728
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from agents.config import get_section
+from agents.llm_client_cached import llm_cache_path
+from agents.response_cache import SQLiteCacheBackend
+
+
+def main() -> int:
+    cfg = get_section("llm_cache")
+    parser = argparse.ArgumentParser(description="LLM 응답 캐시 정리(만료 삭제, 크기 제한, VACUUM)")
+    parser.add_argument("--path", default=llm_cache_path(cfg), help="캐시 SQLite 파일 경로")
+    parser.add_argument(
+        "--max-bytes", type=int, default=cfg.get("max_bytes", 256 * 1024 * 1024), help="정리 후 최대 크기(바이트)"
+    )
+    parser.add_argument("--stats", action="store_true", help="정리하지 않고 현재 상태만 출력")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"캐시 파일이 없습니다: {args.path}")
+        return 1
+
+    backend = SQLiteCacheBackend(args.path, max_bytes=args.max_bytes)
+    if args.stats:
+        entries, size = backend.usage()
+        result = {"entries": entries, "bytes": size, "file_bytes": backend.file_bytes()}
+    else:
+        result = backend.compact()
+    print(json.dumps({"path": args.path, **result}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
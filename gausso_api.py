@@ -2,7 +2,12 @@ import requests
 import base64
 import json
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, Optional, Tuple
+
+from agents.cancellation import raise_if_cancelled
+from agents.http_pool import abort_on_cancel, get_async_http_client, get_http_client
+
+MODEL = "gausso-owl-ultra-instruct"
 
 
 class GaussOAPI:
@@ -48,7 +53,7 @@ class GaussOAPI:
             url = f"{self.base_url}/models"
             print(f"🔍 GET 요청: {url}")
             
-            response = requests.get(url, headers=self.headers)
+            response = get_http_client(url).request("GET", url, headers=self.headers)
             
             print(f"📡 응답 상태 코드: {response.status_code}")
             
@@ -81,7 +86,7 @@ class GaussOAPI:
         
         Args:
             message: 사용자 메시지
-            **kwargs: 추가 파라미터 (top_p, temperature, repetition_penalty 등)
+            **kwargs: 추가 파라미터 (top_p, temperature, repetition_penalty, timeout(초) 등)
             
         Returns:
             API 응답 또는 None (에러 시)
@@ -93,7 +98,7 @@ class GaussOAPI:
             
             # 기본 파라미터 설정
             payload = {
-                "model": "gausso-owl-ultra-instruct",
+                "model": MODEL,
                 "messages": [
                     {
                         "role": "user",
@@ -106,7 +111,8 @@ class GaussOAPI:
                 "stream": kwargs.get('stream', False)
             }
             
-            response = requests.post(url, headers=self.headers, json=payload)
+            # 연결 재사용 + 429/5xx 재시도(Retry-After 준수); timeout은 재시도를 포함한 전체 예산
+            response = get_http_client(url).request("POST", url, headers=self.headers, json=payload, timeout=kwargs.get('timeout'))
             
             print(f"📡 응답 상태 코드: {response.status_code}")
             
@@ -146,6 +152,138 @@ class GaussOAPI:
             print(f"❌ 예상치 못한 에러: {e}")
             return None
 
+    def _stream_payload(self, message: str, **kwargs) -> Dict[str, Any]:
+        """스트리밍 요청 본문 (top_p, temperature, repetition_penalty 기본값 포함)"""
+        return {
+            "model": MODEL,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": message
+                }
+            ],
+            "top_p": kwargs.get('top_p', 0.96),
+            "temperature": kwargs.get('temperature', 0.3),
+            "repetition_penalty": kwargs.get('repetition_penalty', 1.03),
+            "stream": True
+        }
+
+    @staticmethod
+    def _parse_stream_line(line: bytes) -> Tuple[Optional[str], bool]:
+        """SSE 한 줄을 (텍스트 조각 또는 None, 스트림 종료 여부)로 변환"""
+        if not line or not line.startswith(b"data:"):
+            return None, False
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return None, True
+        try:
+            choice = json.loads(data)["choices"][0]
+        except (ValueError, KeyError, IndexError):
+            return None, False
+        return (choice.get("delta") or {}).get("content") or None, bool(choice.get("finish_reason"))
+
+    def stream_chat_completion(self, message: str, **kwargs) -> Iterator[str]:
+        """
+        POST /chat/completions (stream=True) - 응답 토큰을 받는 즉시 하나씩 반환
+
+        서버가 보내는 SSE 청크(`data: {...}`)를 `iter_lines`로 읽으며
+        `choices[0].delta.content`를 yield합니다. 스트리밍을 지원하지 않아
+        JSON 한 번으로 응답하는 경우에는 전체 내용을 한 번에 yield합니다.
+
+        Args:
+            message: 사용자 메시지
+            **kwargs: 추가 파라미터 (top_p, temperature, repetition_penalty, timeout(초),
+                cancel_token(CancellationToken, 취소되면 응답 연결을 즉시 끊음) 등)
+
+        Yields:
+            응답 텍스트 조각
+
+        Raises:
+            requests.exceptions.RequestException: 재시도 후에도 실패한 네트워크 에러 또는 200 이외의 응답
+            GenerationCancelled: cancel_token이 취소되어 응답을 끊은 경우
+        """
+        url = f"{self.base_url}/chat/completions"
+        payload = self._stream_payload(message, **kwargs)
+        headers = {**self.headers, "accept": "text/event-stream"}
+        cancel_token = kwargs.get('cancel_token')
+
+        response = get_http_client(url).request(
+            "POST", url, headers=headers, json=payload, stream=True, timeout=kwargs.get('timeout')
+        )
+        # 다음 토큰을 기다리며 막혀 있는 읽기도 취소 즉시 풀리도록 연결을 끊음
+        reading_done = abort_on_cancel(response, cancel_token)
+        try:
+            if response.status_code == 429:
+                print("⚠️  Rate limit 초과 (분당 20회 제한, 재시도 소진)")
+            response.raise_for_status()
+
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                result = response.json()
+                content = result.get('choices', [{}])[0].get('message', {}).get('content') or ""
+                if content:
+                    yield content
+                return
+
+            # 줄 단위로 끊어 읽으므로 멀티바이트 문자가 청크 경계에서 잘리지 않음
+            for line in response.iter_lines():
+                content, finished = self._parse_stream_line(line)
+                if content:
+                    yield content
+                if finished:
+                    break
+        except requests.exceptions.RequestException:
+            # 취소로 끊은 연결의 읽기 오류는 네트워크 에러가 아니라 취소로 알림
+            raise_if_cancelled(cancel_token)
+            raise
+        finally:
+            reading_done()
+            # 중간에 소비가 중단되어도(클라이언트 종료, 취소) 연결을 바로 반환
+            response.close()
+        # 끊긴 연결은 본문이 끝난 것처럼 읽히므로, 잘린 응답이 완료로 처리되지 않게 확인
+        raise_if_cancelled(cancel_token)
+
+    async def astream_chat_completion(self, message: str, **kwargs) -> AsyncIterator[str]:
+        """
+        stream_chat_completion의 비동기 버전 (httpx.AsyncClient, 이벤트 루프를 막지 않음)
+
+        Args:
+            message: 사용자 메시지
+            **kwargs: 추가 파라미터 (top_p, temperature, repetition_penalty, timeout(초) 등)
+
+        Yields:
+            응답 텍스트 조각
+
+        Raises:
+            httpx.HTTPError: 재시도 후에도 실패한 네트워크 에러 또는 200 이외의 응답
+        """
+        url = f"{self.base_url}/chat/completions"
+        payload = self._stream_payload(message, **kwargs)
+        headers = {**self.headers, "accept": "text/event-stream"}
+
+        response = await get_async_http_client(url).request(
+            "POST", url, headers=headers, json=payload, stream=True, timeout=kwargs.get('timeout')
+        )
+        try:
+            if response.status_code == 429:
+                print("⚠️  Rate limit 초과 (분당 20회 제한, 재시도 소진)")
+            response.raise_for_status()
+
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                result = json.loads(await response.aread())
+                content = result.get('choices', [{}])[0].get('message', {}).get('content') or ""
+                if content:
+                    yield content
+                return
+
+            async for line in response.aiter_lines():
+                content, finished = self._parse_stream_line(line.encode("utf-8"))
+                if content:
+                    yield content
+                if finished:
+                    break
+        finally:
+            await response.aclose()
+
 
 def main():
     """
@@ -7,10 +7,28 @@ import sys
 import os
 from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional, Generator
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, AsyncIterable, AsyncIterator, Generator, Callable, Iterable, Tuple
 from agents.root_agent import RootAgent
+from agents.agent_pool import RootAgentPool
+from agents.admission import AdmissionRejected, Ticket, get_admission_controller
+from agents.llm_providers import _canonical_provider, get_llm_client_registry, hedging_stats
+from agents.http_pool import http_pool_stats
+from agents.llm_client_cached import llm_cache_stats
+from agents.prompt_registry import get_prompt_registry
+from agents.rate_limit import rate_limit_stats
+from agents.response_cache import get_response_cache
+from agents.single_flight import get_single_flight
+from agents.metrics import CONTENT_TYPE, instrument_flask_app, registry, request_labels
+from agents.stream_coalescer import acoalesce_chunks, coalesce_chunks
+from agents.jobs import JOB_KINDS, JobManager, build_job_manager
+from agents.stream_buffer import BufferOverrun
+from agents.stream_sessions import StreamSession, StreamSessionRegistry
+from agents.cancellation import TIMEOUT_HEADER, CancellationToken, GenerationCancelled, cancellable, parse_timeout
 
 # 로깅 설정
 logging.basicConfig(
@@ -40,6 +58,201 @@ def load_config() -> Dict[str, Any]:
     except Exception:
         return {"language": "ko", "llm": {"provider": "openai"}}
 
+config = load_config()
+
+# llm_provider별 RootAgent 풀 (요청마다 새로 생성하지 않고 재사용)
+_pool_config = config.get("agent_pool", {}) if isinstance(config.get("agent_pool", {}), dict) else {}
+agent_pool = RootAgentPool(max_size=_pool_config.get("max_size", 8))
+
+def get_agent(llm_provider: Optional[str]) -> RootAgent:
+    """llm_provider가 지정되면 풀에서, 아니면 기본 RootAgent를 반환합니다."""
+    return agent_pool.get(llm_provider) if llm_provider else root_agent
+
+# provider별 동시성/속도 제한 (build_llm 호출 전에 요청 단위로 적용)
+admission = get_admission_controller()
+
+def resolve_provider(llm_provider: Optional[str]) -> str:
+    """요청에 사용될 LLM provider의 정식 이름을 반환합니다 (aws -> bedrock 등).
+
+    별칭이 같은 provider 제한을 공유하도록 admission 키로 사용합니다. 지원하지 않는
+    provider면 ValueError를 발생시킵니다.
+    """
+    if llm_provider:
+        return _canonical_provider(str(llm_provider))
+    if root_agent is not None:
+        return _canonical_provider(str(root_agent.provider))
+    return _canonical_provider(str(config.get("llm", {}).get("provider", "openai")))
+
+def validate_provider(data: Dict[str, Any]) -> Optional[str]:
+    """요청 본문의 llm_provider를 검증하고, 지원하지 않는 provider면 오류 메시지를 반환합니다."""
+    llm_provider = data.get('llm_provider')
+    if not llm_provider:
+        return None
+    try:
+        resolve_provider(llm_provider)
+    except ValueError:
+        return f"지원하지 않는 llm_provider입니다: {llm_provider}"
+    return None
+
+# 도구 호출은 LLM provider 슬롯을 쓰지 않도록 별도의 admission 키로 제한합니다
+TOOLS_ADMISSION_KEY = "tools"
+
+# 파이프라인 요청 시점에 차감하는 LLM 호출 수(진단, 운영 이력). 조치 가이드 단계는
+# 실제로 실행될 때 RootAgent.run_pipeline이 추가로 차감합니다
+PIPELINE_ADMISSION_COST = 2
+
+def admit_request(
+    llm_provider: Optional[str],
+    cost: int = 1,
+    timeout: Optional[float] = None,
+    key: Optional[str] = None,
+) -> Ticket:
+    """provider 슬롯을 확보합니다. 대기 한도를 넘기면 AdmissionRejected를 발생시킵니다.
+
+    cost는 요청이 소비하는 LLM 호출 수(속도 제한 토큰 수)입니다. timeout을 주면
+    (요청의 남은 마감 시간) 대기 시간이 그보다 길어지지 않습니다. key를 주면 provider 대신
+    그 admission 키(예: TOOLS_ADMISSION_KEY)로 슬롯을 확보합니다.
+    """
+    return admission.admit(key or resolve_provider(llm_provider), cost=cost, timeout=timeout)
+
+# 요청 마감 시간 (X-Request-Timeout 헤더 또는 본문 timeout 필드, 초 단위)
+_timeouts_config = config.get("timeouts", {}) if isinstance(config.get("timeouts", {}), dict) else {}
+DEFAULT_REQUEST_TIMEOUT = float(_timeouts_config.get("request_seconds", 300))
+MAX_REQUEST_TIMEOUT = float(_timeouts_config.get("max_request_seconds", 600))
+
+def request_timeout(header_value: Optional[str], data: Optional[Dict[str, Any]]) -> float:
+    """요청 마감 시간(초)을 반환합니다. 헤더, 본문 timeout 필드, 기본값 순으로 사용합니다."""
+    body_value = data.get('timeout') if isinstance(data, dict) else None
+    return parse_timeout(header_value, body_value, default=DEFAULT_REQUEST_TIMEOUT, maximum=MAX_REQUEST_TIMEOUT)
+
+def job_timeout(header_value: Optional[str], data: Optional[Dict[str, Any]]) -> Optional[float]:
+    """작업 실행 마감 시간(초)을 반환합니다. 작업은 연결과 무관하게 실행되므로 헤더나 본문
+    timeout 필드로 지정한 경우에만 적용하고, 기본값 없이 None을 반환합니다."""
+    body_value = data.get('timeout') if isinstance(data, dict) else None
+    return parse_timeout(header_value, body_value, maximum=MAX_REQUEST_TIMEOUT)
+
+def collect_with_deadline(llm_provider: Optional[str], chunks: Iterable[str], token: CancellationToken) -> Tuple[str, bool]:
+    """provider 슬롯을 확보한 뒤 청크를 수집하고 (결과, 마감 초과 여부)를 반환합니다.
+
+    슬롯 대기와 검색/LLM 호출은 token의 남은 마감 시간만 사용합니다. 마감 시간이 지나
+    생성이 중단되면 그때까지의 부분 결과를 반환합니다.
+    """
+    result = ""
+    try:
+        with admit_request(llm_provider, timeout=token.remaining()):
+            for chunk in chunks:
+                result += chunk
+    except GenerationCancelled as e:
+        logger.warning(f"요청 마감 시간 초과로 생성 중단 ({e.reason}), 부분 결과 {len(result)}자")
+        return result, True
+    return result, False
+
+def create_result_response(data: Dict[str, Any], timed_out: bool):
+    """생성 결과 응답을 만듭니다. 마감 시간 초과로 중단된 경우 부분 결과를 504로 반환합니다."""
+    if timed_out:
+        return jsonify({"success": False, "error": "요청 처리 시간이 초과되었습니다.", "partial": True, "data": data}), 504
+    return create_success_response(data)
+
+def rate_limited_response(e: AdmissionRejected):
+    """429 응답을 Retry-After 헤더와 함께 생성합니다."""
+    logger.warning(f"요청 거부 ({e.provider}, {e.reason})")
+    response, status_code = create_error_response(f"요청이 많아 처리할 수 없습니다. {e.retry_after}초 후 다시 시도하세요.", 429)
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, status_code
+
+# 배치 요청용 provider별 공유 스레드 풀 (동시 요청 전체에 대해 provider별 동시성 제한)
+_batch_config = config.get("batch", {}) if isinstance(config.get("batch", {}), dict) else {}
+_batch_executors: Dict[str, ThreadPoolExecutor] = {}
+_batch_executors_lock = threading.Lock()
+
+def get_batch_executor(provider: str) -> ThreadPoolExecutor:
+    """provider별 동시성 제한(batch.max_concurrency)이 적용된 스레드 풀을 반환합니다.
+
+    풀은 정식 provider 이름마다 하나이며 종료되지 않으므로, 지원하지 않는 provider는
+    풀을 만들기 전에 ValueError로 거부합니다.
+    """
+    key = resolve_provider(provider)
+    with _batch_executors_lock:
+        executor = _batch_executors.get(key)
+        if executor is None:
+            limits = _batch_config.get("max_concurrency", {})
+            if isinstance(limits, dict):
+                limit = limits.get(key, limits.get("default", 4))
+            else:
+                limit = limits
+            executor = ThreadPoolExecutor(max_workers=max(1, int(limit)), thread_name_prefix=f"batch-{key}")
+            _batch_executors[key] = executor
+        return executor
+
+def validate_batch_items(data: Dict[str, Any]) -> Optional[str]:
+    """배치 요청 본문을 검증하고, 오류가 있으면 메시지를 반환합니다."""
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return "items 목록이 필요합니다."
+    max_items = int(_batch_config.get("max_items", 1000))
+    if len(items) > max_items:
+        return f"items는 최대 {max_items}개까지 허용됩니다."
+    return validate_provider(data)
+
+# 비동기 작업(Job) 관리자 (첫 사용 시 생성, sqlite 저장소 + 워커 풀)
+_jobs_config = config.get("jobs", {}) if isinstance(config.get("jobs", {}), dict) else {}
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+JOB_PARAM_KEYS = ('analytics', 'operation_history', 'diagnosis_summary', 'category', 'language', 'require_self_repair')
+
+def get_job_manager() -> JobManager:
+    """작업 관리자를 반환합니다."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = build_job_manager(_jobs_config, get_agent)
+        return _job_manager
+
+def validate_job_request(data: Dict[str, Any]) -> Optional[str]:
+    """작업 생성 요청 본문을 검증하고, 오류가 있으면 메시지를 반환합니다."""
+    kind = data.get('kind')
+    if kind not in JOB_KINDS:
+        return f"kind는 {', '.join(JOB_KINDS)} 중 하나여야 합니다."
+    if kind in ('diagnosis', 'pipeline') and not data.get('analytics'):
+        return "analytics 데이터가 필요합니다."
+    if kind == 'operation_history' and not data.get('operation_history'):
+        return "operation_history 데이터가 필요합니다."
+    if kind == 'actions_guide':
+        if not data.get('diagnosis_summary'):
+            return "diagnosis_summary가 필요합니다."
+        if str(data.get('language', 'ko')).lower() != 'ko':
+            return "한국어에서만 지원됩니다."
+    return validate_provider(data)
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """저장된 작업 레코드를 API 응답 형식으로 변환합니다."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "llm_provider": job["llm_provider"],
+        "output": job["output"],
+        "errors": job["errors"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+def ndjson_stream(results_factory: Callable[[], Iterable[Dict[str, Any]]], error_label: str) -> Generator[str, None, None]:
+    """결과 dict 제너레이터를 완료 순서대로 NDJSON 라인으로 변환합니다."""
+    try:
+        for result in results_factory():
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"{error_label} 중 오류: {e}")
+        yield json.dumps({"success": False, "error": str(e)}, ensure_ascii=False) + "\n"
+
+def ndjson_response(lines: Iterable[str]) -> Response:
+    """NDJSON 라인 제너레이터로 스트리밍 응답을 생성합니다."""
+    return Response(lines, mimetype='application/x-ndjson', headers=SSE_HEADERS)
+
 def initialize_root_agent():
     """RootAgent를 초기화합니다."""
     global root_agent
@@ -58,6 +271,173 @@ def create_success_response(data: Any) -> dict:
     """성공 응답을 생성합니다."""
     return jsonify({"success": True, "data": data})
 
+# SSE 청크 병합 설정 (coalesce_bytes가 0이면 병합하지 않음)
+_sse_config = config.get("sse", {}) if isinstance(config.get("sse", {}), dict) else {}
+SSE_COALESCE_BYTES = int(_sse_config.get("coalesce_bytes", 512))
+SSE_COALESCE_MS = float(_sse_config.get("coalesce_ms", 30))
+SSE_KEEPALIVE_SECONDS = float(_sse_config.get("keepalive_seconds", 10))
+
+# 재연결(Last-Event-ID) 시 이어받을 수 있도록 생성 중이거나 최근 완료된 스트림을 보관
+# 클라이언트가 cancel_grace_seconds 동안 돌아오지 않으면 생성을 취소합니다
+sse_sessions = StreamSessionRegistry(
+    max_sessions=_sse_config.get("resume_max_sessions", 1000),
+    ttl_seconds=_sse_config.get("resume_ttl_seconds", 300),
+    max_events=_sse_config.get("resume_max_events", 2000),
+    cancel_grace_seconds=_sse_config.get("cancel_grace_seconds", 15),
+    max_workers=_sse_config.get("max_producers", 32),
+)
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'X-Accel-Buffering': 'no'
+}
+
+def sse_event(payload: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """SSE 프레임 하나를 생성합니다. event_id가 있으면 id 필드를 함께 보냅니다."""
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+    return f"data: {json.dumps(payload)}\n\n"
+
+def sse_payloads(chunks_factory: Callable[[], Iterable[Any]], error_label: str) -> Generator[Dict[str, Any], None, None]:
+    """청크 제너레이터를 SSE 이벤트 payload(dict) 스트림으로 변환합니다.
+
+    Flask 라우트와 ASGI 서버(hrm_agent_asgi.py)가 동일한 SSE 계약을 공유합니다.
+    문자열 청크는 {'chunk'} 이벤트로, dict 청크(파이프라인의 stage 태그 이벤트 등)는
+    필드를 그대로 실어 보냅니다. 연속된 작은 텍스트 청크는 sse.coalesce_bytes /
+    sse.coalesce_ms 기준으로 병합해 이벤트 수를 줄입니다.
+    """
+    try:
+        chunks = coalesce_chunks(chunks_factory(), SSE_COALESCE_BYTES, SSE_COALESCE_MS)
+        
+        # 초기 하트비트 전송
+        yield {'chunk': '', 'done': False}
+        
+        for chunk in chunks:
+            if isinstance(chunk, dict):
+                yield {'chunk': '', **chunk, 'done': False}
+            else:
+                yield {'chunk': chunk, 'done': False}
+        
+        # 완료 신호
+        yield {'chunk': '', 'done': True}
+        
+    except GenerationCancelled as e:
+        logger.info(f"{error_label} 취소: {e.reason}")
+        yield {'error': str(e), 'cancelled': True, 'reason': e.reason, 'done': True}
+    except Exception as e:
+        logger.error(f"{error_label} 중 오류: {e}")
+        yield {'error': str(e), 'done': True}
+
+async def asse_payloads(
+    chunks_factory: Callable[[], AsyncIterable[Any]], error_label: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """sse_payloads의 비동기 버전입니다 (ASGI 서버가 RootAgent.arun_*을 구동할 때 사용)."""
+    try:
+        chunks = acoalesce_chunks(chunks_factory(), SSE_COALESCE_BYTES, SSE_COALESCE_MS)
+        
+        yield {'chunk': '', 'done': False}
+        
+        async for chunk in chunks:
+            if isinstance(chunk, dict):
+                yield {'chunk': '', **chunk, 'done': False}
+            else:
+                yield {'chunk': chunk, 'done': False}
+        
+        yield {'chunk': '', 'done': True}
+        
+    except GenerationCancelled as e:
+        logger.info(f"{error_label} 취소: {e.reason}")
+        yield {'error': str(e), 'cancelled': True, 'reason': e.reason, 'done': True}
+    except Exception as e:
+        logger.error(f"{error_label} 중 오류: {e}")
+        yield {'error': str(e), 'done': True}
+
+def sse_stream(chunks_factory: Callable[[], Iterable[Any]], error_label: str) -> Generator[str, None, None]:
+    """청크 제너레이터를 SSE 이벤트 스트림으로 변환합니다 (재연결 불가, 연결과 생성의 수명이 같음)."""
+    for payload in sse_payloads(chunks_factory, error_label):
+        yield sse_event(payload)
+
+def stream_scope(route: str, data: Any) -> str:
+    """재연결 대상 세션을 식별하는 값(경로 + 요청 본문 해시)을 만듭니다."""
+    body = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{route}#{hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]}"
+
+def open_sse_stream(
+    chunks_factory: Callable[[CancellationToken], Iterable[Any]],
+    error_label: str,
+    llm_provider: Optional[str],
+    last_event_id: Optional[str] = None,
+    cost: int = 1,
+    timeout: Optional[float] = None,
+    scope: Optional[str] = None,
+    admission_key: Optional[str] = None,
+) -> Generator[str, None, None]:
+    """재연결 가능한 SSE 스트림을 엽니다.
+
+    Last-Event-ID가 생성 중이거나 최근 완료된 스트림을 가리키면 새 LLM 생성 없이 그 다음
+    이벤트부터 이어서 보냅니다. 그렇지 않으면 provider 슬롯을 확보(AdmissionRejected 가능)한
+    뒤 백그라운드에서 생성을 시작합니다. 생성은 클라이언트 연결과 별개로 진행되며, 슬롯은
+    생성이 끝날 때 반환됩니다. 각 이벤트의 id는 "<세션 id>:<순번>"입니다.
+    scope(stream_scope 참고)가 세션을 시작한 요청과 다르면 재연결하지 않고 새로 생성합니다.
+    admission_key는 admit_request의 key로 전달됩니다 (도구 호출).
+    재생 버퍼에서 이미 밀려난 이벤트를 읽어야 하면 건너뛰지 않고 gap 오류 이벤트로 스트림을 끝냅니다.
+
+    chunks_factory는 CancellationToken을 받아 RootAgent까지 전달해야 합니다. 읽는 클라이언트가
+    sse.cancel_grace_seconds 동안 없으면 토큰이 취소되어 LLM/검색 호출이 중단됩니다. 조용한
+    구간에도 끊긴 연결을 감지하도록 sse.keepalive_seconds마다 SSE 주석을 보냅니다.
+    timeout(초)은 슬롯 대기부터 생성 완료까지의 마감 시간으로, 지나면 생성이 취소됩니다.
+    """
+    resumed = sse_sessions.resume(last_event_id, scope)
+    if resumed is not None:
+        session, start = resumed
+        logger.info(f"SSE 스트림 재연결: session={session.id}, from={start}")
+    else:
+        token = CancellationToken(timeout)
+        ticket = admit_request(llm_provider, cost=cost, timeout=token.remaining(), key=admission_key)
+        try:
+            session = sse_sessions.start(
+                lambda token: sse_payloads(lambda: chunks_factory(token), error_label),
+                on_finish=ticket.release,
+                token=token,
+                scope=scope,
+            )
+        except Exception:
+            ticket.release()
+            raise
+        start = 0
+
+    return sse_session_events(session, start, error_label)
+
+def sse_session_events(session: StreamSession, start: int, error_label: str) -> Generator[str, None, None]:
+    """세션의 start번째 이벤트부터 SSE 프레임을 보냅니다 (출력이 없으면 keepalive 주석)."""
+    try:
+        for event_id, payload in session.events(start, SSE_KEEPALIVE_SECONDS):
+            yield sse_event(payload, event_id) if event_id is not None else ": keepalive\n\n"
+    except BufferOverrun as e:
+        # 느린 클라이언트가 재생 버퍼를 놓친 경우: 누락을 숨기지 않고 알린 뒤 종료
+        logger.warning(f"{error_label} 이벤트 누락: session={session.id}, {e}")
+        yield sse_event({'error': str(e), 'gap': True, 'missing_from': f"{session.id}:{e.index}", 'done': True})
+
+def sse_response(events: Iterable[str]) -> Response:
+    """SSE 이벤트 제너레이터로 스트리밍 응답을 생성합니다."""
+    return Response(events, mimetype='text/event-stream', headers=SSE_HEADERS)
+
+def request_metric_labels() -> Dict[str, Any]:
+    """요청 지연 시간 메트릭에 붙일 provider/language 라벨을 반환합니다."""
+    if request.method != 'POST':
+        return {}
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    return request_labels(data.get('llm_provider') or resolve_provider(None), data.get('language', 'ko'))
+
+instrument_flask_app(app, labels=request_metric_labels)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 형식의 메트릭(요청/단계별 지연 시간 히스토그램, 청크/문자/오류 카운터)을 반환합니다."""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
 @app.route('/health')
 def health():
     """헬스 체크 엔드포인트"""
@@ -67,6 +447,47 @@ def health():
         "root_agent_initialized": root_agent is not None
     })
 
+@app.route('/api/agent-pool')
+def get_agent_pool_stats():
+    """RootAgent 풀의 상태(hit/build/eviction 카운터)를 반환합니다."""
+    return create_success_response(agent_pool.stats())
+
+@app.route('/api/llm-clients')
+def get_llm_clients_stats():
+    """설정별로 공유되는 LLM 클라이언트 레지스트리 상태(재사용/생성/제거 카운터)와 업스트림 HTTP 연결 풀, 헤지 요청, 디스크 LLM 캐시 상태를 반환합니다."""
+    return create_success_response({
+        **get_llm_client_registry().stats(), "http_pools": http_pool_stats(), "hedging": hedging_stats(),
+        "llm_cache": llm_cache_stats(),
+    })
+
+@app.route('/api/prompts')
+def get_prompt_registry_stats():
+    """공유 프롬프트 템플릿 레지스트리 상태(현재 버전 해시, 재로드 횟수, 마지막 오류)를 반환합니다. 확인 시점에 prompt.json 변경 여부도 검사합니다."""
+    prompt_registry = get_prompt_registry()
+    prompt_registry.current()
+    return create_success_response(prompt_registry.stats())
+
+@app.route('/api/admission')
+def get_admission_stats():
+    """provider별 수락 제어 상태(진행 중/대기 중 요청 수, 대기 시간, 거부 수)와 호스트 공용 속도 제한 상태를 반환합니다."""
+    return create_success_response({**admission.stats(), "rate_limits": rate_limit_stats()})
+
+@app.route('/api/stream-sessions')
+def get_stream_sessions_stats():
+    """재연결 가능한 SSE 스트림 세션 상태(보관 중/생성 중 세션 수, 재연결 수)를 반환합니다."""
+    return create_success_response(sse_sessions.stats())
+
+@app.route('/api/cache')
+def get_response_cache_stats():
+    """에이전트 응답 캐시와 single-flight(동일 요청 병합) 상태를 반환합니다."""
+    try:
+        stats = get_response_cache().stats()
+        stats["single_flight"] = get_single_flight().stats()
+        return create_success_response(stats)
+    except Exception as e:
+        logger.error(f"응답 캐시 상태 조회 중 오류: {e}")
+        return create_error_response(f"응답 캐시 상태 조회 중 오류 발생: {str(e)}")
+
 @app.route('/api/capabilities')
 def get_capabilities():
     """RootAgent의 기능 목록을 반환합니다."""
@@ -106,6 +527,10 @@ def run_diagnosis():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         analytics = data.get('analytics')
         if not analytics:
             return create_error_response("analytics 데이터가 필요합니다.", 400)
@@ -113,20 +538,23 @@ def run_diagnosis():
         language = data.get('language', 'ko')
         llm_provider = data.get('llm_provider')
         
-        # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-        agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
+        # LLM provider가 지정된 경우 풀에서 RootAgent 인스턴스 조회
+        agent = get_agent(llm_provider)
         
-        # 진단 결과 수집
-        diagnosis_result = ""
-        for chunk in agent.run_diagnosis(analytics, language=language):
-            diagnosis_result += chunk
+        # 진단 결과 수집 (마감 시간이 지나면 부분 결과 반환)
+        token = CancellationToken(request_timeout(request.headers.get(TIMEOUT_HEADER), data))
+        diagnosis_result, timed_out = collect_with_deadline(
+            agent.provider, agent.run_diagnosis(analytics, language=language, cancel_token=token), token
+        )
         
-        return create_success_response({
+        return create_result_response({
             "diagnosis": diagnosis_result,
             "language": language,
             "llm_provider": llm_provider or agent.provider
-        })
+        }, timed_out)
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"진단 요약 생성 중 오류: {e}")
         return create_error_response(f"진단 요약 생성 중 오류 발생: {str(e)}")
@@ -142,6 +570,10 @@ def stream_diagnosis():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         analytics = data.get('analytics')
         if not analytics:
             return create_error_response("analytics 데이터가 필요합니다.", 400)
@@ -149,39 +581,51 @@ def stream_diagnosis():
         language = data.get('language', 'ko')
         llm_provider = data.get('llm_provider')
         
-        def generate():
-            try:
-                # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-                agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
-                
-                # 초기 하트비트 전송
-                yield f"data: {json.dumps({'chunk': '', 'done': False})}\n\n"
-                
-                # 스트리밍으로 진단 요약 생성
-                for chunk in agent.run_diagnosis(analytics, language=language):
-                    yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                
-                # 완료 신호
-                yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                
-            except Exception as e:
-                logger.error(f"스트리밍 진단 요약 생성 중 오류: {e}")
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
-        
-        return Response(
-            generate(),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+        return sse_response(open_sse_stream(
+            lambda token: get_agent(llm_provider).run_diagnosis(analytics, language=language, cancel_token=token),
+            "스트리밍 진단 요약 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=stream_scope(request.path, data),
+            timeout=request_timeout(request.headers.get(TIMEOUT_HEADER), data),
+        ))
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"스트리밍 진단 요약 생성 중 오류: {e}")
         return create_error_response(f"스트리밍 진단 요약 생성 중 오류 발생: {str(e)}")
 
+@app.route('/api/diagnosis/batch', methods=['POST'])
+def batch_diagnosis():
+    """여러 기기의 진단 요약을 동시에 생성하고 완료 순서대로 NDJSON으로 반환합니다."""
+    try:
+        if not root_agent:
+            return create_error_response("RootAgent가 초기화되지 않았습니다.", 500)
+        
+        data = request.get_json()
+        if not data:
+            return create_error_response("JSON 데이터가 필요합니다.", 400)
+        
+        error = validate_batch_items(data)
+        if error:
+            return create_error_response(error, 400)
+        
+        items = data['items']
+        llm_provider = data.get('llm_provider')
+        # 요청 마감 시간. 클라이언트가 연결을 끊으면 진행 중인 항목의 LLM 호출도 취소됩니다
+        token = CancellationToken(request_timeout(request.headers.get(TIMEOUT_HEADER), data))
+        
+        def results():
+            agent = get_agent(llm_provider)
+            return agent.run_diagnosis_batch(items, executor=get_batch_executor(agent.provider), cancel_token=token)
+        
+        return ndjson_response(ndjson_stream(results, "배치 진단 요약 생성"))
+        
+    except Exception as e:
+        logger.error(f"배치 진단 요약 생성 중 오류: {e}")
+        return create_error_response(f"배치 진단 요약 생성 중 오류 발생: {str(e)}")
+
 @app.route('/api/operation-history', methods=['POST'])
 def run_operation_history():
     """운영 이력 요약을 생성합니다."""
@@ -193,6 +637,10 @@ def run_operation_history():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         operation_history = data.get('operation_history')
         if not operation_history:
             return create_error_response("operation_history 데이터가 필요합니다.", 400)
@@ -200,20 +648,23 @@ def run_operation_history():
         language = data.get('language', 'ko')
         llm_provider = data.get('llm_provider')
         
-        # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-        agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
+        # LLM provider가 지정된 경우 풀에서 RootAgent 인스턴스 조회
+        agent = get_agent(llm_provider)
         
-        # 운영 이력 요약 결과 수집
-        history_result = ""
-        for chunk in agent.run_op_history(operation_history, language=language):
-            history_result += chunk
+        # 운영 이력 요약 결과 수집 (마감 시간이 지나면 부분 결과 반환)
+        token = CancellationToken(request_timeout(request.headers.get(TIMEOUT_HEADER), data))
+        history_result, timed_out = collect_with_deadline(
+            agent.provider, agent.run_op_history(operation_history, language=language, cancel_token=token), token
+        )
         
-        return create_success_response({
+        return create_result_response({
             "operation_history_summary": history_result,
             "language": language,
             "llm_provider": llm_provider or agent.provider
-        })
+        }, timed_out)
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"운영 이력 요약 생성 중 오류: {e}")
         return create_error_response(f"운영 이력 요약 생성 중 오류 발생: {str(e)}")
@@ -229,6 +680,10 @@ def stream_operation_history():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         operation_history = data.get('operation_history')
         if not operation_history:
             return create_error_response("operation_history 데이터가 필요합니다.", 400)
@@ -236,39 +691,51 @@ def stream_operation_history():
         language = data.get('language', 'ko')
         llm_provider = data.get('llm_provider')
         
-        def generate():
-            try:
-                # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-                agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
-                
-                # 초기 하트비트 전송
-                yield f"data: {json.dumps({'chunk': '', 'done': False})}\n\n"
-                
-                # 스트리밍으로 운영 이력 요약 생성
-                for chunk in agent.run_op_history(operation_history, language=language):
-                    yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                
-                # 완료 신호
-                yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                
-            except Exception as e:
-                logger.error(f"스트리밍 운영 이력 요약 생성 중 오류: {e}")
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
-        
-        return Response(
-            generate(),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+        return sse_response(open_sse_stream(
+            lambda token: get_agent(llm_provider).run_op_history(operation_history, language=language, cancel_token=token),
+            "스트리밍 운영 이력 요약 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=stream_scope(request.path, data),
+            timeout=request_timeout(request.headers.get(TIMEOUT_HEADER), data),
+        ))
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"스트리밍 운영 이력 요약 생성 중 오류: {e}")
         return create_error_response(f"스트리밍 운영 이력 요약 생성 중 오류 발생: {str(e)}")
 
+@app.route('/api/operation-history/batch', methods=['POST'])
+def batch_operation_history():
+    """여러 기기의 운영 이력 요약을 동시에 생성하고 완료 순서대로 NDJSON으로 반환합니다."""
+    try:
+        if not root_agent:
+            return create_error_response("RootAgent가 초기화되지 않았습니다.", 500)
+        
+        data = request.get_json()
+        if not data:
+            return create_error_response("JSON 데이터가 필요합니다.", 400)
+        
+        error = validate_batch_items(data)
+        if error:
+            return create_error_response(error, 400)
+        
+        items = data['items']
+        llm_provider = data.get('llm_provider')
+        # 요청 마감 시간. 클라이언트가 연결을 끊으면 진행 중인 항목의 LLM 호출도 취소됩니다
+        token = CancellationToken(request_timeout(request.headers.get(TIMEOUT_HEADER), data))
+        
+        def results():
+            agent = get_agent(llm_provider)
+            return agent.run_op_history_batch(items, executor=get_batch_executor(agent.provider), cancel_token=token)
+        
+        return ndjson_response(ndjson_stream(results, "배치 운영 이력 요약 생성"))
+        
+    except Exception as e:
+        logger.error(f"배치 운영 이력 요약 생성 중 오류: {e}")
+        return create_error_response(f"배치 운영 이력 요약 생성 중 오류 발생: {str(e)}")
+
 @app.route('/api/actions-guide', methods=['POST'])
 def run_actions_guide():
     """고객 조치 가이드를 생성합니다 (한국어 전용)."""
@@ -280,6 +747,10 @@ def run_actions_guide():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         diagnosis_summary = data.get('diagnosis_summary')
         if not diagnosis_summary:
             return create_error_response("diagnosis_summary가 필요합니다.", 400)
@@ -291,21 +762,26 @@ def run_actions_guide():
         if language.lower() != 'ko':
             return create_error_response("한국어에서만 지원됩니다.", 400)
         
-        # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-        agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
+        # LLM provider가 지정된 경우 풀에서 RootAgent 인스턴스 조회
+        agent = get_agent(llm_provider)
         
-        # 고객 조치 가이드 결과 수집
-        guide_result = ""
-        for chunk in agent.run_actions_guide(diagnosis_summary, category=category, language=language):
-            guide_result += chunk
+        # 고객 조치 가이드 결과 수집 (마감 시간이 지나면 부분 결과 반환)
+        token = CancellationToken(request_timeout(request.headers.get(TIMEOUT_HEADER), data))
+        guide_result, timed_out = collect_with_deadline(
+            agent.provider,
+            agent.run_actions_guide(diagnosis_summary, category=category, language=language, cancel_token=token),
+            token,
+        )
         
-        return create_success_response({
+        return create_result_response({
             "actions_guide": guide_result,
             "category": category,
             "language": language,
             "llm_provider": llm_provider or agent.provider
-        })
+        }, timed_out)
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"고객 조치 가이드 생성 중 오류: {e}")
         return create_error_response(f"고객 조치 가이드 생성 중 오류 발생: {str(e)}")
@@ -321,6 +797,10 @@ def stream_actions_guide():
         if not data:
             return create_error_response("JSON 데이터가 필요합니다.", 400)
         
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
         diagnosis_summary = data.get('diagnosis_summary')
         if not diagnosis_summary:
             return create_error_response("diagnosis_summary가 필요합니다.", 400)
@@ -332,39 +812,128 @@ def stream_actions_guide():
         if language.lower() != 'ko':
             return create_error_response("한국어에서만 지원됩니다.", 400)
         
-        def generate():
-            try:
-                # LLM provider가 지정된 경우 새로운 RootAgent 인스턴스 생성
-                agent = RootAgent(provider_override=llm_provider) if llm_provider else root_agent
-                
-                # 초기 하트비트 전송
-                yield f"data: {json.dumps({'chunk': '', 'done': False})}\n\n"
-                
-                # 스트리밍으로 고객 조치 가이드 생성
-                for chunk in agent.run_actions_guide(diagnosis_summary, category=category, language=language):
-                    yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                
-                # 완료 신호
-                yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                
-            except Exception as e:
-                logger.error(f"스트리밍 고객 조치 가이드 생성 중 오류: {e}")
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
-        
-        return Response(
-            generate(),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+        return sse_response(open_sse_stream(
+            lambda token: get_agent(llm_provider).run_actions_guide(
+                diagnosis_summary, category=category, language=language, cancel_token=token
+            ),
+            "스트리밍 고객 조치 가이드 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=stream_scope(request.path, data),
+            timeout=request_timeout(request.headers.get(TIMEOUT_HEADER), data),
+        ))
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"스트리밍 고객 조치 가이드 생성 중 오류: {e}")
         return create_error_response(f"스트리밍 고객 조치 가이드 생성 중 오류 발생: {str(e)}")
 
+@app.route('/api/pipeline/stream', methods=['POST'])
+def stream_pipeline():
+    """진단/운영 이력 요약을 동시에 생성하고, 진단 완료 즉시 조치 가이드를 이어서 생성합니다.
+
+    세 단계의 스트림을 하나의 SSE 연결로 다중화하며, 각 이벤트에는 stage가 포함됩니다.
+    """
+    try:
+        if not root_agent:
+            return create_error_response("RootAgent가 초기화되지 않았습니다.", 500)
+        
+        data = request.get_json()
+        if not data:
+            return create_error_response("JSON 데이터가 필요합니다.", 400)
+        
+        error = validate_provider(data)
+        if error:
+            return create_error_response(error, 400)
+        
+        analytics = data.get('analytics')
+        if not analytics:
+            return create_error_response("analytics 데이터가 필요합니다.", 400)
+        
+        operation_history = data.get('operation_history') or {}
+        category = data.get('category', '')
+        language = data.get('language', 'ko')
+        llm_provider = data.get('llm_provider')
+        require_self_repair = data.get('require_self_repair', True)
+        
+        return sse_response(open_sse_stream(
+            lambda token: get_agent(llm_provider).run_pipeline(
+                analytics,
+                operation_history,
+                category=category,
+                language=language,
+                require_self_repair=require_self_repair,
+                cancel_token=token,
+            ),
+            "스트리밍 파이프라인 실행",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=stream_scope(request.path, data),
+            cost=PIPELINE_ADMISSION_COST,
+            timeout=request_timeout(request.headers.get(TIMEOUT_HEADER), data),
+        ))
+        
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 파이프라인 실행 중 오류: {e}")
+        return create_error_response(f"스트리밍 파이프라인 실행 중 오류 발생: {str(e)}")
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """작업을 등록하고 즉시 job_id를 반환합니다. 결과는 /api/jobs/<job_id>로 조회합니다."""
+    try:
+        if not root_agent:
+            return create_error_response("RootAgent가 초기화되지 않았습니다.", 500)
+        
+        data = request.get_json()
+        if not data:
+            return create_error_response("JSON 데이터가 필요합니다.", 400)
+        
+        error = validate_job_request(data)
+        if error:
+            return create_error_response(error, 400)
+        
+        params = {key: data[key] for key in JOB_PARAM_KEYS if key in data}
+        timeout = job_timeout(request.headers.get(TIMEOUT_HEADER), data)
+        if timeout is not None:
+            params['timeout'] = timeout
+        job_id = get_job_manager().submit(data['kind'], params, data.get('llm_provider'))
+        
+        return create_success_response({"job_id": job_id, "kind": data['kind'], "status": "queued"}), 202
+        
+    except Exception as e:
+        logger.error(f"작업 등록 중 오류: {e}")
+        return create_error_response(f"작업 등록 중 오류 발생: {str(e)}")
+
+@app.route('/api/jobs/<string:job_id>')
+def get_job(job_id: str):
+    """작업 상태와 현재까지의 출력(진행 중이면 부분 출력)을 반환합니다."""
+    try:
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return create_error_response("작업을 찾을 수 없습니다.", 404)
+        return create_success_response(job_view(job))
+        
+    except Exception as e:
+        logger.error(f"작업 조회 중 오류: {e}")
+        return create_error_response(f"작업 조회 중 오류 발생: {str(e)}")
+
+@app.route('/api/jobs/<string:job_id>/stream')
+def stream_job(job_id: str):
+    """작업 출력을 처음부터 재생한 뒤, 진행 중이면 실시간 출력에 연결합니다."""
+    try:
+        manager = get_job_manager()
+        if manager.get(job_id) is None:
+            return create_error_response("작업을 찾을 수 없습니다.", 404)
+        
+        return sse_response(sse_stream(lambda: manager.stream(job_id), "작업 스트리밍"))
+        
+    except Exception as e:
+        logger.error(f"작업 스트리밍 중 오류: {e}")
+        return create_error_response(f"작업 스트리밍 중 오류 발생: {str(e)}")
+
 @app.route('/api/tools/<tool_name>', methods=['POST'])
 def call_tool(tool_name: str):
     """등록된 도구를 호출합니다."""
@@ -378,8 +947,9 @@ def call_tool(tool_name: str):
         
         # 도구 호출 결과 수집
         tool_result = ""
-        for chunk in root_agent.call_tool(tool_name, *args, **kwargs):
-            tool_result += chunk
+        with admit_request(None, key=TOOLS_ADMISSION_KEY):
+            for chunk in root_agent.call_tool(tool_name, *args, **kwargs):
+                tool_result += chunk
         
         return create_success_response({
             "tool_name": tool_name,
@@ -388,6 +958,8 @@ def call_tool(tool_name: str):
             "kwargs": kwargs
         })
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"도구 '{tool_name}' 호출 중 오류: {e}")
         return create_error_response(f"도구 '{tool_name}' 호출 중 오류 발생: {str(e)}")
@@ -403,32 +975,18 @@ def stream_tool(tool_name: str):
         args = data.get('args', [])
         kwargs = data.get('kwargs', {})
         
-        def generate():
-            try:
-                # 초기 하트비트 전송
-                yield f"data: {json.dumps({'chunk': '', 'done': False})}\n\n"
-                
-                # 스트리밍으로 도구 호출
-                for chunk in root_agent.call_tool(tool_name, *args, **kwargs):
-                    yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                
-                # 완료 신호
-                yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                
-            except Exception as e:
-                logger.error(f"스트리밍 도구 '{tool_name}' 호출 중 오류: {e}")
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
-        
-        return Response(
-            generate(),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+        return sse_response(open_sse_stream(
+            lambda token: cancellable(root_agent.call_tool(tool_name, *args, **kwargs), token),
+            f"스트리밍 도구 '{tool_name}' 호출",
+            None,
+            request.headers.get('Last-Event-ID'),
+            scope=stream_scope(request.path, data),
+            timeout=request_timeout(request.headers.get(TIMEOUT_HEADER), data),
+            admission_key=TOOLS_ADMISSION_KEY,
+        ))
         
+    except AdmissionRejected as e:
+        return rate_limited_response(e)
     except Exception as e:
         logger.error(f"스트리밍 도구 '{tool_name}' 호출 중 오류: {e}")
         return create_error_response(f"스트리밍 도구 '{tool_name}' 호출 중 오류 발생: {str(e)}")
@@ -0,0 +1,866 @@
+"""
+HRM Agent ASGI Server
+hrm_agent_api.py와 동일한 라우트/JSON/SSE 계약을 asyncio 이벤트 루프 위에서 제공하는 ASGI 서버
+
+Flask 서버는 SSE 스트림 하나당 OS 스레드 하나를 생성 완료 시점까지 점유합니다.
+이 서버는 열린 스트림을 코루틴으로만 유지합니다. 진단/운영 이력/조치 가이드 스트림은
+RootAgent.arun_*을 이벤트 루프에서 직접 구동하고, 비동기 버전이 없는 파이프라인과
+도구 스트림의 블로킹 제너레이터는 크기가 제한된 스레드 풀(asgi.max_workers)을 통해
+청크 단위로 구동합니다.
+
+실행:
+    python hrm_agent_asgi.py
+    # 또는
+    uvicorn hrm_agent_asgi:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, Iterator, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Route
+
+import hrm_agent_api as api
+from agents.metrics import CONTENT_TYPE, REQUEST_LATENCY, registry, request_labels
+
+logger = logging.getLogger(__name__)
+
+_asgi_config = api.config.get("asgi", {}) if isinstance(api.config.get("asgi", {}), dict) else {}
+
+# 블로킹 제너레이터를 구동하는 제한된 스레드 풀
+executor = ThreadPoolExecutor(
+    max_workers=int(_asgi_config.get("max_workers", 64)),
+    thread_name_prefix="hrm-asgi",
+)
+
+_SENTINEL = object()
+
+
+async def iterate_in_executor(gen: Iterator[str]) -> AsyncGenerator[str, None]:
+    """블로킹 제너레이터를 스레드 풀에서 한 청크씩 구동하는 비동기 제너레이터입니다.
+
+    클라이언트 연결이 끊겨 태스크가 취소되면, 진행 중인 next() 호출이 끝난 뒤
+    같은 스레드 풀에서 제너레이터를 닫아 업스트림 정리를 보장합니다.
+    """
+    loop = asyncio.get_running_loop()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            pending = loop.run_in_executor(executor, next, gen, _SENTINEL)
+            item = await pending
+            pending = None
+            if item is _SENTINEL:
+                return
+            yield item
+    finally:
+        close = getattr(gen, "close", None)
+        if close is not None:
+            if pending is not None and not pending.done():
+                pending.add_done_callback(lambda _: executor.submit(close))
+            else:
+                executor.submit(close)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """블로킹 함수를 스레드 풀에서 실행합니다."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, lambda: func(*args, **kwargs))
+
+
+async def open_async_sse_stream(
+    chunks_factory: Callable[["api.CancellationToken"], AsyncIterable[Any]],
+    error_label: str,
+    llm_provider: Optional[str],
+    last_event_id: Optional[str] = None,
+    cost: int = 1,
+    timeout: Optional[float] = None,
+    scope: Optional[str] = None,
+) -> Iterator[str]:
+    """api.open_sse_stream과 같은 계약이지만, 생성은 이벤트 루프의 태스크로 실행합니다.
+
+    chunks_factory는 비동기 이터러블(RootAgent.arun_*)을 반환해야 합니다. provider 슬롯 대기만
+    스레드 풀에서 수행합니다.
+    """
+    resumed = api.sse_sessions.resume(last_event_id, scope)
+    if resumed is not None:
+        session, start = resumed
+        logger.info(f"SSE 스트림 재연결: session={session.id}, from={start}")
+    else:
+        token = api.CancellationToken(timeout)
+        ticket = await run_blocking(api.admit_request, llm_provider, cost=cost, timeout=token.remaining())
+        try:
+            session = api.sse_sessions.start_async(
+                lambda token: api.asse_payloads(lambda: chunks_factory(token), error_label),
+                on_finish=ticket.release,
+                token=token,
+                scope=scope,
+            )
+        except Exception:
+            ticket.release()
+            raise
+        start = 0
+    return api.sse_session_events(session, start, error_label)
+
+
+def collect(gen: Iterator[str]) -> str:
+    result = ""
+    for chunk in gen:
+        result += chunk
+    return result
+
+
+def collect_admitted(provider: Optional[str], gen: Iterator[str], key: Optional[str] = None) -> str:
+    """provider(또는 admission 키) 슬롯을 확보한 뒤 제너레이터 결과를 수집합니다."""
+    with api.admit_request(provider, key=key):
+        return collect(gen)
+
+
+def error_response(message: str, status_code: int = 500) -> JSONResponse:
+    """에러 응답을 생성합니다."""
+    return JSONResponse({"success": False, "error": message}, status_code=status_code)
+
+
+def rate_limited_response(e: api.AdmissionRejected) -> JSONResponse:
+    """429 응답을 Retry-After 헤더와 함께 생성합니다."""
+    logger.warning(f"요청 거부 ({e.provider}, {e.reason})")
+    return JSONResponse(
+        {"success": False, "error": f"요청이 많아 처리할 수 없습니다. {e.retry_after}초 후 다시 시도하세요."},
+        status_code=429,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def success_response(data: Any) -> JSONResponse:
+    """성공 응답을 생성합니다."""
+    return JSONResponse({"success": True, "data": data})
+
+
+def result_response(data: Dict[str, Any], timed_out: bool) -> JSONResponse:
+    """생성 결과 응답을 만듭니다. 마감 시간 초과로 중단된 경우 부분 결과를 504로 반환합니다."""
+    if timed_out:
+        return JSONResponse(
+            {"success": False, "error": "요청 처리 시간이 초과되었습니다.", "partial": True, "data": data},
+            status_code=504,
+        )
+    return success_response(data)
+
+
+def request_token(request: Request, data: Dict[str, Any]) -> "api.CancellationToken":
+    """요청 마감 시간(X-Request-Timeout 헤더 또는 본문 timeout 필드)을 담은 취소 토큰을 만듭니다."""
+    return api.CancellationToken(api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data))
+
+
+def sse_response(events: Iterator[str]) -> StreamingResponse:
+    """블로킹 SSE 이벤트 제너레이터를 비동기 스트리밍 응답으로 감쌉니다."""
+    return StreamingResponse(
+        iterate_in_executor(events),
+        media_type="text/event-stream",
+        headers=api.SSE_HEADERS,
+    )
+
+
+def ndjson_response(lines: Iterator[str]) -> StreamingResponse:
+    """블로킹 NDJSON 라인 제너레이터를 비동기 스트리밍 응답으로 감쌉니다."""
+    return StreamingResponse(
+        iterate_in_executor(lines),
+        media_type="application/x-ndjson",
+        headers=api.SSE_HEADERS,
+    )
+
+
+async def read_json(request: Request) -> Optional[Dict[str, Any]]:
+    try:
+        data = await request.json()
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    # RequestMetricsMiddleware가 요청 지연 시간 라벨로 사용
+    request.state.metric_labels = request_labels(
+        data.get('llm_provider') or api.resolve_provider(None), data.get('language', 'ko')
+    )
+    return data
+
+
+class RequestMetricsMiddleware:
+    """요청 시작부터 마지막 응답 바이트까지의 지연 시간을 기록합니다 (SSE 스트림 포함)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            labels = scope.get("state", {}).get("metric_labels", {})
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                endpoint=getattr(scope.get("endpoint"), "__name__", "unknown"),
+                provider=labels.get("provider", ""),
+                language=labels.get("language", ""),
+                status=status["code"],
+            )
+
+
+async def health(request: Request) -> JSONResponse:
+    """헬스 체크 엔드포인트"""
+    return JSONResponse({
+        "status": "healthy",
+        "service": "hrm_agent_api",
+        "server": "asgi",
+        "root_agent_initialized": api.root_agent is not None
+    })
+
+
+async def get_agent_pool_stats(request: Request) -> JSONResponse:
+    """RootAgent 풀의 상태(hit/build/eviction 카운터)를 반환합니다."""
+    return success_response(api.agent_pool.stats())
+
+
+async def get_llm_clients_stats(request: Request) -> JSONResponse:
+    """설정별로 공유되는 LLM 클라이언트 레지스트리 상태(재사용/생성/제거 카운터)와 업스트림 HTTP 연결 풀, 헤지 요청, 디스크 LLM 캐시 상태를 반환합니다."""
+    return success_response({
+        **api.get_llm_client_registry().stats(), "http_pools": api.http_pool_stats(), "hedging": api.hedging_stats(),
+        "llm_cache": api.llm_cache_stats(),
+    })
+
+
+async def get_prompt_registry_stats(request: Request) -> JSONResponse:
+    """공유 프롬프트 템플릿 레지스트리 상태(현재 버전 해시, 재로드 횟수, 마지막 오류)를 반환합니다. 확인 시점에 prompt.json 변경 여부도 검사합니다."""
+    prompt_registry = api.get_prompt_registry()
+    prompt_registry.current()
+    return success_response(prompt_registry.stats())
+
+
+async def metrics(request: Request) -> Response:
+    """Prometheus 형식의 메트릭(요청/단계별 지연 시간 히스토그램, 청크/문자/오류 카운터)을 반환합니다."""
+    return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def get_admission_stats(request: Request) -> JSONResponse:
+    """provider별 수락 제어 상태(진행 중/대기 중 요청 수, 대기 시간, 거부 수)와 호스트 공용 속도 제한 상태를 반환합니다."""
+    return success_response({**api.admission.stats(), "rate_limits": api.rate_limit_stats()})
+
+
+async def get_stream_sessions_stats(request: Request) -> JSONResponse:
+    """재연결 가능한 SSE 스트림 세션 상태(보관 중/생성 중 세션 수, 재연결 수)를 반환합니다."""
+    return success_response(api.sse_sessions.stats())
+
+
+async def get_response_cache_stats(request: Request) -> JSONResponse:
+    """에이전트 응답 캐시와 single-flight(동일 요청 병합) 상태를 반환합니다."""
+    try:
+        def stats():
+            data = api.get_response_cache().stats()
+            data["single_flight"] = api.get_single_flight().stats()
+            return data
+
+        return success_response(await run_blocking(stats))
+    except Exception as e:
+        logger.error(f"응답 캐시 상태 조회 중 오류: {e}")
+        return error_response(f"응답 캐시 상태 조회 중 오류 발생: {str(e)}")
+
+
+async def get_capabilities(request: Request) -> JSONResponse:
+    """RootAgent의 기능 목록을 반환합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+    return success_response(api.root_agent.list_capabilities())
+
+
+async def get_mcp_manifest(request: Request) -> Response:
+    """MCP 매니페스트를 반환합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+    return Response(api.root_agent.get_mcp_manifest(), media_type="application/json")
+
+
+async def run_diagnosis(request: Request) -> Response:
+    """진단 요약을 생성합니다."""
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON 데이터가 필요합니다.", 400)
+
+        error = api.validate_provider(data)
+        if error:
+            return error_response(error, 400)
+
+        analytics = data.get('analytics')
+        if not analytics:
+            return error_response("analytics 데이터가 필요합니다.", 400)
+
+        language = data.get('language', 'ko')
+        llm_provider = data.get('llm_provider')
+
+        agent = await run_blocking(api.get_agent, llm_provider)
+        token = request_token(request, data)
+        diagnosis_result, timed_out = await run_blocking(
+            api.collect_with_deadline,
+            agent.provider,
+            agent.run_diagnosis(analytics, language=language, cancel_token=token),
+            token,
+        )
+
+        return result_response({
+            "diagnosis": diagnosis_result,
+            "language": language,
+            "llm_provider": llm_provider or agent.provider
+        }, timed_out)
+
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"진단 요약 생성 중 오류: {e}")
+        return error_response(f"진단 요약 생성 중 오류 발생: {str(e)}")
+
+
+async def stream_diagnosis(request: Request) -> Response:
+    """진단 요약을 스트리밍으로 생성합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_provider(data)
+    if error:
+        return error_response(error, 400)
+
+    analytics = data.get('analytics')
+    if not analytics:
+        return error_response("analytics 데이터가 필요합니다.", 400)
+
+    language = data.get('language', 'ko')
+    llm_provider = data.get('llm_provider')
+
+    try:
+        # 풀에서 처음 쓰는 provider면 에이전트를 생성하므로 이벤트 루프 밖에서 가져옵니다
+        agent = await run_blocking(api.get_agent, llm_provider)
+        events = await open_async_sse_stream(
+            lambda token: agent.arun_diagnosis(analytics, language=language, cancel_token=token),
+            "스트리밍 진단 요약 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=api.stream_scope(request.url.path, data),
+            timeout=api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data),
+        )
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 진단 요약 생성 중 오류: {e}")
+        return error_response(f"스트리밍 진단 요약 생성 중 오류 발생: {str(e)}")
+
+    return sse_response(events)
+
+
+async def batch_diagnosis(request: Request) -> Response:
+    """여러 기기의 진단 요약을 동시에 생성하고 완료 순서대로 NDJSON으로 반환합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_batch_items(data)
+    if error:
+        return error_response(error, 400)
+
+    items = data['items']
+    llm_provider = data.get('llm_provider')
+    # 요청 마감 시간. 클라이언트가 연결을 끊으면 진행 중인 항목의 LLM 호출도 취소됩니다
+    token = request_token(request, data)
+
+    def results():
+        agent = api.get_agent(llm_provider)
+        return agent.run_diagnosis_batch(items, executor=api.get_batch_executor(agent.provider), cancel_token=token)
+
+    return ndjson_response(api.ndjson_stream(results, "배치 진단 요약 생성"))
+
+
+async def run_operation_history(request: Request) -> Response:
+    """운영 이력 요약을 생성합니다."""
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON 데이터가 필요합니다.", 400)
+
+        error = api.validate_provider(data)
+        if error:
+            return error_response(error, 400)
+
+        operation_history = data.get('operation_history')
+        if not operation_history:
+            return error_response("operation_history 데이터가 필요합니다.", 400)
+
+        language = data.get('language', 'ko')
+        llm_provider = data.get('llm_provider')
+
+        agent = await run_blocking(api.get_agent, llm_provider)
+        token = request_token(request, data)
+        history_result, timed_out = await run_blocking(
+            api.collect_with_deadline,
+            agent.provider,
+            agent.run_op_history(operation_history, language=language, cancel_token=token),
+            token,
+        )
+
+        return result_response({
+            "operation_history_summary": history_result,
+            "language": language,
+            "llm_provider": llm_provider or agent.provider
+        }, timed_out)
+
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"운영 이력 요약 생성 중 오류: {e}")
+        return error_response(f"운영 이력 요약 생성 중 오류 발생: {str(e)}")
+
+
+async def stream_operation_history(request: Request) -> Response:
+    """운영 이력 요약을 스트리밍으로 생성합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_provider(data)
+    if error:
+        return error_response(error, 400)
+
+    operation_history = data.get('operation_history')
+    if not operation_history:
+        return error_response("operation_history 데이터가 필요합니다.", 400)
+
+    language = data.get('language', 'ko')
+    llm_provider = data.get('llm_provider')
+
+    try:
+        # 풀에서 처음 쓰는 provider면 에이전트를 생성하므로 이벤트 루프 밖에서 가져옵니다
+        agent = await run_blocking(api.get_agent, llm_provider)
+        events = await open_async_sse_stream(
+            lambda token: agent.arun_op_history(operation_history, language=language, cancel_token=token),
+            "스트리밍 운영 이력 요약 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=api.stream_scope(request.url.path, data),
+            timeout=api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data),
+        )
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 운영 이력 요약 생성 중 오류: {e}")
+        return error_response(f"스트리밍 운영 이력 요약 생성 중 오류 발생: {str(e)}")
+
+    return sse_response(events)
+
+
+async def batch_operation_history(request: Request) -> Response:
+    """여러 기기의 운영 이력 요약을 동시에 생성하고 완료 순서대로 NDJSON으로 반환합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_batch_items(data)
+    if error:
+        return error_response(error, 400)
+
+    items = data['items']
+    llm_provider = data.get('llm_provider')
+    # 요청 마감 시간. 클라이언트가 연결을 끊으면 진행 중인 항목의 LLM 호출도 취소됩니다
+    token = request_token(request, data)
+
+    def results():
+        agent = api.get_agent(llm_provider)
+        return agent.run_op_history_batch(items, executor=api.get_batch_executor(agent.provider), cancel_token=token)
+
+    return ndjson_response(api.ndjson_stream(results, "배치 운영 이력 요약 생성"))
+
+
+async def run_actions_guide(request: Request) -> Response:
+    """고객 조치 가이드를 생성합니다 (한국어 전용)."""
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON 데이터가 필요합니다.", 400)
+
+        error = api.validate_provider(data)
+        if error:
+            return error_response(error, 400)
+
+        diagnosis_summary = data.get('diagnosis_summary')
+        if not diagnosis_summary:
+            return error_response("diagnosis_summary가 필요합니다.", 400)
+
+        category = data.get('category', '')
+        language = data.get('language', 'ko')
+        llm_provider = data.get('llm_provider')
+
+        if language.lower() != 'ko':
+            return error_response("한국어에서만 지원됩니다.", 400)
+
+        agent = await run_blocking(api.get_agent, llm_provider)
+        token = request_token(request, data)
+        guide_result, timed_out = await run_blocking(
+            api.collect_with_deadline,
+            agent.provider,
+            agent.run_actions_guide(diagnosis_summary, category=category, language=language, cancel_token=token),
+            token,
+        )
+
+        return result_response({
+            "actions_guide": guide_result,
+            "category": category,
+            "language": language,
+            "llm_provider": llm_provider or agent.provider
+        }, timed_out)
+
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"고객 조치 가이드 생성 중 오류: {e}")
+        return error_response(f"고객 조치 가이드 생성 중 오류 발생: {str(e)}")
+
+
+async def stream_actions_guide(request: Request) -> Response:
+    """고객 조치 가이드를 스트리밍으로 생성합니다 (한국어 전용)."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_provider(data)
+    if error:
+        return error_response(error, 400)
+
+    diagnosis_summary = data.get('diagnosis_summary')
+    if not diagnosis_summary:
+        return error_response("diagnosis_summary가 필요합니다.", 400)
+
+    category = data.get('category', '')
+    language = data.get('language', 'ko')
+    llm_provider = data.get('llm_provider')
+
+    if language.lower() != 'ko':
+        return error_response("한국어에서만 지원됩니다.", 400)
+
+    try:
+        # 풀에서 처음 쓰는 provider면 에이전트를 생성하므로 이벤트 루프 밖에서 가져옵니다
+        agent = await run_blocking(api.get_agent, llm_provider)
+        events = await open_async_sse_stream(
+            lambda token: agent.arun_actions_guide(
+                diagnosis_summary, category=category, language=language, cancel_token=token
+            ),
+            "스트리밍 고객 조치 가이드 생성",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=api.stream_scope(request.url.path, data),
+            timeout=api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data),
+        )
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 고객 조치 가이드 생성 중 오류: {e}")
+        return error_response(f"스트리밍 고객 조치 가이드 생성 중 오류 발생: {str(e)}")
+
+    return sse_response(events)
+
+
+async def stream_pipeline(request: Request) -> Response:
+    """진단/운영 이력 요약을 동시에 생성하고, 진단 완료 즉시 조치 가이드를 이어서 생성합니다."""
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request)
+    if not data:
+        return error_response("JSON 데이터가 필요합니다.", 400)
+
+    error = api.validate_provider(data)
+    if error:
+        return error_response(error, 400)
+
+    analytics = data.get('analytics')
+    if not analytics:
+        return error_response("analytics 데이터가 필요합니다.", 400)
+
+    operation_history = data.get('operation_history') or {}
+    category = data.get('category', '')
+    language = data.get('language', 'ko')
+    llm_provider = data.get('llm_provider')
+    require_self_repair = data.get('require_self_repair', True)
+
+    try:
+        events = await run_blocking(
+            api.open_sse_stream,
+            lambda token: api.get_agent(llm_provider).run_pipeline(
+                analytics,
+                operation_history,
+                category=category,
+                language=language,
+                require_self_repair=require_self_repair,
+                cancel_token=token,
+            ),
+            "스트리밍 파이프라인 실행",
+            llm_provider,
+            request.headers.get('Last-Event-ID'),
+            scope=api.stream_scope(request.url.path, data),
+            cost=api.PIPELINE_ADMISSION_COST,
+            timeout=api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data),
+        )
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 파이프라인 실행 중 오류: {e}")
+        return error_response(f"스트리밍 파이프라인 실행 중 오류 발생: {str(e)}")
+
+    return sse_response(events)
+
+
+async def create_job(request: Request) -> Response:
+    """작업을 등록하고 즉시 job_id를 반환합니다. 결과는 /api/jobs/{job_id}로 조회합니다."""
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON 데이터가 필요합니다.", 400)
+
+        error = api.validate_job_request(data)
+        if error:
+            return error_response(error, 400)
+
+        params = {key: data[key] for key in api.JOB_PARAM_KEYS if key in data}
+        timeout = api.job_timeout(request.headers.get(api.TIMEOUT_HEADER), data)
+        if timeout is not None:
+            params['timeout'] = timeout
+        job_id = await run_blocking(lambda: api.get_job_manager().submit(data['kind'], params, data.get('llm_provider')))
+
+        return JSONResponse(
+            {"success": True, "data": {"job_id": job_id, "kind": data['kind'], "status": "queued"}},
+            status_code=202,
+        )
+
+    except Exception as e:
+        logger.error(f"작업 등록 중 오류: {e}")
+        return error_response(f"작업 등록 중 오류 발생: {str(e)}")
+
+
+async def get_job(request: Request) -> Response:
+    """작업 상태와 현재까지의 출력(진행 중이면 부분 출력)을 반환합니다."""
+    job_id = request.path_params["job_id"]
+    try:
+        job = await run_blocking(lambda: api.get_job_manager().get(job_id))
+        if job is None:
+            return error_response("작업을 찾을 수 없습니다.", 404)
+        return success_response(api.job_view(job))
+
+    except Exception as e:
+        logger.error(f"작업 조회 중 오류: {e}")
+        return error_response(f"작업 조회 중 오류 발생: {str(e)}")
+
+
+async def stream_job(request: Request) -> Response:
+    """작업 출력을 처음부터 재생한 뒤, 진행 중이면 실시간 출력에 연결합니다."""
+    job_id = request.path_params["job_id"]
+    try:
+        manager = await run_blocking(api.get_job_manager)
+        if await run_blocking(manager.get, job_id) is None:
+            return error_response("작업을 찾을 수 없습니다.", 404)
+
+        return sse_response(api.sse_stream(lambda: manager.stream(job_id), "작업 스트리밍"))
+
+    except Exception as e:
+        logger.error(f"작업 스트리밍 중 오류: {e}")
+        return error_response(f"작업 스트리밍 중 오류 발생: {str(e)}")
+
+
+async def call_tool(request: Request) -> Response:
+    """등록된 도구를 호출합니다."""
+    tool_name = request.path_params["tool_name"]
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request) or {}
+        args = data.get('args', [])
+        kwargs = data.get('kwargs', {})
+
+        tool_result = await run_blocking(
+            collect_admitted, None, api.root_agent.call_tool(tool_name, *args, **kwargs), key=api.TOOLS_ADMISSION_KEY
+        )
+
+        return success_response({
+            "tool_name": tool_name,
+            "result": tool_result,
+            "args": args,
+            "kwargs": kwargs
+        })
+
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"도구 '{tool_name}' 호출 중 오류: {e}")
+        return error_response(f"도구 '{tool_name}' 호출 중 오류 발생: {str(e)}")
+
+
+async def stream_tool(request: Request) -> Response:
+    """등록된 도구를 스트리밍으로 호출합니다."""
+    tool_name = request.path_params["tool_name"]
+    if not api.root_agent:
+        return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+    data = await read_json(request) or {}
+    args = data.get('args', [])
+    kwargs = data.get('kwargs', {})
+
+    try:
+        events = await run_blocking(
+            api.open_sse_stream,
+            lambda token: api.cancellable(api.root_agent.call_tool(tool_name, *args, **kwargs), token),
+            f"스트리밍 도구 '{tool_name}' 호출",
+            None,
+            request.headers.get('Last-Event-ID'),
+            scope=api.stream_scope(request.url.path, data),
+            timeout=api.request_timeout(request.headers.get(api.TIMEOUT_HEADER), data),
+            admission_key=api.TOOLS_ADMISSION_KEY,
+        )
+    except api.AdmissionRejected as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        logger.error(f"스트리밍 도구 '{tool_name}' 호출 중 오류: {e}")
+        return error_response(f"스트리밍 도구 '{tool_name}' 호출 중 오류 발생: {str(e)}")
+
+    return sse_response(events)
+
+
+async def invoke_mcp_tool(request: Request) -> Response:
+    """MCP 도구를 안전하게 호출합니다."""
+    tool_name = request.path_params["tool_name"]
+    try:
+        if not api.root_agent:
+            return error_response("RootAgent가 초기화되지 않았습니다.", 500)
+
+        data = await read_json(request) or {}
+        args = data.get('args', [])
+        kwargs = data.get('kwargs', {})
+
+        result = await run_blocking(api.root_agent.invoke_mcp_tool, tool_name, *args, **kwargs)
+
+        return success_response({
+            "tool_name": tool_name,
+            "result": result,
+            "args": args,
+            "kwargs": kwargs
+        })
+
+    except Exception as e:
+        logger.error(f"MCP 도구 '{tool_name}' 호출 중 오류: {e}")
+        return error_response(f"MCP 도구 '{tool_name}' 호출 중 오류 발생: {str(e)}")
+
+
+async def not_found(request: Request, exc: Exception) -> JSONResponse:
+    """404 에러 핸들러"""
+    return error_response("요청한 엔드포인트를 찾을 수 없습니다.", 404)
+
+
+async def on_startup() -> None:
+    # 서버 시작 시 RootAgent 초기화 (블로킹 작업이므로 스레드 풀에서 실행)
+    await run_blocking(api.initialize_root_agent)
+
+
+def on_shutdown() -> None:
+    executor.shutdown(wait=False)
+
+
+routes = [
+    Route('/health', health),
+    Route('/metrics', metrics),
+    Route('/api/agent-pool', get_agent_pool_stats),
+    Route('/api/llm-clients', get_llm_clients_stats),
+    Route('/api/prompts', get_prompt_registry_stats),
+    Route('/api/admission', get_admission_stats),
+    Route('/api/stream-sessions', get_stream_sessions_stats),
+    Route('/api/cache', get_response_cache_stats),
+    Route('/api/capabilities', get_capabilities),
+    Route('/api/mcp/manifest', get_mcp_manifest),
+    Route('/api/diagnosis', run_diagnosis, methods=['POST']),
+    Route('/api/diagnosis/stream', stream_diagnosis, methods=['POST']),
+    Route('/api/diagnosis/batch', batch_diagnosis, methods=['POST']),
+    Route('/api/operation-history', run_operation_history, methods=['POST']),
+    Route('/api/operation-history/stream', stream_operation_history, methods=['POST']),
+    Route('/api/operation-history/batch', batch_operation_history, methods=['POST']),
+    Route('/api/actions-guide', run_actions_guide, methods=['POST']),
+    Route('/api/actions-guide/stream', stream_actions_guide, methods=['POST']),
+    Route('/api/pipeline/stream', stream_pipeline, methods=['POST']),
+    Route('/api/jobs', create_job, methods=['POST']),
+    Route('/api/jobs/{job_id}', get_job),
+    Route('/api/jobs/{job_id}/stream', stream_job),
+    Route('/api/tools/{tool_name}', call_tool, methods=['POST']),
+    Route('/api/tools/{tool_name}/stream', stream_tool, methods=['POST']),
+    Route('/api/mcp/tools/{tool_name}', invoke_mcp_tool, methods=['POST']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(RequestMetricsMiddleware),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    exception_handlers={404: not_found},
+    on_startup=[on_startup],
+    on_shutdown=[on_shutdown],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logger.info("HRM Agent ASGI 서버를 시작합니다...")
+    logger.info("API 엔드포인트: http://localhost:8000")
+
+    uvicorn.run(
+        app,
+        host='0.0.0.0',  # 모든 네트워크 인터페이스에서 접근 허용
+        port=8000,       # Flask 서버(hrm_agent_api.py)와 동일한 포트/계약
+        # 수천 개의 동시 스트림을 위해 동시 연결 수 제한은 두지 않음
+        timeout_keep_alive=30,
+    )
@@ -8,15 +8,20 @@ import sys
 import os
 
 def main():
-    """API 서버를 실행합니다."""
+    """API 서버를 실행합니다.
+
+    --asgi 옵션을 주면 asyncio 기반 ASGI 서버(hrm_agent_asgi.py)를 실행합니다.
+    """
+    script = "hrm_agent_asgi.py" if "--asgi" in sys.argv[1:] else "hrm_agent_api.py"
     print("HRM Agent API Server를 시작합니다...")
+    print(f"서버: {'ASGI (asyncio)' if script == 'hrm_agent_asgi.py' else 'Flask'}")
     print("포트: 8000")
     print("종료하려면 Ctrl+C를 누르세요.")
     print("-" * 50)
     
     try:
         # Python 스크립트 실행
-        subprocess.run([sys.executable, "hrm_agent_api.py"], check=True)
+        subprocess.run([sys.executable, script], check=True)
     except KeyboardInterrupt:
         print("\n서버가 종료되었습니다.")
     except subprocess.CalledProcessError as e:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The agents package is imported from the project root, as the servers do
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
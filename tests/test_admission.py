@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from agents.admission import AdmissionController, AdmissionRejected, ProviderLimiter
+
+
+def test_concurrency_slot_is_released_with_the_ticket():
+    limiter = ProviderLimiter("test", max_concurrency=1, queue_timeout=0.1)
+    ticket = limiter.admit()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        limiter.admit()
+    assert excinfo.value.reason == "timeout"
+    ticket.release()
+    ticket.release()  # idempotent
+    with limiter.admit():
+        assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+
+
+def test_waiter_is_admitted_when_a_slot_frees_up():
+    limiter = ProviderLimiter("test", max_concurrency=1, queue_timeout=2)
+    ticket = limiter.admit()
+    threading.Timer(0.05, ticket.release).start()
+    with limiter.admit():
+        pass
+    assert limiter.admitted == 2
+
+
+def test_full_queue_is_rejected_immediately():
+    limiter = ProviderLimiter("test", max_concurrency=1, max_queue=0, queue_timeout=5)
+    with limiter.admit():
+        with pytest.raises(AdmissionRejected) as excinfo:
+            limiter.admit()
+    assert excinfo.value.reason == "queue_full"
+
+
+def test_charge_takes_rate_tokens_without_a_slot():
+    limiter = ProviderLimiter("test", max_concurrency=1, rate_per_minute=60, burst=3, queue_timeout=0.1)
+    with limiter.admit(cost=2):
+        # The admitted request's own slot does not block an extra charge
+        limiter.charge(1)
+        with pytest.raises(AdmissionRejected) as excinfo:
+            limiter.charge(1)
+    assert excinfo.value.reason == "rate_limited"
+
+
+def test_controller_keys_limiters_separately_and_disabled_admits_everything():
+    controller = AdmissionController({"providers": {"gauss": {"max_concurrency": 1}, "tools": {"max_concurrency": 1}}})
+    controller.limiter("gauss").queue_timeout = 0.05
+    with controller.admit("gauss"), controller.admit("tools"):
+        with pytest.raises(AdmissionRejected):
+            controller.admit("gauss")
+
+    disabled = AdmissionController({"enabled": False, "providers": {"gauss": {"rate_per_minute": 1, "burst": 1}}})
+    for _ in range(3):
+        disabled.admit("gauss").release()
+        disabled.charge("gauss")
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.cancellation import (
+    DEADLINE_EXCEEDED,
+    CancellationToken,
+    GenerationCancelled,
+    acancellable,
+    cancellable,
+    parse_timeout,
+)
+
+
+def test_cancel_runs_callbacks_once_and_keeps_the_first_reason():
+    token = CancellationToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("registered"))
+    assert token.cancel("client_disconnected")
+    assert not token.cancel("other")
+    token.on_cancel(lambda: calls.append("late"))
+    assert calls == ["registered", "late"]
+    assert token.reason == "client_disconnected"
+
+
+def test_deadline_cancels_lazily_and_caps_budgets():
+    token = CancellationToken(timeout=0.05)
+    assert token.budget(10) <= 0.05
+    time.sleep(0.06)
+    assert token.cancelled
+    assert token.reason == DEADLINE_EXCEEDED
+    with pytest.raises(GenerationCancelled):
+        token.budget(10)
+
+
+def test_cancellable_stops_between_chunks():
+    token = CancellationToken()
+
+    def chunks():
+        yield "a"
+        token.cancel("client_disconnected")
+        yield "b"
+
+    stream = cancellable(chunks(), token)
+    assert next(stream) == "a"
+    with pytest.raises(GenerationCancelled) as excinfo:
+        next(stream)
+    assert excinfo.value.reason == "client_disconnected"
+
+
+def test_acancellable_interrupts_a_chunk_that_never_arrives():
+    async def stalled():
+        yield "a"
+        await asyncio.sleep(10)
+        yield "b"
+
+    async def main():
+        token = CancellationToken(timeout=0.1)
+        received = []
+        with pytest.raises(GenerationCancelled):
+            async for chunk in acancellable(stalled(), token):
+                received.append(chunk)
+        return received, token.reason
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == (["a"], DEADLINE_EXCEEDED)
+    assert time.monotonic() - started < 2
+
+
+def test_parse_timeout_uses_the_first_valid_value_capped_at_the_maximum():
+    assert parse_timeout(None, "30", default=300, maximum=600) == 30
+    assert parse_timeout("bad", None, default=300, maximum=600) == 300
+    assert parse_timeout("9999", default=300, maximum=600) == 600
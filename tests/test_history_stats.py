@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from agents.history_stats import compute_history_stats, find_events, without_path
+
+CONFIG = {"max_gap_seconds": 3600, "top_values": 5}
+
+
+def hourly_events(days=2):
+    start = datetime(2024, 1, 1)
+    events = []
+    for hour in range(days * 24):
+        running = 9 <= hour % 24 < 21
+        events.append({
+            "timestamp": (start + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "mode": "cooling" if running else "standby",
+            "power": 150 + hour if running else 2,
+            "errorCode": "CH-05" if hour == 30 else "",
+        })
+    return events
+
+
+def test_find_events_and_without_path():
+    history = {"deviceType": "ac", "data": {"events": hourly_events(1), "meta": [{"a": 1}]}}
+    path, events = find_events(history)
+    assert path == ("data", "events")
+    assert len(events) == 24
+    stripped = without_path(history, path)
+    assert "events" not in stripped["data"]
+    # Only the containers on the path are copied
+    assert "events" in history["data"]
+    assert stripped["data"]["meta"] is history["data"]["meta"]
+
+
+def test_modes_usage_errors_and_trends():
+    stats = compute_history_stats(hourly_events(), CONFIG)
+    assert stats["events"] == 48
+    assert (stats["from"], stats["to"]) == ("2024-01-01T00:00:00", "2024-01-02T23:00:00")
+    assert stats["modes"]["mode"]["cooling"] == {"events": 24, "hours": 24, "share": 0.5}
+    assert stats["usage"]["active_hours"] == 24
+    assert stats["usage"]["active_days"] == 2
+    assert stats["usage"]["peak_hours"] == [9, 10, 11]
+    assert stats["errors"]["by_code"] == {"CH-05": 1}
+    assert stats["errors"]["first"] == "2024-01-02T06:00:00"
+    assert stats["numeric"]["power"]["min"] == 2
+    assert stats["numeric"]["power"]["mean_active"] > stats["numeric"]["power"]["mean"]
+
+
+def test_event_order_and_time_format_do_not_change_the_result():
+    events = hourly_events()
+    shuffled = events[:]
+    random.Random(0).shuffle(shuffled)
+    epoch_ms = [
+        dict(e, timestamp=int(datetime.strptime(e["timestamp"], "%Y-%m-%dT%H:%M:%SZ").timestamp() * 1000))
+        for e in events
+    ]
+    offsets = [dict(e, timestamp=e["timestamp"][:19] + ("+09:00" if i % 2 else "Z")) for i, e in enumerate(events)]
+    expected = compute_history_stats(events, CONFIG)
+    assert compute_history_stats(shuffled, CONFIG) == expected
+    assert compute_history_stats(offsets, CONFIG) == expected
+    # Epoch times are UTC; only the rendered range depends on the local timezone
+    assert compute_history_stats(epoch_ms, CONFIG)["modes"] == expected["modes"]
+
+
+def test_missing_values_and_untimed_events():
+    events = [{"mode": "cool", "temp": 20 if i % 2 else None} for i in range(10)]
+    stats = compute_history_stats(events, CONFIG)
+    assert "from" not in stats and "usage" not in stats
+    assert stats["modes"]["mode"] == {"cool": {"events": 10}}
+    assert stats["numeric"]["temp"] == {"min": 20, "mean": 20, "max": 20}
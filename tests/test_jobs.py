@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from agents.jobs import JobManager, SQLiteJobStore
+
+
+class PipelineAgent:
+    """Agent whose run_pipeline yields fixed pipeline events."""
+
+    provider = admission_key = "fake"
+
+    def __init__(self, events):
+        self.events = events
+
+    def run_pipeline(self, *args, **kwargs):
+        return iter(self.events)
+
+
+def run_job(tmp_path, events):
+    manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite3")), lambda provider: PipelineAgent(events))
+    job_id = manager.submit("pipeline", {"analytics": {"device": "x"}})
+    deadline = time.monotonic() + 5
+    while manager.get(job_id)["status"] not in ("succeeded", "partial", "failed"):
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return manager, job_id
+
+
+def test_failed_stage_is_recorded_and_the_job_is_partial(tmp_path):
+    manager, job_id = run_job(tmp_path, [
+        {"stage": "diagnosis", "chunk": "진단"},
+        {"stage": "op_history", "error": "llm down", "stage_done": True},
+    ])
+    job = manager.get(job_id)
+    assert job["status"] == "partial"
+    assert job["output"] == {"diagnosis": "진단"}
+    assert job["errors"] == {"op_history": "llm down"}
+    assert job["error"] is None
+
+
+def test_job_fails_when_every_stage_failed(tmp_path):
+    manager, job_id = run_job(tmp_path, [
+        {"stage": "diagnosis", "error": "llm down", "stage_done": True},
+        {"stage": "op_history", "error": "llm down", "stage_done": True},
+    ])
+    job = manager.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "diagnosis: llm down; op_history: llm down"
+
+
+def test_stream_from_the_store_replays_stage_errors(tmp_path):
+    manager, job_id = run_job(tmp_path, [
+        {"stage": "diagnosis", "chunk": "진단"},
+        {"stage": "actions_guide", "error": "rate limited", "stage_done": True},
+    ])
+    assert list(manager.stream(job_id, poll_interval=0)) == [
+        {"stage": "diagnosis", "chunk": "진단"},
+        {"stage": "actions_guide", "error": "rate limited", "stage_done": True},
+    ]
+
+
+def test_stream_of_an_unknown_job_raises(tmp_path):
+    manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite3")), lambda provider: None)
+    with pytest.raises(KeyError):
+        list(manager.stream("missing"))
+
+
+class SlowAgent:
+    provider = admission_key = "fake"
+
+    def run_diagnosis(self, analytics, language=None, cancel_token=None):
+        while True:
+            cancel_token.raise_if_cancelled()
+            time.sleep(0.01)
+            yield "."
+
+
+def test_job_timeout_cancels_the_generation(tmp_path):
+    manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite3")), lambda provider: SlowAgent())
+    job_id = manager.submit("diagnosis", {"analytics": {"device": "x"}, "timeout": 0.1})
+    deadline = time.monotonic() + 5
+    while manager.get(job_id)["status"] != "failed":
+        assert time.monotonic() < deadline, "job was not cancelled"
+        time.sleep(0.01)
+    job = manager.get(job_id)
+    assert "deadline_exceeded" in job["error"]
+    assert job["output"].startswith(".")
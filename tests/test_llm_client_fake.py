@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from agents.cancellation import CancellationToken, GenerationCancelled
+from agents.llm_client_fake import FakeClient
+from agents.logger import prompt_hash
+
+
+def test_replay_keys_on_the_full_prompt_and_its_language(tmp_path):
+    # Same first 300 characters; the ko and en requests were logged interleaved
+    prompts = {"ko": "A" * 400 + "ko", "en": "A" * 400 + "en"}
+    log = tmp_path / "hrm_agent_log.json"
+    with open(log, "w", encoding="utf-8") as f:
+        for language, prompt in prompts.items():
+            f.write(json.dumps({"stage": "diagnosis_build_prompt", "language": language,
+                                "prompt_preview": prompt[:300], "prompt_hash": prompt_hash(prompt)}) + "\n")
+        f.write(json.dumps({"stage": "diagnosis_llm_output", "language": "en", "output_preview": "english"}) + "\n")
+        f.write(json.dumps({"stage": "diagnosis_llm_output", "language": "ko", "output_preview": "korean"}) + "\n")
+
+    client = FakeClient(replay_log=str(log), ttft=0, tokens_per_second=0)
+    assert client.generate(prompts["ko"]) == "korean"
+    assert client.generate(prompts["en"]) == "english"
+
+
+def test_calls_are_deterministic_per_seed_and_prompt():
+    first = FakeClient(ttft=0, tokens_per_second=0, error_rate=0.5, seed=7)
+    second = FakeClient(ttft=0, tokens_per_second=0, error_rate=0.5, seed=7)
+    assert [first._plan("p") for _ in range(5)] == [second._plan("p") for _ in range(5)]
+
+
+def test_seen_counts_are_bounded():
+    client = FakeClient(ttft=0, tokens_per_second=0, max_tracked_prompts=3)
+    for i in range(10):
+        client.generate(str(i))
+    assert list(client._seen) == [prompt_hash(str(i)) for i in (7, 8, 9)]
+
+
+def test_cancel_interrupts_the_wait_for_a_token():
+    client = FakeClient(ttft=5, tokens_per_second=0)
+    token = CancellationToken()
+    token.cancel("client_disconnected")
+    with pytest.raises(GenerationCancelled):
+        client.generate("p", stream=True, cancel_token=token).__next__()
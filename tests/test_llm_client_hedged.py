@@ -0,0 +1,113 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from agents.llm_client_base import LLMClient, StreamingChunk
+from agents.llm_client_fake import FakeClient, FakeProviderError
+from agents.llm_client_hedged import HedgedLLMClient
+
+_names = itertools.count()
+
+
+def fake(output, ttft, **kwargs):
+    return FakeClient(outputs=[output], ttft=ttft, tokens_per_second=0, jitter=0, **kwargs)
+
+
+class EmptyClient(LLMClient):
+    """Provider that ends its stream without producing any output."""
+
+    def generate(self, prompt, stream=False, **kwargs):
+        return iter(()) if stream else ""
+
+
+def hedged(primary, secondary, delay=0.05, **kwargs):
+    # Latency trackers are process-wide per provider name; keep each test's samples apart
+    n = next(_names)
+    return HedgedLLMClient(
+        "test", primary, f"primary-{n}", secondary, f"secondary-{n}",
+        min_delay=delay, max_delay=delay, default_delay=delay, **kwargs,
+    )
+
+
+def wait_for_samples(tracker, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while len(tracker) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return len(tracker)
+
+
+def test_fast_primary_is_not_hedged():
+    client = hedged(fake("primary answer", 0.0), fake("secondary answer", 0.0))
+    assert client.generate("prompt") == "primary answer"
+    stats = client.stats()
+    assert (stats["calls"], stats["hedged"], stats["primary_wins"]) == (1, 0, 1)
+
+
+def test_slow_primary_is_hedged_and_the_secondary_streamed():
+    client = hedged(fake("primary answer", 2.0), fake("secondary answer", 0.0))
+    started = time.monotonic()
+    assert client.generate("prompt") == "secondary answer"
+    # The losing primary is cancelled rather than awaited
+    assert time.monotonic() - started < 1.0
+    stats = client.stats()
+    assert (stats["hedged"], stats["secondary_wins"]) == (1, 1)
+    # The cancelled primary leaves a censored TTFT sample, so the hedge delay can adapt
+    assert wait_for_samples(client.trackers[0], 1) == 1
+
+
+def test_primary_error_fails_over_before_the_hedge_delay():
+    client = hedged(fake("primary answer", 0.0, error_rate=1.0), fake("secondary answer", 0.0), delay=5.0)
+    started = time.monotonic()
+    assert client.generate("prompt") == "secondary answer"
+    assert time.monotonic() - started < 1.0
+    assert client.stats()["secondary_wins"] == 1
+
+
+def test_empty_primary_output_fails_over():
+    client = hedged(EmptyClient(), fake("secondary answer", 0.0), delay=5.0)
+    assert client.generate("prompt") == "secondary answer"
+
+
+def test_error_is_raised_when_both_legs_fail():
+    client = hedged(fake("a", 0.0, error_rate=1.0), fake("b", 0.0, error_rate=1.0))
+    with pytest.raises(FakeProviderError):
+        client.generate("prompt")
+
+
+def test_no_failover_raises_the_primary_error():
+    client = hedged(fake("a", 0.0, error_rate=1.0), fake("b", 0.0), delay=5.0, failover=False)
+    with pytest.raises(FakeProviderError):
+        client.generate("prompt")
+    assert client.stats()["hedged"] == 0
+
+
+def test_async_slow_primary_is_hedged():
+    client = hedged(fake("primary answer", 2.0), fake("secondary answer", 0.0))
+
+    async def main():
+        chunks = [chunk async for chunk in client.astream("prompt")]
+        return "".join(chunk["text"] for chunk in chunks)
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == "secondary answer"
+    assert time.monotonic() - started < 1.0
+    assert client.stats()["secondary_wins"] == 1
+    assert len(client.trackers[0]) == 1
+
+
+def test_hedge_delay_follows_the_primary_ttft_percentile():
+    client = hedged(fake("a", 0.0), fake("b", 0.0), min_samples=5)
+    client.min_delay, client.max_delay = 0.0, 10.0
+    assert client.hedge_delay() == client.default_delay
+    for seconds in (0.1, 0.2, 0.3, 0.4, 2.0):
+        client.trackers[0].record(seconds)
+    assert client.hedge_delay() == 2.0
+
+
+def test_streamed_chunks_are_streaming_chunks():
+    client = hedged(fake("one two", 0.0), fake("b", 0.0))
+    chunks = list(client.generate("prompt", stream=True))
+    assert all(isinstance(chunk, StreamingChunk) for chunk in chunks)
+    assert "".join(chunk["text"] for chunk in chunks) == "one two"
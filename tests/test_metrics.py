@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from agents.cancellation import GenerationCancelled
+from agents.metrics import (
+    ERRORS,
+    GENERATION_TIME,
+    GENERATIONS_CANCELLED,
+    OUTPUT_CHARS,
+    TIME_TO_FIRST_TOKEN,
+    aobserve_stream,
+    observe_stream,
+    registry,
+    request_labels,
+)
+
+
+def metric_lines(metric, agent):
+    return [line for line in registry.render().splitlines() if line.startswith(metric.name) and f'agent="{agent}"' in line]
+
+
+def test_observe_stream_records_ttft_chars_and_generation_time():
+    assert list(observe_stream(iter(["ab", "c"]), "sync-ok", "fake", "ko")) == ["ab", "c"]
+    assert f'{OUTPUT_CHARS.name}{{agent="sync-ok",provider="fake",language="ko"}} 3' in metric_lines(OUTPUT_CHARS, "sync-ok")
+    assert any("_count" in line and line.endswith(" 1") for line in metric_lines(TIME_TO_FIRST_TOKEN, "sync-ok"))
+    assert any("_count" in line and line.endswith(" 1") for line in metric_lines(GENERATION_TIME, "sync-ok"))
+
+
+def test_observe_stream_counts_errors_and_cancellations_but_not_closed_streams():
+    def failing():
+        yield "a"
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        list(observe_stream(failing(), "sync-error", "fake", "ko"))
+    assert metric_lines(ERRORS, "sync-error")
+    assert not metric_lines(GENERATION_TIME, "sync-error")
+
+    def cancelled():
+        raise GenerationCancelled("deadline_exceeded")
+        yield  # pragma: no cover
+
+    with pytest.raises(GenerationCancelled):
+        list(observe_stream(cancelled(), "sync-cancel", "fake", "ko"))
+    assert 'reason="deadline_exceeded"' in metric_lines(GENERATIONS_CANCELLED, "sync-cancel")[0]
+
+    stream = observe_stream(iter(["a", "b"]), "sync-closed", "fake", "ko")
+    next(stream)
+    stream.close()
+    assert not metric_lines(ERRORS, "sync-closed")
+
+
+def test_aobserve_stream_records_the_same_metrics():
+    async def chunks():
+        yield "ab"
+        yield "c"
+
+    async def main():
+        return [chunk async for chunk in aobserve_stream(chunks(), "async-ok", "fake", "en")]
+
+    assert asyncio.run(main()) == ["ab", "c"]
+    assert f'{OUTPUT_CHARS.name}{{agent="async-ok",provider="fake",language="en"}} 3' in metric_lines(OUTPUT_CHARS, "async-ok")
+    assert any("_count" in line and line.endswith(" 1") for line in metric_lines(GENERATION_TIME, "async-ok"))
+
+
+def test_request_labels_are_bounded():
+    pytest.importorskip("langchain_core", reason="request_labels resolves providers through agents.llm_providers")
+    assert request_labels("aws", "KO") == {"provider": "bedrock", "language": "ko"}
+    assert request_labels("gauss-vision", "en") == {"provider": "gausso", "language": "en"}
+    assert request_labels("made-up", "fr") == {"provider": "other", "language": "other"}
+    assert request_labels(None, "") == {"provider": "", "language": ""}
@@ -0,0 +1,20 @@
+from agents.prompt_builder import COLUMNAR_LEGEND, serialize_columnar
+
+
+def test_columnar_table_collapses_runs_and_encodes_repeated_values():
+    events = [{"time": f"2024-01-01T0{h}:00", "mode": "dehumidify", "temp": 24} for h in range(4)]
+    events.append({"time": "2024-01-01T04:00", "mode": "dehumidify", "temp": 25.5, "note": "a|b"})
+    text = serialize_columnar({"deviceType": "ac", "history": events})
+    lines = text.split("\n")
+    assert lines[0] == COLUMNAR_LEGEND
+    assert lines[1] == 'deviceType: "ac"'
+    assert lines[2] == "[history] 5 records in 2 rows"
+    assert lines[3] == 'values: @0="dehumidify"'
+    assert lines[4] == "columns: time|mode|temp|note|xN"
+    assert lines[5] == "2024-01-01T00:00~2024-01-01T03:00|@0|24||x4"
+    # Cells that would break the row syntax are JSON-quoted
+    assert lines[6] == '2024-01-01T04:00|@0|25.5|"a|b"|'
+
+
+def test_history_without_records_is_compact_json_without_legend():
+    assert serialize_columnar({"a": {"b": 1}}) == 'a: {"b":1}'
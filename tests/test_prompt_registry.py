@@ -0,0 +1,32 @@
+import json
+
+from agents.prompt_registry import CompiledTemplate, PromptRegistry
+
+
+def test_compiled_template_matches_str_format():
+    template = CompiledTemplate("Device: {device_type}\n{diagnosis_text}{{literal}}")
+    values = {"device_type": "ac", "diagnosis_text": "ok"}
+    assert template.render(**values) == template.text.format(**values)
+    # Format specs fall back to str.format
+    assert CompiledTemplate("{n:>3}").render(n=7) == "  7"
+
+
+def test_registry_reloads_on_change_and_keeps_the_last_good_version(tmp_path, monkeypatch):
+    # Reloads are logged to the project's hrm_agent_log.json
+    monkeypatch.setattr("agents.prompt_registry.log_event", lambda event: None)
+    path = tmp_path / "prompt.json"
+    path.write_text(json.dumps({"guide": {"ko": {"template": "v1 {x}"}}}), encoding="utf-8")
+    registry = PromptRegistry(str(path), check_interval=0)
+    first = registry.current()
+    assert first.template("guide", "ko", "template").render(x=1) == "v1 1"
+
+    path.write_text(json.dumps({"guide": {"ko": {"template": "v2 {x} "}}}), encoding="utf-8")
+    second = registry.current()
+    assert second.version != first.version
+    assert second.template("guide", "ko", "template").render(x=1) == "v2 1 "
+    # Requests holding the old snapshot are unaffected
+    assert first.template("guide", "ko", "template").render(x=1) == "v1 1"
+
+    path.write_text("{not json", encoding="utf-8")
+    assert registry.current() is second
+    assert registry.stats()["errors"] == 1
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+
+import pytest
+
+from agents.admission import AdmissionRejected
+from agents.rate_limit import FileTokenBucket
+
+
+def take_all(path, rate_per_minute, burst, queue):
+    bucket = FileTokenBucket("test", path, rate_per_minute, burst=burst)
+    taken = 0
+    while True:
+        try:
+            bucket.acquire(timeout=0)
+        except AdmissionRejected:
+            break
+        taken += 1
+    queue.put(taken)
+
+
+def test_burst_is_available_then_calls_are_rejected_without_waiting(tmp_path):
+    bucket = FileTokenBucket("test", str(tmp_path / "test.bucket"), rate_per_minute=60, burst=3)
+    for _ in range(3):
+        assert bucket.acquire(timeout=0) == pytest.approx(0.0, abs=0.05)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        bucket.acquire(timeout=0.1)
+    assert excinfo.value.reason == "rate_limited"
+    assert 0.5 < excinfo.value.retry_after <= 1.0
+    stats = bucket.stats()
+    assert (stats["acquired"], stats["rejected"]) == (3, 1)
+
+
+def test_waits_for_a_refill_within_the_timeout(tmp_path):
+    bucket = FileTokenBucket("test", str(tmp_path / "test.bucket"), rate_per_minute=600, burst=1)
+    bucket.acquire(timeout=0)
+    waited = bucket.acquire(timeout=1.0)
+    assert 0.05 <= waited < 0.5
+
+
+def test_buckets_on_the_same_file_share_one_quota(tmp_path):
+    path = str(tmp_path / "shared.bucket")
+    first = FileTokenBucket("test", path, rate_per_minute=1, burst=2)
+    second = FileTokenBucket("test", path, rate_per_minute=1, burst=2)
+    first.acquire(timeout=0)
+    second.acquire(timeout=0)
+    for bucket in (first, second):
+        with pytest.raises(AdmissionRejected):
+            bucket.acquire(timeout=0)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="the bucket is only shared across processes with fcntl")
+def test_processes_share_one_quota(tmp_path):
+    path = str(tmp_path / "shared.bucket")
+    # A slow refill, so the processes can only split the burst between them
+    FileTokenBucket("test", path, rate_per_minute=0.01, burst=10).stats()
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=take_all, args=(path, 0.01, 10, queue)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert sum(queue.get(timeout=1) for _ in workers) == 10
@@ -0,0 +1,88 @@
+import sqlite3
+
+from agents.response_cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+
+
+def test_cache_replays_a_completed_output_in_chunks():
+    cache = ResponseCache(MemoryCacheBackend(), replay_chunk_chars=4)
+    calls = []
+
+    def producer():
+        calls.append(1)
+        yield "hello "
+        yield "world"
+
+    key = ResponseCache.make_key(agent="test", prompt="p")
+    assert "".join(cache.stream(key, producer)) == "hello world"
+    assert list(cache.stream(key, producer)) == ["hell", "o wo", "rld"]
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+
+
+def test_abandoned_or_failed_generations_are_not_stored():
+    cache = ResponseCache(MemoryCacheBackend())
+
+    def producer():
+        yield "partial"
+        raise RuntimeError("llm down")
+
+    stream = cache.stream("key", producer)
+    assert next(stream) == "partial"
+    stream.close()
+    assert cache.backend.get("key") is None
+
+
+def test_sqlite_usage_is_a_running_total(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1000)
+    backend.set("a", "x" * 10)
+    backend.set("a", "y" * 30)
+    backend.set("b", "z" * 20)
+    assert backend.usage() == (2, 50)
+    backend.clear()
+    assert backend.usage() == (0, 0)
+
+
+def test_sqlite_usage_is_seeded_from_files_written_before_it_existed(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+        " created_at REAL NOT NULL, expires_at REAL, last_access REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO entries VALUES ('old', 'abc', 3, 0, NULL, 0)")
+    conn.commit()
+    conn.close()
+    assert SQLiteCacheBackend(path).usage() == (1, 3)
+
+
+def test_sqlite_evicts_least_recently_hit_entries_including_buffered_hits(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_bytes=100, touch_batch=1000)
+    backend.set("a", "a" * 40)
+    backend.set("b", "b" * 40)
+    # The hit on "a" is only buffered, but eviction must still see it
+    assert backend.get("a") == "a" * 40
+    backend.set("c", "c" * 40)
+    assert backend.get("b") is None
+    assert backend.get("a") is not None
+    assert backend.evictions == 1
+    assert backend.usage() == (2, 80)
+
+
+def test_sqlite_hits_are_written_in_batches(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), touch_batch=3, touch_interval=60)
+    backend.set("a", "value")
+    last_access = lambda: backend._conn().execute("SELECT last_access FROM entries").fetchone()[0]
+    stored = last_access()
+    backend.get("a")
+    backend.get("a")
+    assert last_access() == stored
+    backend.get("a")
+    assert last_access() > stored
+
+
+def test_sqlite_entries_expire(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"))
+    backend.set("a", "value", ttl=-1)
+    assert backend.get("a") is None
+    assert backend.expirations == 1
+    assert backend.usage() == (0, 0)
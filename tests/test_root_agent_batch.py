@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core", reason="agents.root_agent imports the LLM clients")
+
+from agents.cancellation import CancellationToken, GenerationCancelled  # noqa: E402
+from agents.root_agent import RootAgent  # noqa: E402
+
+
+def batch_agent(run_diagnosis):
+    agent = RootAgent.__new__(RootAgent)
+    agent.provider = "fake"
+    agent.default_language = "ko"
+    agent.run_diagnosis = run_diagnosis
+    return agent
+
+
+def test_closing_the_batch_cancels_in_flight_items():
+    stopped = threading.Event()
+
+    def run_diagnosis(analytics, language=None, cancel_token=None):
+        if analytics == "fast":
+            yield "done"
+            return
+        cancel_token.wait(5)
+        stopped.set()
+        raise GenerationCancelled(cancel_token.reason)
+
+    token = CancellationToken()
+    items = [{"id": "slow", "analytics": "slow"}, {"id": "fast", "analytics": "fast"}]
+    results = batch_agent(run_diagnosis).run_diagnosis_batch(items, max_concurrency=2, cancel_token=token)
+    assert next(results)["id"] == "fast"
+    # The client went away while the slow item's LLM call is still running
+    results.close()
+    assert stopped.wait(5)
+    assert token.reason == "client_disconnected"
+
+
+def test_items_after_the_deadline_fail_without_running():
+    calls = []
+
+    def run_diagnosis(analytics, language=None, cancel_token=None):
+        calls.append(analytics)
+        yield "ok"
+
+    token = CancellationToken(timeout=0)
+    results = list(batch_agent(run_diagnosis).run_diagnosis_batch([{"id": 1, "analytics": {"a": 1}}], cancel_token=token))
+    assert results[0]["success"] is False
+    assert "deadline_exceeded" in results[0]["error"]
+    assert calls == []
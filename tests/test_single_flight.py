@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from agents.cancellation import CancellationToken
+from agents.single_flight import SingleFlight
+
+
+def gated_producer(calls, gate, chunks=("a", "b", "c")):
+    """Producer that yields its first chunk, then waits for ``gate`` before the rest."""
+
+    def producer(token):
+        calls.append(token)
+        yield chunks[0]
+        gate.wait(5)
+        yield from chunks[1:]
+
+    return producer
+
+
+def test_concurrent_callers_share_one_generation():
+    flights = SingleFlight()
+    calls, gate = [], threading.Event()
+    leader = flights.stream("key", gated_producer(calls, gate))
+    assert next(leader) == "a"
+
+    # Joins while the leader's generation is still in flight and replays "a"
+    follower = flights.stream("key", gated_producer(calls, gate))
+    assert next(follower) == "a"
+    gate.set()
+
+    assert list(leader) == ["b", "c"]
+    assert list(follower) == ["b", "c"]
+    assert len(calls) == 1
+    stats = flights.stats()
+    assert (stats["leaders"], stats["followers"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_finished_flight_is_not_reused():
+    flights = SingleFlight()
+    calls = []
+    assert list(flights.stream("key", lambda token: calls.append(1) or iter(["x"]))) == ["x"]
+    assert list(flights.stream("key", lambda token: calls.append(1) or iter(["y"]))) == ["y"]
+    assert len(calls) == 2
+
+
+def test_producer_error_reaches_every_subscriber():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def producer(token):
+        yield "a"
+        gate.wait(5)
+        raise RuntimeError("upstream failed")
+
+    leader = flights.stream("key", producer)
+    follower = flights.stream("key", producer)
+    assert next(leader) == "a"
+    assert next(follower) == "a"
+    gate.set()
+    for subscriber in (leader, follower):
+        with pytest.raises(RuntimeError, match="upstream failed"):
+            next(subscriber)
+
+
+def test_last_subscriber_leaving_closes_the_producer():
+    flights = SingleFlight()
+    closed = threading.Event()
+
+    def producer(token):
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed.set()
+
+    stream = flights.stream("key", producer)
+    assert next(stream) == "a"
+    stream.close()
+    assert closed.is_set()
+    assert flights.stats()["abandoned"] == 1
+
+
+def test_flight_token_is_cancelled_only_when_every_caller_is():
+    flights = SingleFlight()
+    calls, gate = [], threading.Event()
+    first, second = CancellationToken(), CancellationToken()
+    leader = flights.stream("key", gated_producer(calls, gate), cancel_token=first)
+    follower = flights.stream("key", gated_producer(calls, gate), cancel_token=second)
+    next(leader)
+    next(follower)
+    flight_token = calls[0]
+
+    first.cancel("client_disconnected")
+    assert not flight_token.cancelled
+    second.cancel("client_disconnected")
+    assert flight_token.cancelled
+    assert flight_token.reason == "client_disconnected"
+    gate.set()
+
+
+def test_disabled_passes_the_callers_token_through():
+    flights = SingleFlight(enabled=False)
+    token = CancellationToken()
+    seen = []
+    assert list(flights.stream("key", lambda t: seen.append(t) or iter(["x"]), cancel_token=token)) == ["x"]
+    assert seen == [token]
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.cancellation import GenerationCancelled
+from agents.stream_buffer import BufferOverrun, StreamBuffer
+from agents.stream_sessions import StreamSessionRegistry
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+def test_buffer_replays_then_follows_and_reraises_the_producer_error():
+    buffer = StreamBuffer()
+    buffer.append("a")
+    reader = buffer.iter_from(0)
+    assert next(reader) == "a"
+    buffer.append("b")
+    assert next(reader) == "b"
+    buffer.close(RuntimeError("boom"))
+    with pytest.raises(RuntimeError, match="boom"):
+        next(reader)
+
+
+def test_bounded_buffer_reports_dropped_events_instead_of_skipping_them():
+    buffer = StreamBuffer(max_events=2)
+    for event in "abc":
+        buffer.append(event)
+    buffer.close()
+    assert buffer.base == 1
+    assert list(buffer.iter_from(1)) == ["b", "c"]
+    with pytest.raises(BufferOverrun) as excinfo:
+        next(buffer.iter_from(0))
+    assert (excinfo.value.index, excinfo.value.base) == (0, 1)
+
+
+def test_session_events_are_addressable_and_resumable():
+    registry = StreamSessionRegistry(max_workers=2, cancel_grace_seconds=None)
+    session = registry.start(lambda token: iter(["a", "b", "c"]), scope="/stream#1")
+    events = list(session.events())
+    assert events == [(f"{session.id}:0", "a"), (f"{session.id}:1", "b"), (f"{session.id}:2", "c")]
+
+    resumed_session, start = registry.resume(f"{session.id}:0", scope="/stream#1")
+    assert resumed_session is session
+    assert [event for _, event in session.events(start)] == ["b", "c"]
+    assert registry.stats()["resumed"] == 1
+
+
+def test_resume_is_refused_for_another_request_or_unknown_id():
+    registry = StreamSessionRegistry(max_workers=1, cancel_grace_seconds=None)
+    session = registry.start(lambda token: iter(["a"]), scope="/stream#1")
+    list(session.events())
+
+    assert registry.resume(f"{session.id}:0", scope="/stream#2") is None
+    assert registry.resume("unknown:0", scope="/stream#1") is None
+    assert registry.resume("not-an-id", scope="/stream#1") is None
+    assert registry.stats()["rejected_resumes"] == 1
+
+
+def test_on_finish_runs_after_the_producer_fails():
+    registry = StreamSessionRegistry(max_workers=1, cancel_grace_seconds=None)
+    finished = threading.Event()
+
+    def producer(token):
+        yield "a"
+        raise RuntimeError("llm down")
+
+    session = registry.start(producer, on_finish=finished.set)
+    reader = session.events()
+    assert next(reader)[1] == "a"
+    with pytest.raises(RuntimeError, match="llm down"):
+        next(reader)
+    assert finished.wait(1)
+
+
+def test_generation_without_readers_is_cancelled_after_the_grace_period():
+    registry = StreamSessionRegistry(max_workers=1, cancel_grace_seconds=0.1)
+
+    def producer(token):
+        while not token.wait(0.01):
+            yield "tick"
+        raise GenerationCancelled(token.reason)
+
+    session = registry.start(producer)
+    wait_until(lambda: session.finished)
+    assert session.token.reason == "client_disconnected"
+    assert registry.stats()["cancelled"] == 1
+
+
+def test_attached_reader_keeps_the_generation_alive():
+    registry = StreamSessionRegistry(max_workers=1, cancel_grace_seconds=0.1)
+
+    def producer(token):
+        # Runs for three grace periods while the reader stays attached
+        for i in range(30):
+            time.sleep(0.01)
+            yield i
+
+    session = registry.start(producer)
+    received = [event for _, event in session.events()]
+    assert received == list(range(30))
+    assert not session.token.cancelled
+
+
+def test_async_producer_runs_on_the_event_loop():
+    registry = StreamSessionRegistry(max_workers=1, cancel_grace_seconds=None)
+
+    async def produce(token):
+        for event in ("a", "b"):
+            await asyncio.sleep(0)
+            yield event
+
+    async def main():
+        session = registry.start_async(produce)
+        await asyncio.sleep(0.05)
+        return session
+
+    session = asyncio.run(main())
+    assert session.finished
+    assert [event for _, event in session.events()] == ["a", "b"]
+
+
+def test_resume_past_the_replay_buffer_reports_a_gap_instead_of_restarting():
+    registry = StreamSessionRegistry(max_workers=1, max_events=2, cancel_grace_seconds=None)
+    session = registry.start(lambda token: iter("abcd"), scope="/stream#1")
+    assert [event for _, event in session.events(2)] == ["c", "d"]
+
+    resumed_session, start = registry.resume(f"{session.id}:0", scope="/stream#1")
+    assert resumed_session is session
+    with pytest.raises(BufferOverrun) as excinfo:
+        next(session.events(start))
+    assert (excinfo.value.index, excinfo.value.base) == (1, 2)
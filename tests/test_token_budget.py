@@ -0,0 +1,62 @@
+from agents.token_budget import TokenEstimator, fit_history
+
+
+def history(times, **extra):
+    return {"deviceType": "airconditioner", "events": [{"ts": t, "power": 100 + i, **extra} for i, t in enumerate(times)]}
+
+
+def test_history_within_budget_is_returned_unchanged():
+    original = history([1, 2, 3])
+    fitted, report = fit_history(original, 10**6, len)
+    assert fitted is original
+    assert report["tokens_before"] == report["tokens_after"]
+
+
+def test_repeated_entries_collapse_before_anything_is_dropped():
+    original = {"events": [{"ts": t, "mode": "cool"} for t in range(1, 41)]}
+    fitted, report = fit_history(original, len(str(original)) // 2, len)
+    assert report["collapsed"] == 39
+    assert fitted["events"] == [{"ts": 1, "mode": "cool", "repeatCount": 40, "lastSeen": 40}]
+    # The input is not modified
+    assert len(original["events"]) == 40
+
+
+def test_oldest_entries_are_merged_into_an_aggregate():
+    original = history(range(100))
+    fitted, report = fit_history(original, len(str(original)) // 2, len)
+    head = fitted["events"][0]
+    assert report["aggregated"] == head["aggregatedEntries"]
+    assert head["from"] == 0
+    assert head["power"]["min"] == 100
+    assert fitted["events"][-1]["ts"] == 99
+    assert report["tokens_after"] <= report["budget"]
+
+
+def test_numeric_times_are_ordered_numerically():
+    # As strings, "100" < "20" < "9"; the oldest entries must go first
+    original = history([100, 9, 1000, 20, 5])
+    fitted, report = fit_history(original, 70, len, render=lambda h: str(h["events"]))
+    assert [e["ts"] for e in fitted["events"]] == [100, 1000]
+    assert report["dropped"] == 3
+
+
+def test_iso_times_are_ordered_and_mixed_types_keep_list_order():
+    iso = history(["2024-01-03T00:00:00", "2024-01-01T00:00:00", "2024-01-02T00:00:00"])
+    fitted, _ = fit_history(iso, 60, len, render=lambda h: str(h["events"]))
+    assert fitted["events"][-1]["ts"] == "2024-01-03T00:00:00"
+
+    mixed = history([3, "1", 2])
+    fitted, _ = fit_history(mixed, 40, len, render=lambda h: str(h["events"]))
+    assert fitted["events"][-1]["ts"] == 2
+
+
+def test_min_entries_are_kept_even_over_budget():
+    fitted, report = fit_history(history(range(10)), 1, len, min_entries=2)
+    assert len(fitted["events"]) == 2
+    assert report["over_budget"]
+
+
+def test_estimator_counts_non_ascii_text_per_character():
+    estimator = TokenEstimator(chars_per_token=4, non_ascii_tokens_per_char=1)
+    assert estimator.count("abcdefgh") == 2
+    assert estimator.count("필터 청소") == 5